@@ -10,19 +10,97 @@ To add a new data source:
 """
 
 import os
-import requests
-from flask import Flask, render_template, jsonify
+import time
+import orjson
+from flask import Flask, Response, g, render_template, jsonify, request
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
 from dotenv import load_dotenv
 
-from providers import get_provider, REGISTRY
+from providers import (get_provider, REGISTRY, CACHE, compare, failover, history, horizons, indicators, log,
+                       metrics, prefetch, quota, responses, screen, stream)
+from providers.batch import fetch_many, parse_tickers, MAX_TICKERS
+from providers.errors import error_status
 
 load_dotenv()
+log.setup()
+
+
+class OrjsonProvider(JSONProvider):
+    """jsonify() / request.get_json() through orjson (see providers/responses.py)."""
+
+    def dumps(self, obj, **kwargs) -> str:
+        return responses.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app)
 
 
+# ─── Instrumentation ──────────────────────────────────────────────────────────
+
+@app.before_request
+def start_timer():
+    # Warm the configured watchlist (see providers/prefetch.py) from the first
+    # request on, i.e. in the process serving it: with gunicorn --preload the
+    # app is imported in the master, whose threads don't survive into the
+    # forked workers. The script entry point also starts it up front.
+    prefetch.start()
+    g.started = time.perf_counter()
+    g.request_id, g.log_token = log.begin_request(request.headers.get('X-Request-ID'))
+    metrics.HTTP_IN_FLIGHT.inc()
+
+
+@app.after_request
+def observe_request(response: Response) -> Response:
+    """
+    Record the request's latency by route template and echo its request id
+    (registered first, so it runs after compress).
+    """
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    metrics.HTTP_REQUESTS.observe(time.perf_counter() - g.started, route, str(response.status_code))
+    response.headers['X-Request-ID'] = g.request_id
+    return response
+
+
+@app.teardown_request
+def end_request(exc):
+    if 'started' in g:
+        metrics.HTTP_IN_FLIGHT.dec()
+        log.end_request(g.log_token)
+
+
+# ─── Responses ────────────────────────────────────────────────────────────────
+
+def tagged_json(payload, tag: str) -> Response:
+    """JSON response carrying an ETag, or an empty 304 when If-None-Match already names it."""
+    if responses.matches(request.headers.get('If-None-Match'), tag):
+        responses.not_modified()
+        response = Response(status=304)
+    else:
+        response = Response(responses.body(payload), mimetype='application/json')
+    response.set_etag(tag)
+    response.headers['Cache-Control'] = 'no-cache'   # cache, but revalidate every time
+    return response
+
+
+@app.after_request
+def compress(response: Response) -> Response:
+    """Compress large JSON bodies with brotli or gzip when the client accepts it."""
+    if response.mimetype != 'application/json' or response.direct_passthrough:
+        return response
+    data, encoding = responses.encode(response.get_data(), request.headers.get('Accept-Encoding'))
+    response.vary.add('Accept-Encoding')
+    if encoding is not None:
+        response.set_data(data)
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+
 # ─── Routes ───────────────────────────────────────────────────────────────────
 
 @app.route('/')
@@ -31,6 +109,50 @@ def index():
     return render_template('index.html')
 
 
+@app.route('/api/auto/<ticker>')
+def get_auto_data(ticker: str):
+    """
+    Provider-agnostic endpoint: the healthiest provider answers, with hedged
+    requests and failover (see providers/failover.py). The result names the
+    winning provider in its 'provider' field.
+
+    URL example:
+      GET /api/auto/AAPL
+    """
+    try:
+        extra = horizons.parse(request.args.get('dates'), request.args.get('lookbacks'))
+        studies = indicators.parse(request.args.get('indicators'))
+        data = failover.fetch(ticker)
+        payload = indicators.attach(data['provider'], horizons.attach(data['provider'], data, extra), studies)
+        return tagged_json(payload, responses.etag(data, extra, studies))
+    except Exception as e:
+        message, status = error_status(e, ticker)
+        return jsonify({'error': message}), status
+
+
+@app.route('/api/compare/<ticker>')
+def get_comparison(ticker: str):
+    """
+    Cross-provider comparison: every provider at once under one deadline,
+    with price spread and stale timestamps (see providers/compare.py).
+
+    URL examples:
+      GET /api/compare/AAPL
+      GET /api/compare/AAPL?timeout=3
+
+    Providers that fail are reported under 'errors', and those still running
+    at the deadline under 'pending'; the response is 200 either way.
+    """
+    try:
+        timeout = compare.parse_timeout(request.args.get('timeout'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    payload = compare.fetch(ticker, timeout)
+    tags = {slug: responses.etag(result) for slug, result in payload['results'].items()}
+    return tagged_json(payload, responses.combine('compare', tags, payload['errors'], payload['pending']))
+
+
 @app.route('/api/<provider>/<ticker>')
 def get_stock_data(provider: str, ticker: str):
     """
@@ -39,6 +161,40 @@ def get_stock_data(provider: str, ticker: str):
     URL examples:
       GET /api/alpha-vantage/AAPL
       GET /api/yahoo-finance/AAPL
+      GET /api/yahoo-finance/AAPL?dates=2025-04-01,2026-01-02&lookbacks=5,30,90,252
+      GET /api/yahoo-finance/AAPL?indicators=sma20,ema50,rsi14,stdev20
+
+    `dates` and `lookbacks` add extra comparisons (see providers/horizons.py);
+    `indicators` adds technical indicators (see providers/indicators.py).
+    """
+    fetch = get_provider(provider)
+    if fetch is None:
+        available = list(REGISTRY.keys())
+        return jsonify({
+            'error': f'Unknown provider "{provider}". Available: {available}'
+        }), 400
+
+    try:
+        extra = horizons.parse(request.args.get('dates'), request.args.get('lookbacks'))
+        studies = indicators.parse(request.args.get('indicators'))
+        data = fetch(ticker)
+        payload = indicators.attach(provider, horizons.attach(provider, data, extra), studies)
+        return tagged_json(payload, responses.etag(data, extra, studies))
+    except Exception as e:
+        message, status = error_status(e, ticker)
+        return jsonify({'error': message}), status
+
+
+@app.route('/api/<provider>/<ticker>/history')
+def get_history(provider: str, ticker: str):
+    """
+    Daily price history for charting, served from the history store the
+    provider fetch keeps up to date (see providers/history.py).
+
+    URL examples:
+      GET /api/yahoo-finance/AAPL/history
+      GET /api/yahoo-finance/AAPL/history?from=2025-01-01&points=300&method=lttb
+      GET /api/massive/AAPL/history?points=120&method=ohlc
     """
     fetch = get_provider(provider)
     if fetch is None:
@@ -48,28 +204,155 @@ def get_stock_data(provider: str, ticker: str):
         }), 400
 
     try:
+        params = history.parse(request.args)
         data = fetch(ticker)
-        return jsonify(data)
+        return tagged_json(history.series(provider, data, params), responses.etag(data, 'history', params))
+    except Exception as e:
+        message, status = error_status(e, ticker)
+        return jsonify({'error': message}), status
+
+
+@app.route('/api/<provider>/batch')
+def get_batch_data(provider: str):
+    """
+    Batch endpoint — fetches many tickers in one request.
+
+    URL example:
+      GET /api/fmp/batch?tickers=AAPL,MSFT,GOOGL
+      GET /api/fmp/batch?tickers=AAPL,MSFT&lookbacks=90,252
+
+    Accepts the same `dates` / `lookbacks` / `indicators` parameters as the
+    single-ticker endpoint. Returns per-ticker results and per-ticker errors side by side; the
+    response is 200 even when some tickers fail.
+    """
+    fetch = get_provider(provider)
+    if fetch is None:
+        available = list(REGISTRY.keys())
+        return jsonify({
+            'error': f'Unknown provider "{provider}". Available: {available}'
+        }), 400
+
+    tickers = parse_tickers(request.args.get('tickers', ''))
+    if not tickers:
+        return jsonify({'error': 'Please pass tickers, e.g. ?tickers=AAPL,MSFT'}), 400
+    if len(tickers) > MAX_TICKERS:
+        return jsonify({'error': f'Too many tickers ({len(tickers)}); the limit is {MAX_TICKERS}.'}), 400
+    try:
+        extra = horizons.parse(request.args.get('dates'), request.args.get('lookbacks'))
+        studies = indicators.parse(request.args.get('indicators'))
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
-    except requests.exceptions.HTTPError as e:
-        if hasattr(e, 'response') and e.response is not None and e.response.status_code == 404:
-            return jsonify({'error': f'Ticker "{ticker}" not found.'}), 404
-        return jsonify({'error': f'HTTP error: {str(e)}'}), 502
-    except requests.exceptions.Timeout:
-        return jsonify({'error': 'Request timed out. Please try again.'}), 504
-    except requests.exceptions.RequestException as e:
-        return jsonify({'error': f'Network error: {str(e)}'}), 502
-    except Exception as e:
-        return jsonify({'error': f'Unexpected error: {str(e)}'}), 500
+
+    results, errors, tags = {}, {}, {}
+    for ticker, outcome in fetch_many(provider, fetch, tickers).items():
+        if isinstance(outcome, Exception):
+            message, status = error_status(outcome, ticker)
+            errors[ticker] = {'error': message, 'status': status}
+        else:
+            results[ticker] = indicators.attach(provider, horizons.attach(provider, outcome, extra), studies)
+            tags[ticker] = responses.etag(outcome)
+
+    return tagged_json({
+        'provider': provider,
+        'results':  results,
+        'errors':   errors,
+    }, responses.combine(provider, extra, studies, tags, errors))
+
+
+@app.route('/api/<provider>/screen')
+def get_screen(provider: str):
+    """
+    Screener — returns, ranks, filters and sorts across many tickers at once
+    (see providers/screen.py).
+
+    URL examples:
+      GET /api/yahoo-finance/screen?tickers=AAPL,MSFT,NVDA&where=changePercent30Days>5
+      GET /api/fmp/screen?tickers=AAPL,MSFT,NVDA&lookbacks=90&sort=-changePercent90Days&limit=10
+
+    Tickers that fail are reported under 'errors' and left out of the screen;
+    the response is 200 even when some tickers fail.
+    """
+    fetch = get_provider(provider)
+    if fetch is None:
+        available = list(REGISTRY.keys())
+        return jsonify({
+            'error': f'Unknown provider "{provider}". Available: {available}'
+        }), 400
+
+    tickers = parse_tickers(request.args.get('tickers', ''))
+    if not tickers:
+        return jsonify({'error': 'Please pass tickers, e.g. ?tickers=AAPL,MSFT'}), 400
+    if len(tickers) > screen.MAX_TICKERS:
+        return jsonify({'error': f'Too many tickers ({len(tickers)}); the limit is {screen.MAX_TICKERS}.'}), 400
+    try:
+        params = screen.parse(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    results, errors, tags = {}, {}, {}
+    for ticker, outcome in fetch_many(provider, fetch, tickers).items():
+        if isinstance(outcome, Exception):
+            message, status = error_status(outcome, ticker)
+            errors[ticker] = {'error': message, 'status': status}
+        else:
+            results[ticker] = outcome
+            tags[ticker] = responses.etag(outcome)
+
+    return tagged_json({
+        **screen.screen(provider, results, params),
+        'errors': errors,
+    }, responses.combine(provider, 'screen', params, tags, errors))
+
+
+@app.route('/api/stream')
+def stream_prices():
+    """
+    Server-Sent Events stream of live price updates (see providers/stream.py).
+
+    URL example:
+      GET /api/stream?provider=yahoo-finance&tickers=AAPL,MSFT
+
+    Each ticker is polled once server-side however many clients watch it.
+    Sends a full 'quote' event per ticker first, then only changed fields.
+    """
+    provider = request.args.get('provider', 'yahoo-finance')
+    if get_provider(provider) is None:
+        available = list(REGISTRY.keys())
+        return jsonify({
+            'error': f'Unknown provider "{provider}". Available: {available}'
+        }), 400
+
+    tickers = parse_tickers(request.args.get('tickers', ''))
+    if not tickers:
+        return jsonify({'error': 'Please pass tickers, e.g. ?tickers=AAPL,MSFT'}), 400
+    if len(tickers) > MAX_TICKERS:
+        return jsonify({'error': f'Too many tickers ({len(tickers)}); the limit is {MAX_TICKERS}.'}), 400
+
+    return Response(stream.sse(provider, tickers), mimetype='text/event-stream', headers={
+        'Cache-Control':     'no-cache',
+        'X-Accel-Buffering': 'no',   # don't let a reverse proxy buffer the stream
+    })
+
+
+@app.route('/metrics')
+def get_metrics():
+    """Prometheus text exposition of latency histograms and counters (see providers/metrics.py)."""
+    return Response(metrics.exposition(), content_type=metrics.CONTENT_TYPE)
 
 
 @app.route('/health')
 def health():
-    """Health check — also reports which providers are registered."""
+    """Health check — also reports providers, cache counters, remaining quota and provider health."""
     return jsonify({
         'status': 'ok',
         'providers': list(REGISTRY.keys()),
+        'cache': CACHE.stats(),
+        'quota': quota.stats(),
+        'auto': failover.stats(),
+        'stream': stream.HUB.stats(),
+        'prefetch': prefetch.stats(),
+        'responses': responses.stats(),
+        'log': log.stats(),
     })
 
 
@@ -83,4 +366,6 @@ if __name__ == '__main__':
     print(f'🚀 Starting Stock Price Check App on http://localhost:{port}')
     print(f'   Alpha Vantage API Key : {"✅ configured" if alpha_key else "❌ not set"}')
     print(f'   Registered providers  : {list(REGISTRY.keys())}')
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        prefetch.start()
     app.run(host=host, port=port, debug=debug)
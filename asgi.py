@@ -0,0 +1,371 @@
+"""
+Stock Price Check App - ASGI Backend
+====================================
+Async counterpart of app.py for high-concurrency deployments.
+
+The Flask app holds a worker thread for the whole duration of every upstream
+call. Here each request is a coroutine awaiting the providers' fetch_async()
+functions (see providers/aio.py), so one process can keep thousands of
+upstream waits in flight, and each provider's independent upstream calls
+(quote and company name) are issued concurrently.
+
+Serves the JSON API only; the HTML page and static files stay on app.py.
+
+Run with:
+  uvicorn asgi:app --host 0.0.0.0 --port 8081
+
+Routes:
+  GET /api/auto/<ticker>[?dates=...&lookbacks=...&indicators=...]
+  GET /api/compare/<ticker>[?timeout=...]
+  GET /api/<provider>/<ticker>[?dates=...&lookbacks=...&indicators=...]
+  GET /api/<provider>/batch?tickers=...[&dates=...&lookbacks=...&indicators=...]
+  GET /api/<provider>/screen?tickers=...[&lookbacks=...&where=...&sort=...&limit=...]
+  GET /api/<provider>/<ticker>/history[?from=...&to=...&points=...&method=...]
+  GET /api/stream?provider=...&tickers=...   (Server-Sent Events)
+  GET /health
+  GET /metrics                               (Prometheus text format)
+"""
+
+import asyncio
+import sys
+import time
+from contextlib import suppress
+from urllib.parse import parse_qs
+
+from dotenv import load_dotenv
+
+from providers import (ASYNC_REGISTRY, CACHE, compare, failover, get_async_provider, history, horizons,
+                       indicators, log, metrics, prefetch, quota, responses, screen, stream)
+from providers.batch import MAX_TICKERS, fetch_many_async, parse_tickers
+from providers.errors import error_status
+
+load_dotenv()
+log.setup()
+
+
+# ─── Routes ───────────────────────────────────────────────────────────────────
+
+async def get_auto_data(ticker: str, query: dict) -> tuple:
+    """Provider-agnostic endpoint with hedging and failover. Returns (payload, status)."""
+    try:
+        extra = horizons.parse(query.get('dates'), query.get('lookbacks'))
+        studies = indicators.parse(query.get('indicators'))
+        result = await failover.fetch_async(ticker)
+        tag = responses.etag(result, extra, studies)
+        if extra is not None:
+            result = await asyncio.to_thread(horizons.attach, result['provider'], result, extra)
+        if studies is not None:
+            result = await asyncio.to_thread(indicators.attach, result['provider'], result, studies)
+        return responses.Tagged(result, tag), 200
+    except Exception as e:
+        message, status = error_status(e, ticker)
+        return {'error': message}, status
+
+
+async def get_comparison(ticker: str, query: dict) -> tuple:
+    """Every provider at once under one deadline (see providers/compare.py). Returns (payload, status)."""
+    try:
+        timeout = compare.parse_timeout(query.get('timeout'))
+    except ValueError as e:
+        return {'error': str(e)}, 400
+
+    payload = await compare.fetch_async(ticker, timeout)
+    tags = {slug: responses.etag(result) for slug, result in payload['results'].items()}
+    return responses.Tagged(payload, responses.combine('compare', tags, payload['errors'], payload['pending'])), 200
+
+
+async def get_stock_data(provider: str, ticker: str, query: dict) -> tuple:
+    """Unified stock data endpoint. Returns (payload, status); a result payload is Tagged with its ETag."""
+    fetch_async = get_async_provider(provider)
+    if fetch_async is None:
+        available = list(ASYNC_REGISTRY.keys())
+        return {'error': f'Unknown provider "{provider}". Available: {available}'}, 400
+
+    try:
+        extra = horizons.parse(query.get('dates'), query.get('lookbacks'))
+        studies = indicators.parse(query.get('indicators'))
+        result = await fetch_async(ticker)
+        tag = responses.etag(result, extra, studies)
+        if extra is not None:
+            result = await asyncio.to_thread(horizons.attach, provider, result, extra)
+        if studies is not None:
+            result = await asyncio.to_thread(indicators.attach, provider, result, studies)
+        return responses.Tagged(result, tag), 200
+    except Exception as e:
+        message, status = error_status(e, ticker)
+        return {'error': message}, status
+
+
+async def get_history(provider: str, ticker: str, query: dict) -> tuple:
+    """Daily price history for charting (see providers/history.py). Returns (payload, status)."""
+    fetch_async = get_async_provider(provider)
+    if fetch_async is None:
+        available = list(ASYNC_REGISTRY.keys())
+        return {'error': f'Unknown provider "{provider}". Available: {available}'}, 400
+
+    try:
+        params = history.parse(query)
+        result = await fetch_async(ticker)
+        payload = await asyncio.to_thread(history.series, provider, result, params)
+        return responses.Tagged(payload, responses.etag(result, 'history', params)), 200
+    except Exception as e:
+        message, status = error_status(e, ticker)
+        return {'error': message}, status
+
+
+async def get_batch_data(provider: str, query: dict) -> tuple:
+    """Many tickers in one request, per-ticker results and errors side by side. Returns (payload, status)."""
+    fetch_async = get_async_provider(provider)
+    if fetch_async is None:
+        available = list(ASYNC_REGISTRY.keys())
+        return {'error': f'Unknown provider "{provider}". Available: {available}'}, 400
+
+    tickers = parse_tickers(query.get('tickers', ''))
+    if not tickers:
+        return {'error': 'Please pass tickers, e.g. ?tickers=AAPL,MSFT'}, 400
+    if len(tickers) > MAX_TICKERS:
+        return {'error': f'Too many tickers ({len(tickers)}); the limit is {MAX_TICKERS}.'}, 400
+    try:
+        extra = horizons.parse(query.get('dates'), query.get('lookbacks'))
+        studies = indicators.parse(query.get('indicators'))
+    except ValueError as e:
+        return {'error': str(e)}, 400
+
+    def attach(outcomes: dict) -> tuple:
+        results, errors, tags = {}, {}, {}
+        for ticker, outcome in outcomes.items():
+            if isinstance(outcome, Exception):
+                message, status = error_status(outcome, ticker)
+                errors[ticker] = {'error': message, 'status': status}
+            else:
+                results[ticker] = indicators.attach(provider, horizons.attach(provider, outcome, extra), studies)
+                tags[ticker] = responses.etag(outcome)
+        return results, errors, tags
+
+    outcomes = await fetch_many_async(fetch_async, tickers)
+    results, errors, tags = await asyncio.to_thread(attach, outcomes)
+    return responses.Tagged({
+        'provider': provider,
+        'results':  results,
+        'errors':   errors,
+    }, responses.combine(provider, extra, studies, tags, errors)), 200
+
+
+async def get_screen(provider: str, query: dict) -> tuple:
+    """Screener over many tickers (see providers/screen.py). Returns (payload, status)."""
+    fetch_async = get_async_provider(provider)
+    if fetch_async is None:
+        available = list(ASYNC_REGISTRY.keys())
+        return {'error': f'Unknown provider "{provider}". Available: {available}'}, 400
+
+    tickers = parse_tickers(query.get('tickers', ''))
+    if not tickers:
+        return {'error': 'Please pass tickers, e.g. ?tickers=AAPL,MSFT'}, 400
+    if len(tickers) > screen.MAX_TICKERS:
+        return {'error': f'Too many tickers ({len(tickers)}); the limit is {screen.MAX_TICKERS}.'}, 400
+    try:
+        params = screen.parse(query)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+
+    results, errors, tags = {}, {}, {}
+    for ticker, outcome in (await fetch_many_async(fetch_async, tickers)).items():
+        if isinstance(outcome, Exception):
+            message, status = error_status(outcome, ticker)
+            errors[ticker] = {'error': message, 'status': status}
+        else:
+            results[ticker] = outcome
+            tags[ticker] = responses.etag(outcome)
+
+    payload = await asyncio.to_thread(screen.screen, provider, results, params)
+    return responses.Tagged({
+        **payload,
+        'errors': errors,
+    }, responses.combine(provider, 'screen', params, tags, errors)), 200
+
+
+async def stream_prices(query: dict) -> tuple:
+    """
+    Server-Sent Events stream of live price updates. Returns (async chunk
+    iterator, 200), or (error payload, status) for a bad request.
+    """
+    provider = query.get('provider', 'yahoo-finance')
+    if provider not in ASYNC_REGISTRY:
+        available = list(ASYNC_REGISTRY.keys())
+        return {'error': f'Unknown provider "{provider}". Available: {available}'}, 400
+
+    tickers = parse_tickers(query.get('tickers', ''))
+    if not tickers:
+        return {'error': 'Please pass tickers, e.g. ?tickers=AAPL,MSFT'}, 400
+    if len(tickers) > MAX_TICKERS:
+        return {'error': f'Too many tickers ({len(tickers)}); the limit is {MAX_TICKERS}.'}, 400
+
+    return stream.sse_async(provider, tickers), 200
+
+
+async def health() -> tuple:
+    """Health check — also reports providers, cache counters, remaining quota and provider health."""
+    return {
+        'status': 'ok',
+        'providers': list(ASYNC_REGISTRY.keys()),
+        'cache': CACHE.stats(),
+        'quota': await asyncio.to_thread(quota.stats),
+        'auto': failover.stats(),
+        'stream': stream.HUB.stats(),
+        'prefetch': prefetch.stats(),
+        'responses': responses.stats(),
+        'log': log.stats(),
+    }, 200
+
+
+async def route(method: str, path: str, query_string: bytes = b'') -> tuple:
+    """Dispatch a request path to a route coroutine; returns (payload, status)."""
+    if method != 'GET':
+        return {'error': 'Method not allowed'}, 405
+
+    parts = [p for p in path.split('/') if p]
+    query = {k: v[-1] for k, v in parse_qs(query_string.decode('latin-1')).items()}
+    if parts == ['api', 'stream']:
+        return await stream_prices(query)
+    if len(parts) == 3 and parts[0] == 'api':
+        if parts[1] == 'auto':
+            return await get_auto_data(parts[2], query)
+        if parts[1] == 'compare':
+            return await get_comparison(parts[2], query)
+        if parts[2] == 'batch':
+            return await get_batch_data(parts[1], query)
+        if parts[2] == 'screen':
+            return await get_screen(parts[1], query)
+        return await get_stock_data(parts[1], parts[2], query)
+    if len(parts) == 4 and parts[0] == 'api' and parts[3] == 'history':
+        return await get_history(parts[1], parts[2], query)
+    if parts == ['health']:
+        return await health()
+    return {'error': 'Not found'}, 404
+
+
+def route_name(path: str) -> str:
+    """The route template a path matches, named like app.py's Flask rules (a metrics label)."""
+    parts = [p for p in path.split('/') if p]
+    if parts in (['api', 'stream'], ['health'], ['metrics']):
+        return '/' + '/'.join(parts)
+    if len(parts) == 3 and parts[0] == 'api':
+        if parts[1] in ('auto', 'compare'):
+            return f'/api/{parts[1]}/<ticker>'
+        if parts[2] in ('batch', 'screen'):
+            return f'/api/<provider>/{parts[2]}'
+        return '/api/<provider>/<ticker>'
+    if len(parts) == 4 and parts[0] == 'api' and parts[3] == 'history':
+        return '/api/<provider>/<ticker>/history'
+    return 'unmatched'
+
+
+# ─── ASGI application ─────────────────────────────────────────────────────────
+
+async def app(scope, receive, send):
+    """ASGI entry point."""
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                prefetch.start()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                aio = sys.modules.get('providers.aio')   # loaded with the first provider
+                if aio is not None:
+                    await aio.aclose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    if scope['type'] != 'http':
+        return
+
+    started = time.perf_counter()
+    incoming = next((value.decode('latin-1') for name, value in scope.get('headers', [])
+                     if name == b'x-request-id'), None)
+    request_id, token = log.begin_request(incoming)
+
+    async def send_with_id(message):
+        if message['type'] == 'http.response.start':
+            message = {**message, 'headers': [*message.get('headers', []), (b'x-request-id', request_id.encode())]}
+        await send(message)
+
+    metrics.HTTP_IN_FLIGHT.inc()
+    status = 500
+    try:
+        status = await respond(scope, receive, send_with_id)
+    finally:
+        metrics.HTTP_IN_FLIGHT.dec()
+        metrics.HTTP_REQUESTS.observe(time.perf_counter() - started, route_name(scope['path']), str(status))
+        log.end_request(token)
+
+
+async def respond(scope, receive, send) -> int:
+    """Answer one HTTP request; returns the status sent."""
+    if scope['method'] == 'GET' and scope['path'].rstrip('/') == '/metrics':
+        body = metrics.exposition().encode()
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', metrics.CONTENT_TYPE.encode()),
+                (b'content-length', str(len(body)).encode()),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+        return 200
+
+    payload, status = await route(scope['method'], scope['path'], scope.get('query_string', b''))
+    if hasattr(payload, '__aiter__'):
+        await send_stream(payload, receive, send)
+        return status
+
+    request_headers = {name.decode('latin-1'): value.decode('latin-1')
+                       for name, value in scope.get('headers', [])}
+    headers = [(b'access-control-allow-origin', b'*'), (b'vary', b'Accept-Encoding')]
+    if isinstance(payload, responses.Tagged):
+        payload, tag = payload
+        headers += [(b'etag', f'"{tag}"'.encode()), (b'cache-control', b'no-cache')]
+        if responses.matches(request_headers.get('if-none-match'), tag):
+            responses.not_modified()
+            await send({'type': 'http.response.start', 'status': 304, 'headers': headers})
+            await send({'type': 'http.response.body', 'body': b''})
+            return 304
+
+    body, encoding = responses.encode(responses.body(payload), request_headers.get('accept-encoding'))
+    if encoding is not None:
+        headers.append((b'content-encoding', encoding.encode()))
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': headers + [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode()),
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+    return status
+
+
+async def send_stream(chunks, receive, send):
+    """Send an async iterator of text/event-stream chunks until the client disconnects."""
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'access-control-allow-origin', b'*'),
+        ],
+    })
+
+    async def pump():
+        async for chunk in chunks:
+            await send({'type': 'http.response.body', 'body': chunk.encode(), 'more_body': True})
+
+    task = asyncio.ensure_future(pump())
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+    task.cancel()
+    with suppress(asyncio.CancelledError):
+        await task
@@ -0,0 +1,12 @@
+"""Benchmarks run against a local stub upstream — see benchmarks/stub_upstream.py."""
+
+import os
+import tempfile
+
+# Keep benchmark bars out of the real history store (must run before providers is imported)
+os.environ.setdefault('HISTORY_DB', os.path.join(tempfile.mkdtemp(prefix='stock-bench-'), 'history.sqlite3'))
+
+# The stub upstream has no rate limits, so switch off the free-tier quotas (see providers/quota.py)
+for _slug in ('ALPHA_VANTAGE', 'FMP', 'MASSIVE', 'YAHOO_FINANCE'):
+    os.environ.setdefault(f'QUOTA_{_slug}_PER_MINUTE', '0')
+    os.environ.setdefault(f'QUOTA_{_slug}_PER_DAY', '0')
@@ -0,0 +1,50 @@
+"""
+benchmarks/bench_async.py
+=========================
+Holds N concurrent upstream waits in one process with the async engine:
+fires N fetch_async() calls for distinct tickers through an in-process stub
+transport with fixed latency, and reports wall time and upstream calls.
+Upstream waits overlap, so wall time is one round trip plus the CPU cost of
+parsing and computing N results, not N round trips.
+
+    python -m benchmarks.bench_async --provider massive --tickers 2000 --latency 0.5
+"""
+
+import argparse
+import asyncio
+import time
+from collections import Counter
+
+from providers import ASYNC_REGISTRY, CACHE, aio
+from .stub_upstream import StubUpstream, point_providers_at, stub_transport
+
+
+async def burst(fetch_async, tickers: list) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(fetch_async(t) for t in tickers))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--provider', default='massive')
+    parser.add_argument('--tickers',  type=int,   default=1000)
+    parser.add_argument('--latency',  type=float, default=0.5)
+    args = parser.parse_args()
+
+    with StubUpstream() as stub:
+        point_providers_at(stub)   # only for BASE_URLs and dummy API keys
+    calls = Counter()
+    aio.set_transport(stub_transport(latency=args.latency, counter=calls))
+    CACHE.clear()
+
+    tickers = [f'A{i:04d}' for i in range(args.tickers)]
+    elapsed = asyncio.run(burst(ASYNC_REGISTRY[args.provider], tickers))
+    upstream = sum(calls.values())
+    print(f'async  tickers={len(tickers):5d}  upstream calls={upstream:5d}  '
+          f'latency={args.latency * 1000:.0f} ms  wall={elapsed * 1000:8.1f} ms  '
+          f'(serial upstream wait would be {upstream * args.latency:.0f} s)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+benchmarks/bench_bars.py
+========================
+Memory held per symbol, and decode time, for a year of daily bars in the
+previous per-request structures versus the columnar Bars container:
+
+  - list of dicts, as decoded from the upstream JSON (FMP / Massive style)
+  - list of (date, open, close) tuples (the old history store rows)
+  - dict of date string → rounded close (the old lookback map)
+  - Bars (int32 days + four float64 columns)
+
+Memory is what stays allocated (tracemalloc) after the JSON payload has been
+dropped, divided by the number of symbols.
+
+    python -m benchmarks.bench_bars --symbols 1000 --days 365
+"""
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from datetime import datetime
+
+from providers.bars import Bars, local_day_numbers
+from .stub_upstream import synthetic_bars
+
+
+def payload(symbol: str, days: int) -> str:
+    """A Yahoo-style chart payload (JSON text) for one symbol."""
+    bars = synthetic_bars(symbol, days=days)
+    return json.dumps({
+        'timestamp': [int(datetime.strptime(d, '%Y-%m-%d').timestamp()) + 14 * 3600 for d, _, _ in bars],
+        'open':      [o for _, o, _ in bars],
+        'high':      [max(o, c) for _, o, c in bars],
+        'low':       [min(o, c) for _, o, c in bars],
+        'close':     [c for _, _, c in bars],
+    })
+
+
+# ── Decoders ──────────────────────────────────────────────────────────────────
+
+def as_dicts(data: dict) -> list:
+    return [{'date': datetime.fromtimestamp(ts).strftime('%Y-%m-%d'), 'open': o, 'high': h, 'low': l, 'close': c}
+            for ts, o, h, l, c in zip(data['timestamp'], data['open'], data['high'], data['low'], data['close'])]
+
+
+def as_tuples(data: dict) -> list:
+    return [(datetime.fromtimestamp(ts).strftime('%Y-%m-%d'), o, c)
+            for ts, o, c in zip(data['timestamp'], data['open'], data['close']) if c is not None]
+
+
+def as_date_map(data: dict) -> dict:
+    return {day: round(close, 2) for day, _, close in as_tuples(data)}
+
+
+def as_bars(data: dict) -> Bars:
+    return Bars.from_columns(local_day_numbers(data['timestamp']), data['close'],
+                             open=data['open'], high=data['high'], low=data['low'])
+
+
+DECODERS = {
+    'list of dicts':    as_dicts,
+    'list of tuples':   as_tuples,
+    'date → close map': as_date_map,
+    'Bars':             as_bars,
+}
+
+
+# ── Main ──────────────────────────────────────────────────────────────────────
+
+def measure(decode, payloads: list) -> tuple:
+    """(bytes retained per symbol, decode ms per symbol)."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    held = [decode(json.loads(text)) for text in payloads]
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return retained / len(payloads), elapsed / len(payloads) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--symbols', type=int, default=1000)
+    parser.add_argument('--days',    type=int, default=365)
+    args = parser.parse_args()
+
+    payloads = [payload(f'S{i:04d}', args.days) for i in range(args.symbols)]
+    bars = len(as_bars(json.loads(payloads[0])))
+
+    print(f'{args.symbols} symbols × {bars} bars (decode time includes JSON parsing; traced, so slower than usual)')
+    baseline = None
+    for name, decode in DECODERS.items():
+        per_symbol, ms = measure(decode, payloads)
+        baseline = baseline or per_symbol
+        print(f'  {name:18s} {per_symbol / 1024:8.1f} KiB/symbol  {per_symbol / bars:6.0f} B/bar  '
+              f'{baseline / per_symbol:5.1f}x smaller  decode {ms:6.3f} ms')
+    print(f'  Bars.nbytes        {as_bars(json.loads(payloads[0])).nbytes / 1024:8.1f} KiB/symbol (column arrays only)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+benchmarks/bench_batch.py
+=========================
+Throughput of N single /api/<provider>/<ticker> calls (issued serially, as the
+frontend does today) versus one /api/<provider>/batch call, against the local
+stub upstream with simulated network latency.
+
+    python -m benchmarks.bench_batch --provider fmp --tickers 50 --latency 0.05
+"""
+
+import argparse
+import time
+
+from app import app
+from providers import CACHE
+from .stub_upstream import StubUpstream, point_providers_at
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--provider', default='fmp')
+    parser.add_argument('--tickers',  type=int,   default=50)
+    parser.add_argument('--latency',  type=float, default=0.05)
+    args = parser.parse_args()
+
+    # Separate symbols per phase so the history store warmed by one phase doesn't help the other
+    single_tickers = [f'S{i:03d}' for i in range(args.tickers)]
+    tickers        = [f'B{i:03d}' for i in range(args.tickers)]
+    client = app.test_client()
+
+    with StubUpstream(latency=args.latency) as stub:
+        point_providers_at(stub)
+
+        CACHE.clear()
+        stub.reset()
+        start = time.perf_counter()
+        for ticker in single_tickers:
+            assert client.get(f'/api/{args.provider}/{ticker}').status_code == 200
+        single = time.perf_counter() - start
+        single_calls = stub.total_requests
+
+        CACHE.clear()
+        stub.reset()
+        start = time.perf_counter()
+        resp = client.get(f'/api/{args.provider}/batch?tickers={",".join(tickers)}')
+        batch = time.perf_counter() - start
+        assert resp.status_code == 200 and len(resp.json['results']) == len(tickers), resp.json['errors']
+
+        print(f'single  tickers={len(tickers):4d}  upstream calls={single_calls:4d}  '
+              f'wall={single * 1000:8.1f} ms  throughput={len(tickers) / single:7.1f} tickers/s')
+        print(f'batch   tickers={len(tickers):4d}  upstream calls={stub.total_requests:4d}  '
+              f'wall={batch * 1000:8.1f} ms  throughput={len(tickers) / batch:7.1f} tickers/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+benchmarks/bench_compare.py
+===========================
+Wall time of checking one ticker against every provider: one provider after
+another (four tabs) versus /api/compare's concurrent fetch under a deadline,
+against the stub upstream with latency and jitter. Each side asks for a
+ticker nobody has fetched yet, so both make the same cold upstream calls.
+
+    python -m benchmarks.bench_compare --latency 0.2 --jitter 0.1 --rounds 5
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from .stub_upstream import StubUpstream, point_providers_at
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--latency', type=float, default=0.2, help='stub latency in seconds')
+    parser.add_argument('--jitter',  type=float, default=0.1, help='uniform random extra latency in seconds')
+    parser.add_argument('--rounds',  type=int,   default=5)
+    args = parser.parse_args()
+
+    os.environ.setdefault('HISTORY_DB', os.path.join(tempfile.mkdtemp(prefix='stock-compare-'), 'history.sqlite3'))
+    from providers import REGISTRY, compare
+
+    logging.getLogger('stocks').setLevel(logging.ERROR)
+    print(f'{len(REGISTRY)} providers, stub latency {args.latency * 1000:.0f} ms + up to '
+          f'{args.jitter * 1000:.0f} ms jitter, {args.rounds} rounds')
+    print(f'{"round":>5s} {"serial":>9s} {"compare":>9s} {"slowest":>9s}')
+    with StubUpstream(latency=args.latency, jitter=args.jitter) as stub:
+        point_providers_at(stub)
+        for n in range(args.rounds):
+            slowest, start = 0.0, time.perf_counter()
+            for fetch in REGISTRY.values():
+                began = time.perf_counter()
+                fetch.__wrapped__(f'S{n:03d}')
+                slowest = max(slowest, time.perf_counter() - began)
+            serial = time.perf_counter() - start
+
+            start = time.perf_counter()
+            payload = compare.fetch(f'C{n:03d}')
+            parallel = time.perf_counter() - start
+            assert not payload['errors'] and not payload['pending'], payload
+            print(f'{n + 1:5d} {serial * 1000:6.0f} ms {parallel * 1000:6.0f} ms {slowest * 1000:6.0f} ms')
+
+
+if __name__ == '__main__':
+    main()
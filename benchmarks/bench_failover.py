@@ -0,0 +1,76 @@
+"""
+benchmarks/bench_failover.py
+============================
+Tail latency of /api/yahoo-finance/<ticker> versus /api/auto/<ticker> when a
+small share of upstream calls stall, against the local stub upstream.
+
+Every stub request takes --latency seconds, except a random --slow-rate share
+that takes --slow seconds. A direct request has to wait out every stall; the
+auto route hedges to a second provider after the first one's p95, so its
+tail stays near p95 + one normal response. (Hedging at p95 targets stalls
+rarer than about 5% of fetches; a provider that stalls more often than that
+is demoted by its p95 instead.)
+
+    python -m benchmarks.bench_failover --requests 300 --slow-rate 0.01 --slow 2
+"""
+
+import argparse
+import random
+import time
+
+from app import app
+from .stub_upstream import StubUpstream, point_providers_at
+
+
+def percentiles(samples: list) -> str:
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000
+    return (f'p50={pick(0.50):7.1f} ms  p95={pick(0.95):7.1f} ms  '
+            f'p99={pick(0.99):7.1f} ms  max={ordered[-1] * 1000:7.1f} ms')
+
+
+def run(client, path: str, tickers: list) -> list:
+    latencies = []
+    for ticker in tickers:
+        start = time.perf_counter()
+        resp = client.get(f'{path}/{ticker}')
+        latencies.append(time.perf_counter() - start)
+        assert resp.status_code == 200, resp.json
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--requests',  type=int,   default=300)
+    parser.add_argument('--latency',   type=float, default=0.02)
+    parser.add_argument('--slow',      type=float, default=2.0)
+    parser.add_argument('--slow-rate', type=float, default=0.01)
+    parser.add_argument('--seed',      type=int,   default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    latency = lambda: args.slow if rng.random() < args.slow_rate else args.latency
+    client = app.test_client()
+
+    # Fresh symbols per phase, so every request misses the response cache
+    warmup = [f'W{i:03d}' for i in range(20)]
+    direct = [f'D{i:03d}' for i in range(args.requests)]
+    auto   = [f'A{i:03d}' for i in range(args.requests)]
+
+    with StubUpstream(latency=latency) as stub:
+        point_providers_at(stub)
+        run(client, '/api/auto', warmup)   # builds each provider's latency history
+
+        direct_latencies = run(client, '/api/yahoo-finance', direct)
+        auto_latencies   = run(client, '/api/auto', auto)
+        health = client.get('/health').json['auto']
+
+    print(f'stub: {args.latency * 1000:.0f} ms, {args.slow_rate:.0%} of calls stall for {args.slow:g} s')
+    print(f'direct  {percentiles(direct_latencies)}')
+    print(f'auto    {percentiles(auto_latencies)}')
+    for slug, h in health.items():
+        print(f'  {slug:14s} wins={h["wins"]:4d}  hedges={h["hedges"]:3d}  p95={h["p95Ms"]} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+benchmarks/bench_history.py
+===========================
+Build time and JSON size of /history payloads for 20 years of daily bars
+(Alpha Vantage's full series from the stub upstream): the raw series versus
+LTTB and OHLC downsampling to typical chart widths. Build times are measured
+with the series memo bypassed.
+
+    python -m benchmarks.bench_history --points 200,600,1200 --repeat 20
+"""
+
+import argparse
+import time
+
+from providers import REGISTRY, history, responses
+from providers.cache import StampedLRU
+from .stub_upstream import StubUpstream, point_providers_at
+
+
+def timed(fn, repeat: int) -> float:
+    """Best-of-`repeat` milliseconds per call."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--points', default='200,600,1200')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with StubUpstream() as stub:
+        point_providers_at(stub)
+        result = REGISTRY['alpha-vantage'].__wrapped__('AAPL')
+
+    def build(params):
+        history._series = StampedLRU(1)   # measure the build, not the memo
+        return history.series('alpha-vantage', result, params)
+
+    cases = [('raw', None, 'lttb')]
+    for points in (int(p) for p in args.points.split(',')):
+        cases += [(f'lttb {points}', points, 'lttb'), (f'ohlc {points}', points, 'ohlc')]
+
+    print(f'{"series":12s} {"points":>7s} {"build":>9s} {"json":>10s}')
+    for name, points, method in cases:
+        params = (None, None, points, method)
+        payload = build(params)
+        ms = timed(lambda: build(params), args.repeat)
+        print(f'{name:12s} {payload["points"]:7d} {ms:6.2f} ms {len(responses.dumps(payload)) / 1024:7.1f} KiB')
+
+
+if __name__ == '__main__':
+    main()
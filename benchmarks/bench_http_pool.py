@@ -0,0 +1,58 @@
+"""
+benchmarks/bench_http_pool.py
+=============================
+Compares one-connection-per-call `requests.get` with the pooled sessions in
+providers/http_client.py by running sequential provider fetches against the
+local stub upstream and reporting TCP connections opened and latency per fetch.
+
+    python -m benchmarks.bench_http_pool --fetches 50 --provider fmp
+"""
+
+import argparse
+import statistics
+import time
+
+import requests
+
+from providers import REGISTRY, http_client
+from .stub_upstream import StubUpstream, point_providers_at
+
+
+def run(fetch, ticker: str, fetches: int) -> list:
+    """Return per-fetch latencies in milliseconds."""
+    latencies = []
+    for _ in range(fetches):
+        start = time.perf_counter()
+        fetch(ticker)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--provider', default='fmp')
+    parser.add_argument('--ticker',   default='AAPL')
+    parser.add_argument('--fetches',  type=int, default=50)
+    args = parser.parse_args()
+
+    pooled_get = http_client.get
+    unpooled_get = lambda url, params=None, headers=None, timeout=None: requests.get(  # noqa: E731
+        url, params=params, headers=headers, timeout=timeout)
+
+    with StubUpstream() as stub:
+        point_providers_at(stub)
+        fetch = REGISTRY[args.provider].__wrapped__   # bypass the response cache
+
+        for label, get in [('requests.get', unpooled_get), ('pooled', pooled_get)]:
+            http_client.close_all()
+            http_client.get = get
+            stub.reset()
+            latencies = run(fetch, args.ticker, args.fetches)
+            print(f'{label:13s} fetches={args.fetches:4d}  upstream calls={stub.total_requests:4d}  '
+                  f'connections={stub.connections:4d}  '
+                  f'mean={statistics.mean(latencies):7.2f} ms  p50={statistics.median(latencies):7.2f} ms')
+        http_client.get = pooled_get
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+benchmarks/bench_indicators.py
+==============================
+Cost of answering ?indicators= when one new daily bar has arrived: a plain
+Python recomputation over the whole series, the vectorized build of
+providers/indicators.py (what a state rebuild costs), and the O(1)
+incremental update the running state actually does.
+
+    python -m benchmarks.bench_indicators --bars 250,5000 --indicators sma20,ema50,rsi14,stdev20
+"""
+
+import argparse
+import math
+import time
+
+import numpy as np
+
+from providers import indicators
+from providers.bars import Bars
+
+
+def timed(fn, repeat: int) -> float:
+    """Best-of-`repeat` microseconds per call."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e6
+
+
+def recompute(closes: list, kind: str, period: int):
+    """The indicator over the whole list, one close at a time."""
+    if kind == 'sma':
+        return sum(closes[-period:]) / period
+    if kind == 'stdev':
+        returns = [(b / a - 1) * 100 for a, b in zip(closes, closes[1:])][-period:]
+        mean = sum(returns) / period
+        return math.sqrt(sum((r - mean) ** 2 for r in returns) / (period - 1))
+    if kind == 'ema':
+        alpha, value = 2 / (period + 1), sum(closes[:period]) / period
+        for close in closes[period:]:
+            value += alpha * (close - value)
+        return value
+    moves = [b - a for a, b in zip(closes, closes[1:])]
+    gain = sum(max(m, 0) for m in moves[:period]) / period
+    loss = sum(max(-m, 0) for m in moves[:period]) / period
+    for m in moves[period:]:
+        gain += (max(m, 0) - gain) / period
+        loss += (max(-m, 0) - loss) / period
+    return 100 - 100 / (1 + gain / loss)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--bars',       default='250,5000', help='comma-separated series lengths')
+    parser.add_argument('--indicators', default='sma20,ema50,rsi14,stdev20')
+    parser.add_argument('--repeat',     type=int, default=50)
+    args = parser.parse_args()
+
+    specs = indicators.parse(args.indicators)
+    kinds = [(spec, indicators._SPEC.match(spec).group(1), int(indicators._SPEC.match(spec).group(2)))
+             for spec in specs]
+    rng = np.random.default_rng(7)
+
+    print(f'{", ".join(specs)}, best of {args.repeat}')
+    print(f'{"bars":>6s} {"recompute":>12s} {"vectorized":>12s} {"incremental":>12s}')
+    for n in (int(b) for b in args.bars.split(',')):
+        closes = 100 * np.cumprod(1 + rng.normal(0, 0.02, n + args.repeat + 1))
+        bars = Bars.from_columns(np.arange(n, dtype=np.int32), closes[:n])
+        as_list = bars.close.tolist()
+
+        def build():
+            track = indicators._Track()
+            track.reset(bars.days, bars.close)
+            for spec in specs:
+                track.add(spec, bars.close)
+            return track
+
+        track = build()
+        feed = iter(closes[n:].tolist())
+
+        def incremental():
+            close = next(feed)
+            for indicator in track.indicators.values():
+                indicator.update(close)
+                indicator.value(close)
+
+        recompute_us = timed(lambda: [recompute(as_list, kind, period) for _, kind, period in kinds], args.repeat)
+        build_us = timed(build, args.repeat)
+        update_us = timed(incremental, args.repeat)
+        print(f'{n:6d} {recompute_us:9.1f} µs {build_us:9.1f} µs {update_us:9.1f} µs')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+benchmarks/bench_json.py
+========================
+Decode time and peak memory for each provider's largest upstream payload:
+the standard-library json decoder (what response.json() used) versus orjson
+(providers/http_client.py and providers/aio.py), each followed by the
+provider's own parser into Bars.
+
+By default the payloads are the stub upstream's (Alpha Vantage's full 20-year
+TIME_SERIES_DAILY is the big one). Pass --fixtures DIR to use recorded
+response bodies instead, in the stub upstream's fixture layout (see
+benchmarks/stub_upstream.py and benchmarks/load.py --record), e.g.
+DIR/alpha-vantage/TIME_SERIES_DAILY-AAPL.json; --record DIR writes the stub
+payloads in that layout.
+
+    python -m benchmarks.bench_json --repeat 20
+    python -m benchmarks.bench_json --fixtures fixtures/
+"""
+
+import argparse
+import json
+import os
+import time
+import tracemalloc
+from urllib.parse import urlsplit, parse_qs
+
+import orjson
+
+from providers import alpha_vantage, fmp, massive, yahoo_finance
+from .stub_upstream import fixture_key, route
+
+# Provider → (stub URL of its largest payload, parser into Bars)
+PAYLOADS = {
+    'alpha-vantage': ('/query?function=TIME_SERIES_DAILY&symbol=AAPL&outputsize=full',
+                      lambda data: alpha_vantage._parse_series(data, 'AAPL', None)),
+    'yahoo-finance': ('/v8/finance/chart/AAPL?range=1y&interval=1d',
+                      lambda data: yahoo_finance._parse_chart(data, 'AAPL')[0]),
+    'fmp':           ('/stable/historical-price-eod/light?symbol=AAPL',
+                      fmp._parse_history),
+    'massive':       ('/v2/aggs/ticker/AAPL/range/1/day/2000-01-01/2100-01-01',
+                      lambda data: massive._parse_aggs(data, 'AAPL')),
+}
+
+DECODERS = {
+    'json':   json.loads,
+    'orjson': orjson.loads,
+}
+
+
+def stub_body(url: str) -> bytes:
+    parts = urlsplit(url)
+    _, payload = route(parts.path, parse_qs(parts.query))
+    return json.dumps(payload).encode()
+
+
+def fixture_path(directory: str, url: str) -> str:
+    parts = urlsplit(url)
+    return os.path.join(directory, f'{fixture_key(parts.path, parse_qs(parts.query))}.json')
+
+
+def timed(fn, repeat: int) -> float:
+    """Best-of-`repeat` milliseconds per call."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def peak_kib(fn) -> float:
+    tracemalloc.start()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeat',   type=int, default=20)
+    parser.add_argument('--fixtures', help='directory of recorded <provider>.json bodies')
+    parser.add_argument('--record',   help='write the stub payloads to this directory and exit')
+    args = parser.parse_args()
+
+    bodies = {}
+    for slug, (url, _) in PAYLOADS.items():
+        if args.fixtures:
+            path = fixture_path(args.fixtures, url)
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    bodies[slug] = f.read()
+        else:
+            bodies[slug] = stub_body(url)
+
+    if args.record:
+        for slug, body in bodies.items():
+            path = fixture_path(args.record, PAYLOADS[slug][0])
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(body)
+        print(f'wrote {len(bodies)} payloads to {args.record}')
+        return
+
+    print(f'best of {args.repeat}; peak = traced allocations during decode + parse')
+    for slug, body in bodies.items():
+        parse = PAYLOADS[slug][1]
+        bars = len(parse(orjson.loads(body)))
+        print(f'{slug} ({len(body) / 1024:,.0f} KiB, {bars} bars)')
+        baseline = None
+        for name, decode in DECODERS.items():
+            decode_ms = timed(lambda: decode(body), args.repeat)
+            data = decode(body)
+            parse_ms  = timed(lambda: parse(data), args.repeat)
+            peak      = peak_kib(lambda: parse(decode(body)))
+            total     = decode_ms + parse_ms
+            baseline  = baseline or total
+            print(f'  {name:7s} decode {decode_ms:7.2f} ms  parse {parse_ms:6.2f} ms  '
+                  f'total {total:7.2f} ms ({baseline / total:4.1f}x)  peak {peak:8,.0f} KiB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+benchmarks/bench_logging.py
+===========================
+Per-request cost of logging (providers/log.py) at high request rates.
+
+--threads threads each run --requests simulated requests that log what an
+uncached provider fetch logs — a "fetching" line and a result line — to a
+pipe drained by a child process, like a container's stdout. With --sink slow
+the child reads at about 2 MB/s, like a terminal or a log shipper that
+falls behind, so writers on the request path end up waiting on the pipe:
+
+  print          the old print() lines, written on the request thread
+  sync handler   logging with a StreamHandler, formatted and written on the
+                 request thread
+  queue          log.setup(): records are queued and written by the listener
+                 thread, with a request id bound per request
+  queue, 10%     the same with LOG_SAMPLE_RATE=0.1
+
+µs/request is wall time over all requests (the inverse of throughput); the
+queue modes also report how long the listener then took to drain its backlog.
+
+    python -m benchmarks.bench_logging --threads 16 --requests 5000
+    python -m benchmarks.bench_logging --sink slow
+"""
+
+import argparse
+import io
+import logging
+import subprocess
+import sys
+import threading
+import time
+from contextlib import redirect_stdout
+
+from providers import log
+
+logger = log.get('bench')
+
+
+# Reads 4 KiB every 2 ms
+SLOW_READER = 'import sys, time\nwhile sys.stdin.buffer.read1(4096):\n    time.sleep(0.002)'
+
+
+def sink(slow: bool):
+    """A line-buffered text stream into a pipe drained by a child process."""
+    command = [sys.executable, '-c', SLOW_READER] if slow else ['cat']
+    child = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL)
+    return child, io.TextIOWrapper(child.stdin, encoding='utf-8', line_buffering=True)
+
+
+def request_print(i: int):
+    ticker = f'T{i % 500:03d}'
+    print(f'📊 Yahoo Finance: fetching {ticker}')
+    print(f'✅ Yahoo Finance: {ticker} = ${187.25} (bars 12.1ms, compute 0.4ms)')
+
+
+def request_logged(i: int):
+    ticker = f'T{i % 500:03d}'
+    request_id, token = log.begin_request()
+    logger.debug('📊 Yahoo Finance: fetching %s', ticker)
+    if log.sampled():
+        logger.info('✅ Yahoo Finance: %s = $%s (%s)', ticker, 187.25, 'bars 12.1ms, compute 0.4ms')
+    log.end_request(token)
+
+
+def run(request, threads: int, requests: int) -> float:
+    """Run `requests` calls of `request` on each of `threads` threads; returns wall seconds."""
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(offset: int):
+        barrier.wait()
+        for i in range(offset, offset + requests):
+            request(i)
+
+    workers = [threading.Thread(target=worker, args=(n * requests,)) for n in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--threads',  type=int, default=16)
+    parser.add_argument('--requests', type=int, default=5000, help='per thread')
+    parser.add_argument('--sink',     choices=('fast', 'slow'), default='fast')
+    args = parser.parse_args()
+
+    results = {}
+    child, stream = sink(args.sink == 'slow')
+    try:
+        with redirect_stdout(stream):
+            results['print'] = run(request_print, args.threads, args.requests)
+
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+        log.ROOT.addHandler(handler)
+        log.ROOT.setLevel(logging.INFO)
+        log.ROOT.propagate = False
+        results['sync handler'] = run(request_logged, args.threads, args.requests)
+        log.ROOT.removeHandler(handler)
+
+        drains = {}
+        for label, rate in (('queue', 1.0), ('queue, 10%', 0.1)):
+            log.SAMPLE_RATE = rate
+            log.setup(stream)
+            results[label] = run(request_logged, args.threads, args.requests)
+            dropped = log.stats()['dropped']
+            start = time.perf_counter()
+            log.shutdown()   # waits for the listener to write the backlog
+            drains[label] = (time.perf_counter() - start, dropped)
+    finally:
+        stream.close()
+        child.wait()
+
+    total = args.threads * args.requests
+    print(f'{args.threads} threads × {args.requests} requests, 2 log lines each, {args.sink} sink')
+    for label, seconds in results.items():
+        line = f'{label:14s} {seconds / total * 1e6:7.2f} µs/request   ({total / seconds:9,.0f} req/s)'
+        if label in drains:
+            drain, dropped = drains[label]
+            line += f'   then drained in {drain * 1000:.0f} ms, {dropped} dropped'
+        print(line)
+    base = results['print']
+    print(f'queue vs print: {(results["queue"] - base) / base * 100:+.1f}%, '
+          f'queue 10% vs print: {(results["queue, 10%"] - base) / base * 100:+.1f}%')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+benchmarks/bench_metrics.py
+===========================
+Overhead of the hot-path instrumentation (providers/metrics.py):
+
+  - the cost of one histogram observation, counter increment and upstream
+    call wrapper
+  - Flask request latency (cache hits against the local stub upstream, the
+    path most sensitive to added work) with metrics enabled versus disabled
+  - the time to render /metrics
+
+    python -m benchmarks.bench_metrics --requests 2000 --rounds 8
+"""
+
+import argparse
+import time
+
+from app import app
+from providers import metrics
+from providers.errors import outcome
+from .stub_upstream import StubUpstream, point_providers_at
+
+
+def per_call_us(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def upstream_call():
+    with metrics.UpstreamCall('bench', outcome) as call:
+        with call.phase('transfer'):
+            pass
+        with call.phase('parse'):
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--provider', default='yahoo-finance')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--rounds',   type=int, default=8)
+    args = parser.parse_args()
+
+    repeat = 200_000
+    print(f'histogram observe   {per_call_us(lambda: metrics.UPSTREAM_PHASES.observe(0.012, "bench", "x"), repeat):6.2f} µs')
+    print(f'counter inc         {per_call_us(lambda: metrics.UPSTREAM_REQUESTS.inc("bench", "ok"), repeat):6.2f} µs')
+    print(f'upstream call       {per_call_us(upstream_call, repeat // 10):6.2f} µs   (2 phases, in-flight, outcome)')
+    metrics.reset()
+
+    client = app.test_client()
+    path = f'/api/{args.provider}/AAPL'
+    with StubUpstream() as stub:
+        point_providers_at(stub)
+        client.get(path)   # warm the cache
+
+        results = {}
+        for enabled in (False, True) * args.rounds:   # interleaved to even out drift; best round wins
+            metrics.ENABLED = enabled
+            results.setdefault(enabled, []).append(per_call_us(lambda: client.get(path), args.requests))
+        metrics.ENABLED = True
+
+        disabled, enabled = min(results[False]), min(results[True])
+        print(f'request, disabled   {disabled:6.1f} µs')
+        print(f'request, enabled    {enabled:6.1f} µs   ({enabled - disabled:+.1f} µs, '
+              f'{(enabled - disabled) / disabled * 100:+.1f}%)')
+        print(f'render /metrics     {per_call_us(metrics.exposition, 200):6.1f} µs '
+              f'({len(metrics.exposition()):,} bytes)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+benchmarks/bench_responses.py
+=============================
+Serialization time and bytes on the wire per request for the Flask JSON
+routes, against the local stub upstream (responses are cache hits, so only
+the response path is measured):
+
+  - serialization: the stdlib encoder Flask used by default (sorted keys)
+    versus orjson, on each route's payload
+  - wire bytes: identity, gzip and brotli bodies, and a 304 revalidation
+
+    python -m benchmarks.bench_responses --tickers 50 --repeat 200
+"""
+
+import argparse
+import json
+import time
+
+from app import app
+from providers import responses
+from .stub_upstream import StubUpstream, point_providers_at
+
+
+def timed(fn, repeat: int) -> float:
+    """Mean microseconds per call."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--provider', default='yahoo-finance')
+    parser.add_argument('--tickers',  type=int, default=50)
+    parser.add_argument('--repeat',   type=int, default=200)
+    args = parser.parse_args()
+
+    tickers = ','.join(f'R{i:03d}' for i in range(args.tickers))
+    routes = {
+        'quote':          f'/api/{args.provider}/AAPL',
+        'quote+horizons': f'/api/{args.provider}/AAPL?lookbacks=5,30,90,252&dates=2025-12-01,2026-01-02',
+        f'batch ({args.tickers})': f'/api/{args.provider}/batch?tickers={tickers}',
+        'health':         '/health',
+    }
+    client = app.test_client()
+    stdlib = lambda payload: json.dumps(payload, sort_keys=True).encode()
+
+    with StubUpstream() as stub:
+        point_providers_at(stub)
+        for path in routes.values():
+            client.get(path)   # warm the cache and history store
+
+        print(f'{"route":16s} {"stdlib":>9s} {"orjson":>9s}   {"identity":>9s} {"gzip":>8s} {"br":>8s} {"304":>5s}')
+        for name, path in routes.items():
+            plain = client.get(path)
+            payload = json.loads(plain.data)
+            std_us = timed(lambda: stdlib(payload), args.repeat)
+            orj_us = timed(lambda: responses.dumps(payload), args.repeat)
+
+            sizes = [len(client.get(path, headers={'Accept-Encoding': enc}).data) for enc in ('gzip', 'br')]
+            etag = plain.headers.get('ETag')
+            revalidated = client.get(path, headers={'If-None-Match': etag}) if etag else None
+            not_modified = f'{len(revalidated.data):5d}' if revalidated is not None and revalidated.status_code == 304 else '    -'
+
+            print(f'{name:16s} {std_us:7.1f}µs {orj_us:7.1f}µs   {len(plain.data):8d}B {sizes[0]:7d}B '
+                  f'{sizes[1]:7d}B {not_modified}')
+
+    print(f'(bodies under {responses.COMPRESS_MIN_BYTES} bytes are sent uncompressed)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+benchmarks/bench_screen.py
+==========================
+Time to screen a universe of tickers once their results and bars are warm:
+the aligned, vectorized field table of providers/screen.py versus computing
+the same lookbacks symbol by symbol with PriceSeries (as the single-ticker
+comparisons do), and the whole /screen request through the Flask app, with
+the field table rebuilt and memoized.
+
+    python -m benchmarks.bench_screen --tickers 100,500 --lookbacks 5,30,90,252
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from .stub_upstream import StubUpstream, point_providers_at
+
+
+def timed(fn, repeat: int) -> float:
+    """Best-of-`repeat` milliseconds per call."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--provider',  default='yahoo-finance')
+    parser.add_argument('--tickers',   default='100,500', help='comma-separated universe sizes')
+    parser.add_argument('--lookbacks', default='5,30,90,252')
+    parser.add_argument('--repeat',    type=int, default=10)
+    args = parser.parse_args()
+
+    os.environ.setdefault('HISTORY_DB', os.path.join(tempfile.mkdtemp(prefix='stock-screen-'), 'history.sqlite3'))
+    from app import app
+    from providers import REGISTRY, screen
+    from providers.base import PriceSeries, compare
+    from providers.batch import fetch_many
+    from providers.cache import StampedLRU
+    from providers.history import bars_for
+
+    logging.getLogger('stocks').setLevel(logging.WARNING)
+    client = app.test_client()
+    lookbacks = tuple(sorted(int(n) for n in args.lookbacks.split(',')))
+    fetch = REGISTRY[args.provider]
+
+    def per_symbol(results: dict) -> list:
+        rows = []
+        for result in results.values():
+            series = PriceSeries.from_bars(bars_for(args.provider, result))
+            rows.append(compare(series, series.ago(lookbacks), result['price'], decimals=2))
+        return rows
+
+    def vectorized(results: dict) -> dict:
+        screen._tables = StampedLRU(1)   # measure the build, not the memo
+        return screen.table(args.provider, results, lookbacks)
+
+    def request(url: str, memoized: bool):
+        if not memoized:
+            screen._tables = StampedLRU(1)
+        return client.get(url)
+
+    print(f'{args.provider}, lookbacks {",".join(map(str, lookbacks))}, best of {args.repeat}')
+    print(f'{"tickers":>7s} {"per-symbol":>11s} {"vectorized":>11s} {"request":>9s} {"memoized":>9s}')
+    with StubUpstream() as stub:
+        point_providers_at(stub)
+        for count in (int(n) for n in args.tickers.split(',')):
+            tickers = [f'S{i:04d}' for i in range(count)]
+            results = fetch_many(args.provider, fetch, tickers)   # warm results and bars
+            url = f'/api/{args.provider}/screen?tickers={",".join(tickers)}&lookbacks={args.lookbacks}' \
+                  f'&where=changePercent30Days>0&sort=-changePercent30Days&limit=20'
+
+            loop_ms = timed(lambda: per_symbol(results), args.repeat)
+            table_ms = timed(lambda: vectorized(results), args.repeat)
+            request_ms = timed(lambda: request(url, memoized=False), args.repeat)
+            memo_ms = timed(lambda: request(url, memoized=True), args.repeat)
+            print(f'{count:7d} {loop_ms:8.1f} ms {table_ms:8.1f} ms {request_ms:6.1f} ms {memo_ms:6.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
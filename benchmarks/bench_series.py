@@ -0,0 +1,93 @@
+"""
+benchmarks/bench_series.py
+==========================
+Times the lookback / fixed-date comparison step over a long daily history:
+the previous per-request dict + day-by-day date search against PriceSeries
+(binary search and vectorized arithmetic).
+
+    python -m benchmarks.bench_series --years 20 --repeat 200
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from providers.bars import Bars, day_numbers
+from providers.base import (FIXED_DATES, FIXED_DATE_FIELDS, LOOKBACK_FIELDS, PriceSeries,
+                            calculate_change, comparison_fields)
+from .stub_upstream import synthetic_bars
+
+
+# ── Previous implementation (kept here for comparison only) ───────────────────
+
+def _find_closest_date(dates, target_date: str) -> str | None:
+    target = datetime.strptime(target_date, '%Y-%m-%d')
+    for delta in range(8):
+        for direction in [1, -1]:
+            candidate_str = (target + timedelta(days=delta * direction)).strftime('%Y-%m-%d')
+            if candidate_str in dates:
+                return candidate_str
+    return None
+
+
+def legacy_fields(bars: list, current_price: float) -> dict:
+    results = bars[::-1]
+    date_price_map = {day: round(close, 2) for day, _, close in results}
+    result = {}
+    for n, (price_key, change_key, pct_key) in LOOKBACK_FIELDS.items():
+        if len(results) > n:
+            p = round(results[n][2], 2)
+            c, pct = calculate_change(current_price, p)
+            result.update({price_key: p, change_key: c, pct_key: pct})
+    for key, (price_key, change_key, pct_key) in FIXED_DATE_FIELDS.items():
+        closest = _find_closest_date(date_price_map, FIXED_DATES[key])
+        if closest:
+            p = date_price_map[closest]
+            c, pct = calculate_change(current_price, p)
+            result.update({price_key: p, change_key: c, pct_key: pct})
+    return result
+
+
+def series_fields(bars: list, current_price: float) -> dict:
+    return comparison_fields(PriceSeries.from_bars(to_bars(bars)), current_price, decimals=2)
+
+
+def to_bars(bars: list) -> Bars:
+    return Bars.from_columns(day_numbers([d for d, _, _ in bars]), [c for _, _, c in bars],
+                             open=[o for _, o, _ in bars])
+
+
+# ── Main ──────────────────────────────────────────────────────────────────────
+
+def timed(fn, repeat: int) -> float:
+    """Mean milliseconds per call."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--years',  type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    bars = synthetic_bars('AAPL', days=args.years * 365)
+    current_price = round(bars[-1][2], 2)
+    series = PriceSeries.from_bars(to_bars(bars))
+
+    assert legacy_fields(bars, current_price) == series_fields(bars, current_price)
+
+    legacy   = timed(lambda: legacy_fields(bars, current_price), args.repeat)
+    built    = timed(lambda: series_fields(bars, current_price), args.repeat)
+    prebuilt = timed(lambda: comparison_fields(series, current_price, decimals=2), args.repeat)
+
+    print(f'{len(bars)} bars ({args.years} years), {args.repeat} runs each')
+    print(f'  dict + date search          {legacy:8.3f} ms/call')
+    print(f'  PriceSeries (from bars)     {built:8.3f} ms/call   {legacy / built:5.1f}x')
+    print(f'  PriceSeries (prebuilt)      {prebuilt:8.3f} ms/call   {legacy / prebuilt:5.1f}x')
+
+
+if __name__ == '__main__':
+    main()
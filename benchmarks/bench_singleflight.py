@@ -0,0 +1,56 @@
+"""
+benchmarks/bench_singleflight.py
+================================
+Fires N parallel fetches for the same ticker against the local stub upstream
+and counts how many upstream calls were made, with and without coalescing.
+
+    python -m benchmarks.bench_singleflight --threads 50 --latency 0.2
+"""
+
+import argparse
+import threading
+import time
+
+from providers import REGISTRY, CACHE
+from .stub_upstream import StubUpstream, point_providers_at
+
+
+def burst(fetch, ticker: str, threads: int) -> float:
+    """Release `threads` callers at once; return wall time in seconds."""
+    barrier = threading.Barrier(threads)
+
+    def worker():
+        barrier.wait()
+        fetch(ticker)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--provider', default='yahoo-finance')
+    parser.add_argument('--ticker',   default='AAPL')
+    parser.add_argument('--threads',  type=int,   default=50)
+    parser.add_argument('--latency',  type=float, default=0.2)
+    args = parser.parse_args()
+
+    with StubUpstream(latency=args.latency) as stub:
+        point_providers_at(stub)
+        cached_fetch = REGISTRY[args.provider]
+
+        for label, fetch in [('uncached', cached_fetch.__wrapped__), ('single-flight', cached_fetch)]:
+            CACHE.clear()
+            stub.reset()
+            elapsed = burst(fetch, args.ticker, args.threads)
+            print(f'{label:14s} threads={args.threads:4d}  upstream calls={stub.total_requests:4d}  '
+                  f'wall={elapsed * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+benchmarks/bench_stream.py
+==========================
+Load test for GET /api/stream: many SSE subscribers watching the same
+tickers, served by the Flask app over real HTTP, against the local stub
+upstream. Reports upstream calls per round, which should track the number
+of distinct tickers (times polls) and stay flat as subscribers are added.
+
+    python -m benchmarks.bench_stream --clients 1,50,200 --tickers 5 --seconds 5
+"""
+
+import argparse
+import logging
+import os
+import threading
+import time
+
+import requests
+from werkzeug.serving import make_server
+
+from .stub_upstream import StubUpstream, point_providers_at
+
+
+def subscribe(url: str, responses: list, counts: list, index: int) -> None:
+    """Read SSE events until the response is closed; count the 'quote' events received."""
+    resp = requests.get(url, stream=True, timeout=30)
+    responses[index] = resp
+    try:
+        for line in resp.iter_lines(decode_unicode=True):
+            if line == 'event: quote':
+                counts[index] += 1
+    except Exception:
+        pass   # closed by main()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--provider', default='yahoo-finance')
+    parser.add_argument('--clients',  default='1,50,200')
+    parser.add_argument('--tickers',  type=int,   default=5)
+    parser.add_argument('--seconds',  type=float, default=5)
+    parser.add_argument('--poll',     type=float, default=1)
+    parser.add_argument('--latency',  type=float, default=0.02)
+    args = parser.parse_args()
+
+    # Poll every --poll seconds, and let the cache expire just as often
+    os.environ['STREAM_POLL_SECONDS'] = str(args.poll)
+    os.environ['CACHE_TTL_' + args.provider.upper().replace('-', '_')] = str(args.poll)
+    os.environ['CACHE_STALE_SECONDS'] = '0'
+    os.environ['STREAM_HEARTBEAT'] = '0.5'   # notice closed clients quickly between rounds
+
+    from app import app
+    from providers.stream import HUB
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)   # no access log line per subscriber
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}'
+
+    with StubUpstream(latency=args.latency) as stub:
+        point_providers_at(stub)
+        for round_no, clients in enumerate(int(c) for c in args.clients.split(',')):
+            tickers = ','.join(f'R{round_no}T{i}' for i in range(args.tickers))
+            url = f'{base}/api/stream?provider={args.provider}&tickers={tickers}'
+            responses = [None] * clients
+            counts = [0] * clients
+            stub.reset()
+
+            workers = [threading.Thread(target=subscribe, args=(url, responses, counts, i), daemon=True)
+                       for i in range(clients)]
+            for w in workers:
+                w.start()
+            time.sleep(args.seconds)
+            calls = stub.total_requests
+            stats = HUB.stats()
+
+            print(f'clients={clients:4d}  tickers={args.tickers}  upstream calls={calls:4d}  '
+                  f'topics={stats["topics"]:3d}  subscriptions={stats["subscribers"]:5d}  '
+                  f'quote events/client={sum(counts) / clients:5.1f}')
+
+            for resp in responses:
+                if resp is not None:
+                    resp.close()
+            while HUB.stats()['topics']:
+                time.sleep(0.1)   # wait for the server to drop the closed subscribers
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
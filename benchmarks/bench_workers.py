@@ -0,0 +1,166 @@
+"""
+benchmarks/bench_workers.py
+===========================
+Upstream calls and memory with several worker processes, with and without
+the shared cache tier (providers/shared_cache.py).
+
+Each worker is a separate Python process serving app.py (like a gunicorn
+worker) against the local stub upstream; the load generator spreads
+requests round-robin over the workers, as a load balancer would. A short
+cache TTL makes every key expire and refresh a few times during the run.
+The workers of one run share a fresh history store and shared-tier file.
+
+Reported per run: requests, upstream calls (in total and per key and TTL
+period — 1.0 means each key was fetched once per period, whichever worker
+asked), latency and the summed RSS of the worker processes.
+
+    python -m benchmarks.bench_workers --workers 1,8 --duration 6 --ttl 2
+"""
+
+import argparse
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import requests
+
+from providers.prefetch import CALLS_PER_FETCH
+from .stub_upstream import StubUpstream, point_providers_at
+
+
+def rss_mib(pid: int) -> float:
+    with open(f'/proc/{pid}/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+
+
+# ── Worker process ────────────────────────────────────────────────────────────
+
+def serve(stub_url: str) -> None:
+    """Run one worker: app.py on a free port, printed to stdout once listening."""
+    from werkzeug.serving import make_server
+    from app import app
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    point_providers_at(SimpleNamespace(url=stub_url))
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    print(server.server_port, flush=True)
+    server.serve_forever()
+
+
+def start_workers(count: int, stub_url: str, shared: bool, ttl: float, directory: str) -> list:
+    env = dict(os.environ,
+               HISTORY_DB=os.path.join(directory, 'history.sqlite3'),
+               CACHE_SHARED='1' if shared else '0',
+               CACHE_SHARED_DB=os.path.join(directory, 'cache.sqlite3'),
+               CACHE_STALE_SECONDS='0',
+               LOG_LEVEL='WARNING')
+    for slug in ('ALPHA_VANTAGE', 'YAHOO_FINANCE', 'FMP', 'MASSIVE'):
+        env[f'CACHE_TTL_{slug}'] = str(ttl)
+    workers = []
+    for _ in range(count):
+        process = subprocess.Popen([sys.executable, '-m', 'benchmarks.bench_workers', '--serve', stub_url],
+                                   env=env, stdout=subprocess.PIPE, text=True)
+        workers.append(process)
+    ports = [int(process.stdout.readline()) for process in workers]
+    return list(zip(workers, ports))
+
+
+# ── Load ──────────────────────────────────────────────────────────────────────
+
+def drive(ports: list, provider: str, tickers: list, concurrency: int, duration: float) -> tuple:
+    """Round-robin requests over the workers for `duration` seconds; returns (latencies ms, errors)."""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(offset: int):
+        session = requests.Session()
+        mine, failed, i = [], 0, offset
+        while time.perf_counter() < deadline:
+            port = ports[i % len(ports)]
+            ticker = tickers[(i // len(ports)) % len(tickers)]
+            i += concurrency
+            start = time.perf_counter()
+            try:
+                if session.get(f'http://127.0.0.1:{port}/api/{provider}/{ticker}', timeout=60).status_code != 200:
+                    failed += 1
+            except requests.RequestException:
+                failed += 1
+            mine.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(mine)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0]
+
+
+def run(count: int, shared: bool, args, stub: StubUpstream, tickers: list) -> dict:
+    with tempfile.TemporaryDirectory(prefix='stock-workers-') as directory:
+        workers = start_workers(count, stub.url, shared, args.ttl, directory)
+        try:
+            stub.reset()
+            latencies, errors = drive([port for _, port in workers], args.provider, tickers,
+                                      args.concurrency, args.duration)
+            upstream = stub.total_requests
+            rss = sum(rss_mib(process.pid) for process, _ in workers)
+        finally:
+            for process, _ in workers:
+                process.terminate()
+                process.wait()
+    periods = args.duration / args.ttl
+    p50, p95 = np.percentile(latencies, [50, 95])
+    return {
+        'requests':     len(latencies),
+        'errors':       errors,
+        'upstream':     upstream,
+        'perKeyPeriod': upstream / (len(tickers) * periods * CALLS_PER_FETCH[args.provider]),
+        'p50':          p50,
+        'p95':          p95,
+        'rss':          rss,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--serve',       help=argparse.SUPPRESS)
+    parser.add_argument('--workers',     default='1,8', help='comma-separated worker counts')
+    parser.add_argument('--provider',    default='yahoo-finance')
+    parser.add_argument('--tickers',     type=int,   default=20)
+    parser.add_argument('--concurrency', type=int,   default=16)
+    parser.add_argument('--duration',    type=float, default=6.0, help='seconds per run')
+    parser.add_argument('--ttl',         type=float, default=2.0, help='cache TTL in seconds')
+    parser.add_argument('--latency',     type=float, default=0.05, help='stub latency in seconds')
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+        return
+
+    tickers = [f'W{i:03d}' for i in range(args.tickers)]
+    counts = [int(n) for n in args.workers.split(',')]
+    print(f'{args.provider}, {len(tickers)} tickers, concurrency {args.concurrency}, {args.duration:g}s per run, '
+          f'TTL {args.ttl:g}s, stub latency {args.latency * 1000:.0f} ms')
+    print(f'{"workers":>7s} {"shared":>6s} {"reqs":>6s} {"errors":>6s} {"upstream":>8s} {"per key/TTL":>11s} '
+          f'{"p50 ms":>7s} {"p95 ms":>7s} {"RSS MiB":>8s}')
+    with StubUpstream(latency=args.latency) as stub:
+        for count in counts:
+            for shared in (False, True):
+                r = run(count, shared, args, stub, tickers)
+                print(f'{count:7d} {"on" if shared else "off":>6s} {r["requests"]:6d} {r["errors"]:6d} '
+                      f'{r["upstream"]:8d} {r["perKeyPeriod"]:11.2f} {r["p50"]:7.1f} {r["p95"]:7.1f} '
+                      f'{r["rss"]:8.1f}')
+
+
+if __name__ == '__main__':
+    main()
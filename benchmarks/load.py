@@ -0,0 +1,295 @@
+"""
+benchmarks/load.py
+==================
+Load test of GET /api/<provider>/<ticker> against the local stub upstream,
+per provider: throughput, p50/p95/p99 latency, errors, upstream calls per
+request and process memory, with an optional saved baseline to compare
+against.
+
+The app (Flask under a threaded WSGI server, or asgi.py under uvicorn) is
+served on a local port and driven over real HTTP by --concurrency client
+threads for --duration seconds (or --requests requests) per provider,
+cycling through the tickers. The stub upstream answers with recorded
+fixtures where they exist (--fixtures) and synthetic data otherwise, after
+--latency seconds plus up to --jitter seconds, failing --error-rate of its
+requests with --error-status. With --cache off every request misses the
+response cache, so the provider code path runs each time; with --cache on
+(the default) this measures the cached serving path.
+
+Everything runs in one process, so the load generator competes with the app
+for the GIL: compare runs on the same machine with the same options rather
+than reading the numbers as absolute capacity.
+
+    python -m benchmarks.load --concurrency 16 --duration 5
+    python -m benchmarks.load --cache off --latency 0.08 --jitter 0.04 --error-rate 0.02
+    python -m benchmarks.load --app asgi --providers fmp,massive --save baseline.json
+    python -m benchmarks.load --baseline baseline.json
+
+Recording fixtures from the live APIs (API keys from .env; a few upstream
+calls per ticker, counted against the real quotas):
+
+    python -m benchmarks.load --record fixtures/ --tickers AAPL,MSFT,NVDA
+    python -m benchmarks.load --fixtures fixtures/ --cache off
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import resource
+import socket
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+import requests
+
+from .stub_upstream import StubUpstream, fixture_tickers, point_providers_at
+
+PROVIDERS = ('alpha-vantage', 'yahoo-finance', 'fmp', 'massive')
+
+
+def rss_mib() -> float:
+    """Current resident set size in MiB (peak RSS where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+# ── App servers ───────────────────────────────────────────────────────────────
+
+@contextlib.contextmanager
+def serve_flask():
+    from werkzeug.serving import make_server
+    from app import app
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_port}'
+    finally:
+        server.shutdown()
+
+
+@contextlib.contextmanager
+def serve_asgi():
+    import uvicorn
+    from asgi import app
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=port, log_level='warning',
+                                           access_log=False, lifespan='on'))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f'http://127.0.0.1:{port}'
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
+
+
+# ── Load ──────────────────────────────────────────────────────────────────────
+
+def drive(base_url: str, provider: str, tickers: list, concurrency: int,
+          duration: float, total: int | None) -> tuple:
+    """
+    Hit /api/<provider>/<ticker> from `concurrency` threads until `duration`
+    seconds pass (or `total` requests are sent). Returns (latencies in ms,
+    status Counter, elapsed seconds).
+    """
+    latencies: list = []
+    statuses: Counter = Counter()
+    lock = threading.Lock()
+    sent = iter(range(total)) if total else None
+    deadline = time.perf_counter() + duration
+
+    def worker(offset: int):
+        session = requests.Session()
+        mine, codes, i = [], Counter(), offset
+        while True:
+            if sent is not None:
+                with lock:
+                    if next(sent, None) is None:
+                        break
+            elif time.perf_counter() >= deadline:
+                break
+            ticker = tickers[i % len(tickers)]
+            i += concurrency
+            start = time.perf_counter()
+            try:
+                status = session.get(f'{base_url}/api/{provider}/{ticker}', timeout=60).status_code
+            except requests.RequestException:
+                status = 0
+            mine.append((time.perf_counter() - start) * 1000)
+            codes[status] += 1
+        session.close()
+        with lock:
+            latencies.extend(mine)
+            statuses.update(codes)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, statuses, time.perf_counter() - started
+
+
+def summarize(latencies: list, statuses: Counter, elapsed: float, upstream: int, rss: tuple) -> dict:
+    values = np.array(latencies)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99]) if len(values) else (0.0, 0.0, 0.0)
+    count = len(values)
+    return {
+        'requests':    count,
+        'ok':          statuses.get(200, 0),
+        'errors':      {str(code): n for code, n in sorted(statuses.items()) if code != 200},
+        'rps':         round(count / elapsed, 1) if elapsed else 0.0,
+        'p50':         round(float(p50), 2),
+        'p95':         round(float(p95), 2),
+        'p99':         round(float(p99), 2),
+        'max':         round(float(values.max()), 2) if count else 0.0,
+        'upstreamPerRequest': round(upstream / count, 3) if count else 0.0,
+        'rssMiB':      round(rss[1], 1),
+        'rssDeltaMiB': round(rss[1] - rss[0], 1),
+    }
+
+
+def report(results: dict, baseline: dict | None) -> None:
+    print(f'{"provider":14s} {"reqs":>6s} {"errors":>7s} {"req/s":>8s} {"p50 ms":>8s} {"p95 ms":>8s} '
+          f'{"p99 ms":>8s} {"max ms":>8s} {"up/req":>7s} {"RSS MiB":>13s}')
+    for provider, r in results.items():
+        errors = sum(r['errors'].values())
+        print(f'{provider:14s} {r["requests"]:6d} {errors:7d} {r["rps"]:8.1f} {r["p50"]:8.2f} {r["p95"]:8.2f} '
+              f'{r["p99"]:8.2f} {r["max"]:8.1f} {r["upstreamPerRequest"]:7.2f} '
+              f'{r["rssMiB"]:7.1f} ({r["rssDeltaMiB"]:+.1f})')
+        if r['errors']:
+            print(f'{"":14s} errors by status: {r["errors"]}')
+        base = (baseline or {}).get('results', {}).get(provider)
+        if base:
+            deltas = []
+            for key in ('rps', 'p50', 'p95', 'p99'):
+                if base[key]:
+                    deltas.append(f'{key} {(r[key] - base[key]) / base[key] * 100:+.1f}%')
+            print(f'{"":14s} vs baseline: {", ".join(deltas)}')
+
+
+# ── Recording ─────────────────────────────────────────────────────────────────
+
+def record(directory: str, providers: list, tickers: list) -> None:
+    """Fetch every (provider, ticker) from the live APIs through a recording stub."""
+    from dotenv import load_dotenv
+    load_dotenv()
+    from providers import REGISTRY
+
+    for key in ('ALPHA_VANTAGE_API_KEY', 'FMP_API_KEY', 'MASSIVE_API_KEY'):
+        if not os.environ.get(key):
+            print(f'⚠️  {key} is not set; that provider will fail to record')
+
+    with StubUpstream(record_to=directory) as stub:
+        point_providers_at(stub)
+        for provider in providers:
+            for ticker in tickers:
+                try:
+                    REGISTRY[provider].__wrapped__(ticker)   # bypass the response cache
+                    print(f'✅ recorded {provider} {ticker}')
+                except Exception as e:
+                    print(f'❌ {provider} {ticker}: {e}')
+    print(f'fixtures in {directory}')
+
+
+# ── Main ──────────────────────────────────────────────────────────────────────
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--app',          choices=('flask', 'asgi'), default='flask')
+    parser.add_argument('--providers',    default=','.join(PROVIDERS))
+    parser.add_argument('--tickers',      default='20', help='comma-separated symbols, or a count of synthetic ones')
+    parser.add_argument('--concurrency',  type=int,   default=16)
+    parser.add_argument('--duration',     type=float, default=5.0, help='seconds per provider')
+    parser.add_argument('--requests',     type=int,   help='requests per provider (instead of --duration)')
+    parser.add_argument('--cache',        choices=('on', 'off'), default='on')
+    parser.add_argument('--latency',      type=float, default=0.0, help='stub latency in seconds')
+    parser.add_argument('--jitter',       type=float, default=0.0, help='extra uniform random stub latency')
+    parser.add_argument('--error-rate',   type=float, default=0.0, help='fraction of stub requests that fail')
+    parser.add_argument('--error-status', type=int,   default=503)
+    parser.add_argument('--fixtures',     help='directory of recorded upstream responses to replay')
+    parser.add_argument('--record',       help='record live upstream responses into this directory and exit')
+    parser.add_argument('--save',         help='write the results to this JSON file')
+    parser.add_argument('--baseline',     help='compare against results saved with --save')
+    parser.add_argument('--verbose',      action='store_true', help="keep the providers' log lines")
+    args = parser.parse_args()
+
+    providers = [p.strip() for p in args.providers.split(',') if p.strip()]
+    if args.tickers.isdigit():
+        recorded = fixture_tickers(args.fixtures, providers[0]) if args.fixtures else []
+        tickers = recorded or [f'R{i:03d}' for i in range(int(args.tickers))]
+    else:
+        tickers = [t.strip().upper() for t in args.tickers.split(',') if t.strip()]
+
+    if args.record:
+        record(args.record, providers, tickers)
+        return
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    from providers import CACHE
+    if args.cache == 'off':
+        CACHE.stale_seconds = 0
+        for provider in providers:
+            os.environ['CACHE_TTL_' + provider.upper().replace('-', '_')] = '0'
+
+    config = {key: getattr(args, key) for key in ('app', 'concurrency', 'duration', 'requests', 'cache',
+                                                   'latency', 'jitter', 'error_rate', 'error_status', 'fixtures')}
+    config['tickers'] = len(tickers)
+    print(f'{args.app} app, {len(tickers)} tickers, concurrency {args.concurrency}, cache {args.cache}, '
+          f'stub latency {args.latency * 1000:.0f}+{args.jitter * 1000:.0f} ms, error rate {args.error_rate:.1%}')
+
+    stub = StubUpstream(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                        error_status=args.error_status, fixtures=args.fixtures)
+    results, replayed = {}, 0
+    with stub, (serve_asgi() if args.app == 'asgi' else serve_flask()) as base_url:
+        point_providers_at(stub)
+        if not args.verbose:
+            logging.getLogger('stocks').setLevel(logging.WARNING)   # after the app's log.setup()
+        for provider in providers:
+            drive(base_url, provider, tickers, args.concurrency, 0, len(tickers))   # warm up
+            replayed += stub.replayed
+            stub.reset()
+            before = rss_mib()
+            latencies, statuses, elapsed = drive(base_url, provider, tickers, args.concurrency,
+                                                 args.duration, args.requests)
+            results[provider] = summarize(latencies, statuses, elapsed, stub.total_requests, (before, rss_mib()))
+            replayed += stub.replayed
+
+    if args.fixtures:
+        print(f'{replayed} upstream responses replayed from {args.fixtures}')
+    report(results, baseline)
+    if baseline and baseline.get('config') != config:
+        print(f'⚠️  baseline was run with different options: {baseline.get("config")}')
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'config': config, 'results': results}, f, indent=2)
+        print(f'saved to {args.save}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,353 @@
+"""
+benchmarks/stub_upstream.py
+===========================
+Local HTTP stand-in for the four upstream APIs, used by the benchmarks.
+
+Serves synthetic (deterministic) payloads in the same shape as
+Alpha Vantage, Yahoo Finance, FMP and Massive, with configurable latency
+(a fixed number of seconds, or a zero-argument callable returning one per
+request) plus uniform random jitter, an injected error rate, and counts of
+requests and TCP connections so benchmarks can report how many upstream calls
+a code path really made.
+
+    with StubUpstream(latency=0.05, jitter=0.02, error_rate=0.01) as stub:
+        point_providers_at(stub)
+        ...
+        print(stub.requests, stub.connections)
+
+Recorded fixtures: with fixtures=DIR, a request whose fixture file exists is
+answered with the recorded body instead of synthetic data. Files are named
+by endpoint and symbol (see fixture_key), e.g. DIR/alpha-vantage/
+TIME_SERIES_DAILY-AAPL.json or DIR/yahoo-finance/chart-MSFT.json; date
+parameters are ignored, so a recorded full series answers incremental
+requests too. With record_to=DIR the stub instead forwards every request to
+the live API (the providers' real API keys pass through in the query) and
+saves each 200 response in that layout:
+
+    with StubUpstream(record_to='fixtures/') as stub:   # live, with .env keys
+        point_providers_at(stub)
+        REGISTRY['yahoo-finance']('AAPL')
+"""
+
+import json
+import math
+import os
+import random
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Live origin of each provider, for record mode (paths are the same as the stub's)
+ORIGINS = {
+    'alpha-vantage': 'https://www.alphavantage.co',
+    'yahoo-finance': 'https://query2.finance.yahoo.com',
+    'fmp':           'https://financialmodelingprep.com',
+    'massive':       'https://api.massive.com',
+}
+
+
+# ── Synthetic data ────────────────────────────────────────────────────────────
+
+def synthetic_bars(symbol: str, days: int = 400) -> list:
+    """
+    Deterministic daily bars for the weekdays in the last `days` calendar days.
+    Returns oldest-first (date_str, open, close) tuples.
+    """
+    seed = sum(ord(ch) for ch in symbol)
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    bars = []
+    price = 50 + seed % 200
+    for i in range(days, -1, -1):
+        day = today - timedelta(days=i)
+        if day.weekday() >= 5:
+            continue
+        drift = math.sin((seed + i) * 0.37) * 0.02
+        open_ = round(price, 2)
+        price = max(1.0, price * (1 + drift))
+        bars.append((day.strftime('%Y-%m-%d'), open_, round(price, 2)))
+    return bars
+
+
+def _epoch(date_str: str) -> int:
+    return int(datetime.strptime(date_str, '%Y-%m-%d').timestamp())
+
+
+def _alpha_vantage(query: dict) -> dict:
+    symbol = query['symbol'][0]
+    if query.get('function', [''])[0] == 'OVERVIEW':
+        return {'Symbol': symbol, 'Name': f'{symbol} Corporation'}
+    bars = synthetic_bars(symbol, days=7300)
+    if query.get('outputsize', ['compact'])[0] == 'compact':
+        bars = bars[-100:]
+    series = {
+        d: {'1. open': f'{o:.4f}', '2. high': f'{max(o, c):.4f}', '3. low': f'{min(o, c):.4f}',
+            '4. close': f'{c:.4f}', '5. volume': '1000000'}
+        for d, o, c in bars
+    }
+    return {'Meta Data': {'2. Symbol': symbol}, 'Time Series (Daily)': series}
+
+
+def _yahoo(symbol: str, query: dict) -> dict:
+    bars = synthetic_bars(symbol, days=365)
+    if 'period1' in query:
+        start = datetime.fromtimestamp(int(query['period1'][0])).strftime('%Y-%m-%d')
+        bars = [b for b in bars if b[0] >= start]
+    return {'chart': {'error': None, 'result': [{
+        'meta': {'currency': 'USD', 'symbol': symbol, 'longName': f'{symbol} Corporation'},
+        'timestamp': [_epoch(d) + 14 * 3600 for d, _, _ in bars],
+        'indicators': {'quote': [{
+            'open':  [o for _, o, _ in bars],
+            'high':  [max(o, c) for _, o, c in bars],
+            'low':   [min(o, c) for _, o, c in bars],
+            'close': [c for _, _, c in bars],
+        }]},
+    }]}}
+
+
+def _fmp_quote(query: dict) -> list:
+    quotes = []
+    for symbol in query['symbol'][0].split(','):
+        _, o, c = synthetic_bars(symbol, days=7)[-1]
+        quotes.append({
+            'symbol': symbol, 'name': f'{symbol} Corporation', 'price': c,
+            'change': round(c - o, 2), 'changesPercentage': round((c - o) / o * 100, 2),
+        })
+    return quotes
+
+
+def _fmp_history(query: dict) -> list:
+    symbol = query['symbol'][0]
+    bars = synthetic_bars(symbol, days=400)
+    since = query.get('from', [''])[0]
+    return [{'symbol': symbol, 'date': d, 'price': c} for d, _, c in reversed(bars) if d >= since]
+
+
+def _massive_aggs(symbol: str, from_date: str, to_date: str) -> dict:
+    bars = [b for b in synthetic_bars(symbol, days=400) if from_date <= b[0] <= to_date]
+    return {'status': 'OK', 'ticker': symbol, 'results': [
+        {'t': (_epoch(d) + 14 * 3600) * 1000, 'o': o, 'h': max(o, c), 'l': min(o, c), 'c': c}
+        for d, o, c in reversed(bars)
+    ]}
+
+
+def route(path: str, query: dict):
+    """Map a request path to a synthetic payload; returns (status, body)."""
+    parts = [p for p in path.split('/') if p]
+    if parts == ['query']:
+        return 200, _alpha_vantage(query)
+    if parts[:3] == ['v8', 'finance', 'chart'] and len(parts) == 4:
+        return 200, _yahoo(parts[3], query)
+    if parts == ['stable', 'quote']:
+        return 200, _fmp_quote(query)
+    if parts == ['stable', 'historical-price-eod', 'light']:
+        return 200, _fmp_history(query)
+    if parts[:3] == ['v2', 'aggs', 'ticker'] and len(parts) == 9:
+        return 200, _massive_aggs(parts[3], parts[7], parts[8])
+    if parts[:3] == ['v3', 'reference', 'tickers'] and len(parts) == 4:
+        return 200, {'results': {'ticker': parts[3], 'name': f'{parts[3]} Corporation'}}
+    return 404, {'error': f'no stub route for {path}'}
+
+
+# ── Fixtures ──────────────────────────────────────────────────────────────────
+
+def fixture_key(path: str, query: dict) -> str | None:
+    """'<provider>/<endpoint>-<SYMBOL>' for a stub request path, or None if unknown."""
+    parts = [p for p in path.split('/') if p]
+    symbol = query.get('symbol', [''])[0]
+    if parts == ['query']:
+        return f'alpha-vantage/{query.get("function", [""])[0]}-{symbol}'
+    if parts[:3] == ['v8', 'finance', 'chart'] and len(parts) == 4:
+        return f'yahoo-finance/chart-{parts[3]}'
+    if parts == ['stable', 'quote']:
+        return f'fmp/quote-{symbol}'
+    if parts == ['stable', 'historical-price-eod', 'light']:
+        return f'fmp/history-{symbol}'
+    if parts[:3] == ['v2', 'aggs', 'ticker'] and len(parts) == 9:
+        return f'massive/aggs-{parts[3]}'
+    if parts[:3] == ['v3', 'reference', 'tickers'] and len(parts) == 4:
+        return f'massive/ticker-{parts[3]}'
+    return None
+
+
+def fixture_tickers(directory: str, provider: str) -> list:
+    """Symbols with at least one recorded fixture for a provider."""
+    folder = os.path.join(directory, provider)
+    if not os.path.isdir(folder):
+        return []
+    names = (name.rsplit('.', 1)[0] for name in os.listdir(folder) if name.endswith('.json'))
+    return sorted({name.split('-', 1)[1] for name in names if '-' in name and ',' not in name})
+
+
+# ── Server ────────────────────────────────────────────────────────────────────
+
+class StubUpstream:
+    """Threaded local HTTP server with request/connection counters."""
+
+    def __init__(self, latency=0.0, port: int = 0, jitter: float = 0.0, error_rate: float = 0.0,
+                 error_status: int = 503, fixtures: str = None, record_to: str = None, seed: int = 0):
+        self.latency      = latency
+        self.jitter       = jitter
+        self.error_rate   = error_rate
+        self.error_status = error_status
+        self.fixtures     = fixtures
+        self.record_to    = record_to
+        self.requests: Counter = Counter()
+        self.connections = 0
+        self.replayed    = 0   # answered from a recorded fixture
+        self.injected    = 0   # answered with an injected error
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def total_requests(self) -> int:
+        with self._lock:
+            return sum(self.requests.values())
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests.clear()
+            self.connections = 0
+            self.replayed = 0
+            self.injected = 0
+
+    def _delay_and_fault(self) -> tuple:
+        """(seconds to wait, whether to inject an error) for one request."""
+        delay = self.latency() if callable(self.latency) else self.latency
+        with self._lock:
+            if self.jitter:
+                delay += self._random.uniform(0, self.jitter)
+            fault = self.error_rate > 0 and self._random.random() < self.error_rate
+            if fault:
+                self.injected += 1
+        return delay, fault
+
+    def respond(self, path: str, raw_query: str, headers) -> tuple:
+        """(status, body bytes) for a request: recorded, forwarded to the live API, or synthetic."""
+        query = parse_qs(raw_query)
+        key = fixture_key(path, query)
+        if self.record_to and key:
+            return self._record(key, path, raw_query, headers)
+        if self.fixtures and key:
+            fixture = os.path.join(self.fixtures, f'{key}.json')
+            if os.path.exists(fixture):
+                with open(fixture, 'rb') as f:
+                    body = f.read()
+                with self._lock:
+                    self.replayed += 1
+                return 200, body
+        status, payload = route(path, query)
+        return status, json.dumps(payload).encode()
+
+    def _record(self, key: str, path: str, raw_query: str, headers) -> tuple:
+        url = ORIGINS[key.split('/')[0]] + path + (f'?{raw_query}' if raw_query else '')
+        request = urllib.request.Request(url, headers={'User-Agent': headers.get('User-Agent', 'Mozilla/5.0')})
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                status, body = response.status, response.read()
+        except urllib.error.HTTPError as e:
+            status, body = e.code, e.read()
+        except urllib.error.URLError as e:
+            return 502, json.dumps({'error': f'recording {url.split("?")[0]} failed: {e.reason}'}).encode()
+        if status == 200:
+            target = os.path.join(self.record_to, f'{key}.json')
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as f:
+                f.write(body)
+        return status, body
+
+    def start(self) -> 'StubUpstream':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'   # keep-alive, so connection reuse is observable
+
+            def setup(self):
+                super().setup()
+                # headers and body go out in separate writes; avoid Nagle/delayed-ACK stalls
+                self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                with stub._lock:
+                    stub.connections += 1
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                with stub._lock:
+                    stub.requests[parsed.path] += 1
+                delay, fault = stub._delay_and_fault()
+                if delay:
+                    time.sleep(delay)
+                if fault:
+                    status, body = stub.error_status, b'{"error": "injected by the stub upstream"}'
+                else:
+                    status, body = stub.respond(parsed.path, parsed.query, self.headers)
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def stub_transport(latency: float = 0.0, counter: Counter = None):
+    """
+    In-process httpx transport serving the same synthetic payloads as StubUpstream,
+    for driving providers/aio.py without sockets:
+
+        aio.set_transport(stub_transport(latency=0.2))
+    """
+    import asyncio
+    import httpx
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if counter is not None:
+            counter[request.url.path] += 1
+        if latency:
+            await asyncio.sleep(latency)
+        status, payload = route(request.url.path, parse_qs(request.url.query.decode()))
+        return httpx.Response(status, json=payload)
+
+    return httpx.MockTransport(handler)
+
+
+def point_providers_at(stub: StubUpstream) -> None:
+    """Redirect every provider module's BASE_URL to the stub and set dummy API keys."""
+    from providers import alpha_vantage, fmp, massive, yahoo_finance
+
+    alpha_vantage.BASE_URL = f'{stub.url}/query'
+    yahoo_finance.BASE_URL = f'{stub.url}/v8/finance/chart'
+    fmp.BASE_URL           = f'{stub.url}/stable'
+    massive.BASE_URL       = stub.url
+    for key in ('ALPHA_VANTAGE_API_KEY', 'FMP_API_KEY', 'MASSIVE_API_KEY'):
+        os.environ.setdefault(key, 'stub-key')
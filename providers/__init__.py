@@ -5,27 +5,124 @@ Provider registry for the Stock Price Check App.
 
 To add a new data provider:
   1. Create providers/<provider_name>.py with a fetch(ticker: str) -> dict function
-  2. Import it below and add one entry to REGISTRY
+     (and optionally an async fetch_async(ticker: str) -> dict coroutine function)
+  2. Add one entry to _BUILTIN below
   3. No changes to app.py are needed
 
+Providers shipped in another package need no edit here: they are discovered
+through the 'stock_price_check.providers' entry point group, named by slug and
+pointing at the module, e.g. in that package's pyproject.toml:
+
+  [project.entry-points."stock_price_check.providers"]
+  my-provider = "my_package.my_provider"
+
+A provider module defines fetch(ticker); fetch_async(ticker) is optional (the
+async registry otherwise runs fetch in a worker thread), and so is
+fetch_quotes(tickers) for the batch endpoint (see providers/batch.py).
+Built-in slugs win over entry points of the same name.
+
+Providers load lazily: REGISTRY and ASYNC_REGISTRY know every slug up front,
+but a provider's module — and with it the HTTP clients, requests and httpx —
+is imported the first time one of its entries is looked up, so a process only
+pays for the providers it serves. Entry points are looked up the first time
+the full list of slugs is needed (importlib.metadata alone takes tens of
+milliseconds to import).
+
+Every REGISTRY entry is wrapped by the response cache (see providers/cache.py);
+the raw, uncached function stays reachable as REGISTRY[slug].__wrapped__.
+ASYNC_REGISTRY holds the cached async variants used by asgi.py.
+
 The URL slug (e.g. 'alpha-vantage') is used directly in the API route:
   GET /api/<provider>/<ticker>
 """
 
-from .alpha_vantage import fetch as _fetch_alpha_vantage
-from .yahoo_finance import fetch as _fetch_yahoo_finance
-from .fmp import fetch as _fetch_fmp
-from .massive import fetch as _fetch_massive
-
-# Maps URL slug → fetch function
-REGISTRY: dict = {
-    'alpha-vantage': _fetch_alpha_vantage,
-    'yahoo-finance': _fetch_yahoo_finance,
-    'fmp':           _fetch_fmp,
-    'massive':       _fetch_massive,
+import asyncio
+import importlib
+import threading
+from collections.abc import Mapping
+from functools import wraps
+
+from .cache import CACHE, cached, cached_async
+
+ENTRY_POINT_GROUP = 'stock_price_check.providers'
+
+# Maps URL slug → provider module
+_BUILTIN: dict = {
+    'alpha-vantage': '.alpha_vantage',
+    'yahoo-finance': '.yahoo_finance',
+    'fmp':           '.fmp',
+    'massive':       '.massive',
 }
 
+_modules = None   # every slug → module, once entry points have been looked up
+
+
+def _all_modules() -> dict:
+    global _modules
+    if _modules is None:
+        from importlib.metadata import entry_points
+        modules = dict(_BUILTIN)
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+            modules.setdefault(entry_point.name, entry_point.module)
+        _modules = modules
+    return _modules
+
+
+def module(slug: str):
+    """The module of the provider behind a slug, imported on first use; KeyError if unknown."""
+    name = _BUILTIN.get(slug) or _all_modules()[slug]
+    return importlib.import_module(name, __name__)
+
+
+def _in_thread(fetch):
+    """fetch_async stand-in for a provider that only defines fetch()."""
+    @wraps(fetch)
+    async def fetch_async(ticker: str) -> dict:
+        return await asyncio.to_thread(fetch, ticker)
+    return fetch_async
+
+
+class _Registry(Mapping):
+    """Slug → cached fetch function, resolving each provider's module on first lookup."""
+
+    def __init__(self, wrap):
+        self._wrap = wrap        # (slug, module) → cached function
+        self._entries: dict = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, slug: str):
+        entry = self._entries.get(slug)
+        if entry is None:
+            provider = module(slug)
+            with self._lock:
+                entry = self._entries.get(slug)
+                if entry is None:
+                    entry = self._entries[slug] = self._wrap(slug, provider)
+        return entry
+
+    def __contains__(self, slug) -> bool:
+        return slug in _BUILTIN or slug in _all_modules()
+
+    def __iter__(self):
+        return iter(_all_modules())
+
+    def __len__(self) -> int:
+        return len(_all_modules())
+
+
+# Maps URL slug → cached fetch function
+REGISTRY: Mapping = _Registry(lambda slug, provider: cached(slug, provider.fetch))
+
+# Maps URL slug → cached async fetch coroutine function
+ASYNC_REGISTRY: Mapping = _Registry(lambda slug, provider: cached_async(
+    slug, getattr(provider, 'fetch_async', None) or _in_thread(provider.fetch)))
+
 
 def get_provider(name: str):
     """Return the fetch function for the given provider slug, or None if unknown."""
     return REGISTRY.get(name)
+
+
+def get_async_provider(name: str):
+    """Return the async fetch coroutine function for the given provider slug, or None if unknown."""
+    return ASYNC_REGISTRY.get(name)
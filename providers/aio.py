@@ -0,0 +1,117 @@
+"""
+providers/aio.py
+================
+Asynchronous HTTP layer used by the providers' fetch_async() functions.
+
+One httpx.AsyncClient (per event loop) holds a large keep-alive pool, so a
+single process can keep thousands of upstream requests waiting at once
+without tying up a thread for each. Timeouts and the retry policy mirror
+providers/http_client.py — the transport retries connection errors, and
+get_json() retries 429/5xx per http_client.retry_delay(), spending one quota
+call per attempt and sleeping on the event loop — and so does the per-call
+instrumentation (see providers/metrics.py); connect
+time comes from httpcore's trace events.
+
+The transport is swappable (set_transport) so the async path can be driven by
+httpx.MockTransport or any local stub without touching the network.
+
+Environment overrides:
+  AIO_MAX_CONNECTIONS   concurrent upstream connections   (default 1000)
+  AIO_MAX_KEEPALIVE     idle connections kept open        (default 100)
+"""
+
+import asyncio
+import os
+import time
+
+import httpx
+import orjson
+
+from . import metrics, quota
+from .errors import outcome
+from .http_client import CONNECT_TIMEOUT, READ_TIMEOUT, RETRIES, retry_delay
+
+MAX_CONNECTIONS = int(os.environ.get('AIO_MAX_CONNECTIONS', 1000))
+MAX_KEEPALIVE   = int(os.environ.get('AIO_MAX_KEEPALIVE', 100))
+
+_client: httpx.AsyncClient | None = None
+_client_loop = None
+_transport = None
+
+
+def set_transport(transport) -> None:
+    """Route all async requests through `transport` (None restores the network)."""
+    global _transport, _client
+    _transport = transport
+    _client = None
+
+
+def client() -> httpx.AsyncClient:
+    """Return the shared AsyncClient for the running event loop."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_KEEPALIVE),
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            transport=_transport or httpx.AsyncHTTPTransport(retries=RETRIES),
+        )
+        _client_loop = loop
+    return _client
+
+
+async def get_json(url: str, params: dict = None, headers: dict = None, timeout: float = None,
+                   provider: str = None):
+    """
+    GET `url`, raise httpx.HTTPStatusError on 4xx/5xx, and return the decoded JSON body.
+
+    429/5xx responses are retried per http_client.retry_delay(). With
+    `provider`, every attempt first waits for that provider's rate limit (see
+    providers/quota.py) without blocking the event loop.
+    """
+    with metrics.UpstreamCall(provider or httpx.URL(url).host, outcome) as call:
+        attempt = 0
+        while True:
+            if provider is not None:
+                with call.phase('quota'):
+                    await quota.acquire_async(provider)
+            with call.phase('transfer'):
+                response = await client().get(
+                    url,
+                    params=params,
+                    headers=headers,
+                    timeout=httpx.Timeout(timeout or READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+                    extensions={'trace': _connect_tracer(call)},
+                )
+            delay = retry_delay(attempt, response.status_code, response.headers.get('Retry-After'))
+            if delay is None:
+                break
+            attempt += 1
+            with call.phase('backoff'):
+                await asyncio.sleep(delay)
+        response.raise_for_status()
+        with call.phase('parse'):
+            return orjson.loads(response.content)
+
+
+def _connect_tracer(call: metrics.UpstreamCall):
+    """httpcore trace callback adding TCP connect and TLS handshake time to `call`."""
+    started = {}
+
+    async def trace(event: str, info: dict) -> None:
+        step, _, state = event.rpartition('.')
+        if step in ('connection.connect_tcp', 'connection.start_tls'):
+            if state == 'started':
+                started[step] = time.perf_counter()
+            elif step in started:
+                call.add('connect', time.perf_counter() - started.pop(step))
+
+    return trace
+
+
+async def aclose() -> None:
+    """Close the shared client (call on application shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
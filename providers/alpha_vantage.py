@@ -4,77 +4,108 @@ providers/alpha_vantage.py
 Alpha Vantage data provider.
 Fetches daily time series and company overview via the official Alpha Vantage API.
 
+Request building and response parsing are kept free of I/O so that fetch()
+(requests, blocking) and fetch_async() (httpx, asyncio) share them.
+
 Limits: 25 requests/day, 5 requests/minute on the free tier.
 Docs:   https://www.alphavantage.co/documentation/
 """
 
+import asyncio
 import os
-import requests
-from .base import FIXED_DATES, find_closest_date, calculate_change
-
+from datetime import datetime
+from . import aio, http_client, log, names
+from .quota import QuotaExceeded
+from .bars import Bars, day_numbers
+from .base import PhaseTimer, PriceSeries, calculate_change, comparison_fields
+from .errors import NotConfigured
+from .history_store import STORE
+
+SLUG     = 'alpha-vantage'
 BASE_URL = 'https://www.alphavantage.co/query'
 
+# outputsize=compact returns the latest 100 trading days (~140 calendar days)
+COMPACT_WINDOW_DAYS = 130
 
-def fetch(ticker: str) -> dict:
-    """
-    Fetch stock data from Alpha Vantage TIME_SERIES_DAILY endpoint.
+logger = log.get(SLUG)
 
-    Returns a standardised result dictionary (see providers/__init__.py for schema).
-    Raises ValueError for invalid tickers, rate limits, or missing data.
-    """
+
+def _api_key() -> str:
     api_key = os.environ.get('ALPHA_VANTAGE_API_KEY', '')
     if not api_key:
-        raise ValueError(
+        raise NotConfigured(
             'Alpha Vantage API key not configured. '
             'Please add ALPHA_VANTAGE_API_KEY to your .env file.'
         )
+    return api_key
 
-    print(f'📊 Alpha Vantage: fetching {ticker}')
 
-    # ── Daily time series ────────────────────────────────────────────────────
-    response = requests.get(BASE_URL, params={
+# ── Requests and parsing (no I/O) ─────────────────────────────────────────────
+
+def _series_params(symbol: str, api_key: str, since: str | None) -> dict:
+    """
+    Query for daily bars dated on or after `since` (all bars when None).
+
+    'compact' returns only the latest 100 bars, which is plenty for an
+    incremental update; the 20-year 'full' download happens once per symbol.
+    """
+    compact = (
+        since is not None
+        and (datetime.now() - datetime.strptime(since, '%Y-%m-%d')).days < COMPACT_WINDOW_DAYS
+    )
+    return {
         'function':   'TIME_SERIES_DAILY',
-        'symbol':     ticker.upper(),
-        'outputsize': 'full',
+        'symbol':     symbol,
+        'outputsize': 'compact' if compact else 'full',
         'apikey':     api_key,
-    }, timeout=15)
-    response.raise_for_status()
-    data = response.json()
+    }
 
+
+def _parse_series(data: dict, symbol: str, since: str | None) -> Bars:
+    """Turn a TIME_SERIES_DAILY payload into Bars dated on or after `since`."""
     if 'Error Message' in data:
-        raise ValueError(f'Invalid ticker symbol: {ticker}')
+        raise ValueError(f'Invalid ticker symbol: {symbol}')
     if 'Note' in data or 'Information' in data:
-        raise ValueError(
+        raise QuotaExceeded(
             'Alpha Vantage API rate limit reached (25 calls/day). '
             'Please try again later or switch to Yahoo Finance.'
         )
     if 'Time Series (Daily)' not in data:
-        raise ValueError(f'No data found for ticker: {ticker}')
+        raise ValueError(f'No data found for ticker: {symbol}')
+
+    series = data['Time Series (Daily)']
+    if since is not None:
+        series = {day: values for day, values in series.items() if day >= since}
+
+    # Values are strings; NumPy parses each column in one call ('5. volume' is never read)
+    values = list(series.values())
+    return Bars.from_columns(
+        day_numbers(list(series)),
+        [v['4. close'] for v in values],
+        open=[v['1. open'] for v in values],
+        high=[v['2. high'] for v in values],
+        low=[v['3. low'] for v in values],
+    )
+
+
+def _overview_params(symbol: str, api_key: str) -> dict:
+    return {'function': 'OVERVIEW', 'symbol': symbol, 'apikey': api_key}
+
+
+def _parse_name(overview: dict) -> str | None:
+    return overview.get('Name') or None
 
-    time_series = data['Time Series (Daily)']
-    sorted_dates = sorted(time_series.keys(), reverse=True)
 
-    if not sorted_dates:
+def _build_result(ticker: str, bars: Bars, company_name: str) -> dict:
+    """Compute the standardised result from oldest-first Bars."""
+    if not len(bars):
         raise ValueError(f'No trading data available for: {ticker}')
 
     # ── Current price ────────────────────────────────────────────────────────
-    current_date = sorted_dates[0]
-    current_price = float(time_series[current_date]['4. close'])
-    open_price    = float(time_series[current_date]['1. open'])
+    current_date, open_price, _, _, current_price = bars.bar(-1)
+    open_price = open_price if open_price is not None else current_price
     daily_change, daily_change_percent = calculate_change(current_price, open_price)
 
-    # ── Company name (best-effort — costs 1 extra API call) ──────────────────
-    company_name = ticker.upper()
-    try:
-        overview = requests.get(BASE_URL, params={
-            'function': 'OVERVIEW',
-            'symbol':   ticker.upper(),
-            'apikey':   api_key,
-        }, timeout=10).json()
-        company_name = overview.get('Name', ticker.upper()) or ticker.upper()
-    except Exception:
-        pass  # Name is optional; fall back to ticker symbol
-
     # ── Build result ─────────────────────────────────────────────────────────
     result = {
         'symbol':        ticker.upper(),
@@ -86,32 +117,100 @@ def fetch(ticker: str) -> dict:
         'timestamp':     current_date,
     }
 
-    # 5 trading days ago
-    if len(sorted_dates) > 5:
-        price_5 = float(time_series[sorted_dates[5]]['4. close'])
-        change_5, pct_5 = calculate_change(current_price, price_5)
-        result.update({'price5DaysAgo': price_5, 'change5Days': change_5, 'changePercent5Days': pct_5})
-
-    # 30 trading days ago
-    if len(sorted_dates) > 30:
-        price_30 = float(time_series[sorted_dates[30]]['4. close'])
-        change_30, pct_30 = calculate_change(current_price, price_30)
-        result.update({'price30DaysAgo': price_30, 'change30Days': change_30, 'changePercent30Days': pct_30})
-
-    # Fixed dates
-    all_dates = list(time_series.keys())
-    for key, label, change_key, pct_key, price_key in [
-        ('april1_2025',    'priceApril1_2025',    'changeApril1',    'changePercentApril1',    'priceApril1_2025'),
-        ('october1_2025',  'priceOctober1_2025',  'changeOctober1',  'changePercentOctober1',  'priceOctober1_2025'),
-        ('december1_2025', 'priceDecember1_2025', 'changeDecember1', 'changePercentDecember1', 'priceDecember1_2025'),
-    ]:
-        closest = find_closest_date(all_dates, FIXED_DATES[key])
-        if closest:
-            p = float(time_series[closest]['4. close'])
-            c, pct = calculate_change(current_price, p)
-            result[price_key]  = p
-            result[change_key] = c
-            result[pct_key]    = pct
-
-    print(f'✅ Alpha Vantage: {ticker} = ${current_price}')
+    # Lookback and fixed-date comparisons, vectorized over the whole series
+    result.update(comparison_fields(PriceSeries.from_bars(bars), current_price))
+
+    return result
+
+
+# ── Fetch ─────────────────────────────────────────────────────────────────────
+
+def fetch(ticker: str) -> dict:
+    """
+    Fetch stock data from Alpha Vantage TIME_SERIES_DAILY endpoint.
+
+    Daily bars are kept in the local history store, so only the first request
+    for a symbol downloads the full series. The company name comes from the
+    name cache; when it has to be fetched, the OVERVIEW call runs in parallel
+    with the time-series call.
+
+    Returns a standardised result dictionary (see providers/__init__.py for schema).
+    Raises ValueError for invalid tickers, rate limits, or missing data.
+    """
+    api_key = _api_key()
+    symbol  = ticker.upper()
+    timer   = PhaseTimer(SLUG)
+
+    logger.debug('📊 Alpha Vantage: fetching %s', ticker)
+
+    # ── Daily time series (incremental) ──────────────────────────────────────
+    def load_bars():
+        with timer.phase('bars'):
+            return STORE.sync(SLUG, symbol, lambda since: _parse_series(
+                http_client.get_json(BASE_URL, params=_series_params(symbol, api_key, since), timeout=15, provider=SLUG),
+                symbol, since,
+            ))
+
+    # ── Company name (best-effort — costs 1 extra API call when not cached) ──
+    def load_name():
+        with timer.phase('name'):
+            return _parse_name(http_client.get_json(BASE_URL, params=_overview_params(symbol, api_key), timeout=10, provider=SLUG))
+
+    company_name = names.lookup(SLUG, symbol)
+    if company_name is None:
+        bars, company_name = http_client.parallel(load_bars, load_name)
+        if isinstance(bars, Exception):
+            raise bars
+        if isinstance(company_name, str):
+            names.remember(SLUG, symbol, company_name)
+        else:
+            company_name = symbol   # Name is optional; fall back to ticker symbol
+    else:
+        bars = load_bars()
+
+    with timer.phase('compute'):
+        result = _build_result(ticker, bars, company_name)
+    if log.sampled():
+        logger.info('✅ Alpha Vantage: %s = $%s (%s)', ticker, result['price'], timer.summary())
+    return result
+
+
+async def fetch_async(ticker: str) -> dict:
+    """Async variant of fetch(); the series and overview calls run concurrently."""
+    api_key = _api_key()
+    symbol  = ticker.upper()
+    timer   = PhaseTimer(SLUG)
+
+    logger.debug('📊 Alpha Vantage: fetching %s (async)', ticker)
+
+    async def load_name():
+        cached_name = names.lookup(SLUG, symbol)
+        if cached_name is not None:
+            return cached_name
+        with timer.phase('name'):
+            name = _parse_name(await aio.get_json(BASE_URL, params=_overview_params(symbol, api_key), timeout=10, provider=SLUG))
+        if name is not None:
+            names.remember(SLUG, symbol, name)
+        return name
+
+    async def download(since):
+        return _parse_series(
+            await aio.get_json(BASE_URL, params=_series_params(symbol, api_key, since), timeout=15, provider=SLUG),
+            symbol, since,
+        )
+
+    async def load_bars():
+        with timer.phase('bars'):
+            return await STORE.sync_async(SLUG, symbol, download)
+
+    bars, company_name = await asyncio.gather(load_bars(), load_name(), return_exceptions=True)
+    if isinstance(bars, BaseException):
+        raise bars
+    if not isinstance(company_name, str):
+        company_name = symbol
+
+    with timer.phase('compute'):
+        result = _build_result(ticker, bars, company_name)
+    if log.sampled():
+        logger.info('✅ Alpha Vantage: %s = $%s (%s)', ticker, result['price'], timer.summary())
     return result
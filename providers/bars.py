@@ -0,0 +1,132 @@
+"""
+providers/bars.py
+=================
+Bars: a compact, columnar container of daily bars shared by all providers.
+
+A symbol's history used to travel as a list of (date_str, open, close)
+tuples — a tuple, a date string and two float objects per bar, roughly 200
+bytes each — rebuilt on every request. Bars keeps one NumPy array per column
+instead:
+
+  days    int32     days since 1970-01-01 (numpy datetime64[D] numbering)
+  open    float64   NaN where the upstream has no value
+  high    float64
+  low     float64
+  close   float64   never NaN
+
+36 bytes per bar, oldest first. Providers decode upstream payloads straight
+into Bars, the history store loads and saves them column-wise, and
+PriceSeries (see providers/base.py) reads its dates and closes from the same
+arrays without copying. `nbytes` reports the memory held per symbol
+(python -m benchmarks.bench_bars compares it with the old structures).
+"""
+
+import math
+from datetime import datetime
+
+import numpy as np
+
+_EPOCH_ORDINAL = datetime(1970, 1, 1).toordinal()
+
+
+def day_numbers(dates) -> np.ndarray:
+    """int32 day numbers for ISO 'YYYY-MM-DD' date strings."""
+    return np.array(dates, dtype='datetime64[D]').astype(np.int32)
+
+
+def local_day_numbers(timestamps, scale: int = 1) -> np.ndarray:
+    """
+    int32 day numbers of the server-local calendar date of unix timestamps
+    (divided by `scale` first, e.g. 1000 for milliseconds).
+    """
+    return np.array([datetime.fromtimestamp(ts / scale).toordinal() - _EPOCH_ORDINAL for ts in timestamps],
+                    dtype=np.int32)
+
+
+def _column(values, n: int) -> np.ndarray:
+    """float64 column; None → NaN, and a missing column is all NaN."""
+    if values is None:
+        return np.full(n, np.nan)
+    return np.array(values, dtype=np.float64)
+
+
+def _optional(value: float) -> float | None:
+    return None if math.isnan(value) else value
+
+
+class Bars:
+    """Daily bars as parallel column arrays, oldest first."""
+
+    __slots__ = ('days', 'open', 'high', 'low', 'close')
+
+    def __init__(self, days: np.ndarray, open: np.ndarray, high: np.ndarray,
+                 low: np.ndarray, close: np.ndarray):
+        self.days  = days
+        self.open  = open
+        self.high  = high
+        self.low   = low
+        self.close = close
+
+    @classmethod
+    def from_columns(cls, days, close, open=None, high=None, low=None) -> 'Bars':
+        """
+        Build from decoded upstream columns (lists or arrays of equal length).
+
+        `days` are int day numbers (see day_numbers / local_day_numbers);
+        price columns may contain None or be omitted altogether. Bars without
+        a close are dropped. Order is kept as given.
+        """
+        days  = np.asarray(days, dtype=np.int32)
+        n     = len(days)
+        close = _column(close, n)
+        keep  = ~np.isnan(close)
+        columns = (days, _column(open, n), _column(high, n), _column(low, n), close)
+        if not keep.all():
+            columns = tuple(column[keep] for column in columns)
+        return cls(*columns)
+
+    @classmethod
+    def from_rows(cls, rows: list) -> 'Bars':
+        """Build from (date_str, open, high, low, close) rows, e.g. a database result."""
+        if not rows:
+            return cls.empty()
+        dates, opens, highs, lows, closes = zip(*rows)
+        return cls.from_columns(day_numbers(dates), closes, opens, highs, lows)
+
+    @classmethod
+    def empty(cls) -> 'Bars':
+        return cls(np.empty(0, dtype=np.int32), *(np.empty(0) for _ in range(4)))
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the column arrays."""
+        return sum(getattr(self, column).nbytes for column in self.__slots__)
+
+    def date(self, index: int) -> str:
+        """ISO date of one bar."""
+        return str(np.datetime64(int(self.days[index]), 'D'))
+
+    def bar(self, index: int) -> tuple:
+        """One bar as a (date_str, open, high, low, close) tuple, with None for missing values."""
+        return (self.date(index), _optional(float(self.open[index])), _optional(float(self.high[index])),
+                _optional(float(self.low[index])), float(self.close[index]))
+
+    def rows(self):
+        """Iterate over all bars as (date_str, open, high, low, close) tuples (for the history store)."""
+        dates = np.datetime_as_string(self.days.astype('datetime64[D]')).tolist()
+        opens, highs, lows = self.open.tolist(), self.high.tolist(), self.low.tolist()
+        for i, close in enumerate(self.close.tolist()):
+            yield dates[i], _optional(opens[i]), _optional(highs[i]), _optional(lows[i]), close
+
+    def take(self, index) -> 'Bars':
+        """The bars selected by a slice, an index array or a boolean mask."""
+        return Bars(*(getattr(self, column)[index] for column in self.__slots__))
+
+    def since(self, date: str | None) -> 'Bars':
+        """The bars dated on or after `date` (all of them when None)."""
+        if date is None:
+            return self
+        return self.take(self.days >= np.datetime64(date, 'D').astype(np.int64))
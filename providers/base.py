@@ -1,10 +1,16 @@
 """
 providers/base.py
 =================
-Shared constants and helper functions used by all data providers.
+Shared constants, the PriceSeries type and helper functions used by all data providers.
 """
 
-from datetime import datetime, timedelta
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from . import metrics
+from .bars import Bars
 
 # Fixed historical dates to compare against current price
 FIXED_DATES = {
@@ -14,20 +20,120 @@ FIXED_DATES = {
 }
 
 
-def find_closest_date(dates: list, target_date: str) -> str | None:
+# Trading-day lookbacks → (price, change, percent) result keys
+LOOKBACK_FIELDS = {
+    5:  ('price5DaysAgo',  'change5Days',  'changePercent5Days'),
+    30: ('price30DaysAgo', 'change30Days', 'changePercent30Days'),
+}
+
+# FIXED_DATES key → (price, change, percent) result keys
+FIXED_DATE_FIELDS = {
+    'april1_2025':    ('priceApril1_2025',    'changeApril1',    'changePercentApril1'),
+    'october1_2025':  ('priceOctober1_2025',  'changeOctober1',  'changePercentOctober1'),
+    'december1_2025': ('priceDecember1_2025', 'changeDecember1', 'changePercentDecember1'),
+}
+
+# A fixed date matches the nearest trading day within this many calendar days
+MAX_DATE_DISTANCE = 7
+
+
+class PriceSeries:
+    """
+    Daily closing prices as two parallel NumPy arrays: sorted int32 day
+    numbers and float64 closes (oldest first), usually the `days` and `close`
+    columns of a Bars (see providers/bars.py), shared without copying.
+
+    Replaces per-request dicts of date strings: nearest-date lookups are a
+    binary search and all comparison fields are computed in one vectorized pass.
+    """
+
+    __slots__ = ('days', 'closes')
+
+    def __init__(self, days: np.ndarray, closes: np.ndarray):
+        self.days   = days
+        self.closes = closes
+
+    @classmethod
+    def from_bars(cls, bars: Bars) -> 'PriceSeries':
+        """View over the days and closes of oldest-first Bars."""
+        return cls(bars.days, bars.close)
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def nearest(self, targets, max_days: int = MAX_DATE_DISTANCE) -> np.ndarray:
+        """
+        Index of the trading day nearest to each target date, or -1 when none is
+        within ±max_days calendar days. On a tie the later day wins.
+        """
+        targets = np.asarray(targets, dtype='datetime64[D]').astype(np.int64)
+        n = len(self.days)
+        if n == 0:
+            return np.full(targets.shape, -1, dtype=np.int64)
+
+        right = np.searchsorted(self.days, targets)       # first day >= target
+        left  = right - 1                                  # last day < target
+        right_c = np.minimum(right, n - 1)
+        left_c  = np.maximum(left, 0)
+        big = np.int64(1 << 40)
+        d_right = np.where(right < n, self.days[right_c] - targets, big)
+        d_left  = np.where(left >= 0, targets - self.days[left_c], big)
+
+        index = np.where(d_right <= d_left, right_c, left_c)
+        return np.where(np.minimum(d_right, d_left) <= max_days, index, -1)
+
+    def ago(self, lookbacks) -> np.ndarray:
+        """Index of the bar `n` trading days before the latest one, or -1 if too short."""
+        index = len(self.days) - 1 - np.asarray(lookbacks, dtype=np.int64)
+        return np.where(index >= 0, index, -1)
+
+
+def compare(series: PriceSeries, indices: np.ndarray, current_price: float,
+            decimals: int | None = None) -> list:
+    """
+    Vectorized price comparison at the given bar indices (from ago() / nearest()).
+
+    Returns one (date, price, change, percent) tuple per index, or None where
+    the index is -1. Historical prices are rounded to `decimals` when given;
+    change and percent are always rounded to 2 places.
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    found   = indices >= 0
+    rows    = [None] * len(indices)
+    if not found.any():
+        return rows
+
+    hits   = indices[found]
+    prices = series.closes[hits]
+    if decimals is not None:
+        prices = np.array([round(p, decimals) for p in prices.tolist()])
+    changes  = current_price - prices
+    percents = np.divide(changes, prices, out=np.zeros_like(prices), where=prices != 0) * 100
+
+    dates = np.datetime_as_string(series.days[hits].astype('datetime64[D]')).tolist()
+    for slot, day, p, c, pct in zip(np.flatnonzero(found).tolist(), dates,
+                                    prices.tolist(), changes.tolist(), percents.tolist()):
+        rows[slot] = (day, p, round(c, 2), round(pct, 2))
+    return rows
+
+
+def comparison_fields(series: PriceSeries, current_price: float, decimals: int | None = None) -> dict:
     """
-    Find the nearest available trading day within ±7 calendar days of target_date.
-    Searches outward from the target (day 0, +1, -1, +2, -2, ...).
-    Returns None if no match found within 7 days.
+    Price, change and percent change versus the LOOKBACK_FIELDS lookbacks and
+    the FIXED_DATES, in one pass, keyed by the standard result field names.
+    Comparisons with no matching bar are left out of the result.
     """
-    target = datetime.strptime(target_date, '%Y-%m-%d')
-    for delta in range(8):
-        for direction in [1, -1]:
-            candidate = target + timedelta(days=delta * direction)
-            candidate_str = candidate.strftime('%Y-%m-%d')
-            if candidate_str in dates:
-                return candidate_str
-    return None
+    fields  = list(LOOKBACK_FIELDS.values()) + list(FIXED_DATE_FIELDS.values())
+    indices = np.concatenate([
+        series.ago(list(LOOKBACK_FIELDS)),
+        series.nearest([FIXED_DATES[key] for key in FIXED_DATE_FIELDS]),
+    ])
+
+    result = {}
+    for (price_key, change_key, pct_key), row in zip(fields, compare(series, indices, current_price, decimals)):
+        if row is not None:
+            _, result[price_key], result[change_key], result[pct_key] = row
+    return result
 
 
 def calculate_change(current: float, previous: float) -> tuple:
@@ -38,3 +144,32 @@ def calculate_change(current: float, previous: float) -> tuple:
     change = current - previous
     percent_change = (change / previous * 100) if previous != 0 else 0
     return round(change, 2), round(percent_change, 2)
+
+
+class PhaseTimer:
+    """
+    Wall-clock durations of the named phases of one fetch, for the log line
+    and the provider's phase histogram (see providers/metrics.py).
+    Phases may overlap when they run concurrently; `total` covers the whole fetch.
+    """
+
+    def __init__(self, provider: str):
+        self.provider = provider
+        self.started = time.perf_counter()
+        self.phases: dict = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phases[name] = elapsed * 1000
+            metrics.PROVIDER_PHASES.observe(elapsed, self.provider, name)
+
+    def summary(self) -> str:
+        """e.g. 'bars 112 ms, name 98 ms, compute 1 ms, total 115 ms'"""
+        parts = [f'{name} {ms:.0f} ms' for name, ms in self.phases.items()]
+        parts.append(f'total {(time.perf_counter() - self.started) * 1000:.0f} ms')
+        return ', '.join(parts)
@@ -0,0 +1,84 @@
+"""
+providers/batch.py
+==================
+Multi-ticker fetching for the batch endpoint:
+  GET /api/<provider>/batch?tickers=AAPL,MSFT,...
+
+Tickers fan out over one bounded, process-wide thread pool, so a large
+watchlist cannot open more concurrent upstream calls than BATCH_MAX_WORKERS.
+Each ticker still goes through the cached REGISTRY function, so fresh cache
+entries cost nothing. Providers with a native multi-symbol quote endpoint
+get all their quotes in one upstream call first: their module defines
+fetch_quotes(tickers) returning {SYMBOL: raw quote}, and each quote is handed
+to that provider's fetch(ticker, quote=...) to skip its own quote call.
+
+asgi.py fans out with fetch_many_async() instead: one task per ticker on the
+running loop, at most BATCH_MAX_WORKERS of them awaiting upstream at once.
+
+Environment overrides:
+  BATCH_MAX_WORKERS   concurrent per-ticker fetches         (default 8)
+  BATCH_MAX_TICKERS   tickers accepted per batch request    (default 100)
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from . import log, module
+from .cache import CACHE
+
+MAX_WORKERS = int(os.environ.get('BATCH_MAX_WORKERS', 8))
+MAX_TICKERS = int(os.environ.get('BATCH_MAX_TICKERS', 100))
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='batch')
+
+
+def parse_tickers(raw: str) -> list:
+    """Split a comma-separated ticker list, upper-casing and dropping blanks/duplicates."""
+    seen = []
+    for part in raw.split(','):
+        ticker = part.strip().upper()
+        if ticker and ticker not in seen:
+            seen.append(ticker)
+    return seen
+
+
+def fetch_many(slug: str, fetch, tickers: list) -> dict:
+    """
+    Fetch every ticker with the given (cached) provider function.
+
+    Returns a dict of ticker → result dict, or ticker → Exception for tickers
+    that failed; one failing ticker never fails the whole batch.
+    """
+    quotes = {}
+    prefetch = getattr(module(slug), 'fetch_quotes', None)
+    if prefetch is not None:
+        stale = [t for t in tickers if not CACHE.is_fresh(slug, t)]
+        if stale:
+            try:
+                quotes = prefetch(stale)
+            except Exception:
+                quotes = {}   # fall back to one quote call per ticker
+
+    def fetch_one(ticker: str):
+        try:
+            quote = quotes.get(ticker)
+            return fetch(ticker, quote=quote) if quote is not None else fetch(ticker)
+        except Exception as e:
+            return e
+
+    return dict(zip(tickers, _executor.map(log.in_context(fetch_one), tickers)))
+
+
+async def fetch_many_async(fetch_async, tickers: list) -> dict:
+    """Async variant of fetch_many() for a (cached) fetch_async coroutine function."""
+    gate = asyncio.Semaphore(MAX_WORKERS)
+
+    async def fetch_one(ticker: str):
+        async with gate:
+            try:
+                return await fetch_async(ticker)
+            except Exception as e:
+                return e
+
+    return dict(zip(tickers, await asyncio.gather(*(fetch_one(t) for t in tickers))))
@@ -0,0 +1,351 @@
+"""
+providers/cache.py
+==================
+In-process response cache that sits in front of every REGISTRY provider.
+
+Results are keyed by (provider slug, ticker) and stay fresh for a per-provider
+TTL. Once expired, an entry is still served for a grace period while a single
+background thread refreshes it (stale-while-revalidate); past the grace period
+the caller fetches synchronously. Concurrent misses for the same key share one
+upstream fetch (see providers/singleflight.py). The cache is bounded and evicts
+the least recently used entry when full. Errors are never cached. Lookups per
+provider and the duration and outcome of every uncached fetch are recorded in
+providers/metrics.py.
+
+With several worker processes, CACHE_SHARED=1 backs every worker's cache with
+a node-wide store: a worker adopts results another worker fetched, and only
+one worker at a time refreshes a key (see providers/shared_cache.py).
+
+Environment overrides:
+  CACHE_MAX_ENTRIES        maximum number of cached results   (default 1024)
+  CACHE_STALE_SECONDS      grace period for stale entries     (default 3600)
+  CACHE_TTL_<SLUG>         TTL for one provider, e.g. CACHE_TTL_ALPHA_VANTAGE=7200
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from . import log, metrics, shared_cache
+from .errors import outcome
+from .singleflight import AsyncSingleFlight, SingleFlight
+
+# Seconds a result stays fresh, per provider slug
+TTLS = {
+    'alpha-vantage': 3600,   # 25 calls/day on the free tier — be generous
+    'yahoo-finance': 60,
+    'fmp':           300,    # 250 calls/day
+    'massive':       300,
+}
+DEFAULT_TTL = 120
+
+# Lookup outcomes
+FRESH, STALE, STALE_REFRESH, MISS = 'fresh', 'stale', 'stale-refresh', 'miss'
+
+
+def ttl_for(slug: str) -> float:
+    """Return the fresh-TTL in seconds for a provider slug (env override wins)."""
+    env_key = 'CACHE_TTL_' + slug.upper().replace('-', '_')
+    return float(os.environ.get(env_key, TTLS.get(slug, DEFAULT_TTL)))
+
+
+class ResponseCache:
+    """Thread-safe LRU cache of provider results with stale-while-revalidate."""
+
+    def __init__(self, max_entries: int = 1024, stale_seconds: float = 3600, shared=None):
+        self.max_entries   = max_entries
+        self.stale_seconds = stale_seconds
+        self.shared        = shared   # shared_cache.SharedTier, or None
+        self._entries: OrderedDict = OrderedDict()   # key → (result, stored_at, stored_at as unix time)
+        self._refreshing: set = set()
+        self._flight = SingleFlight()
+        self._async_flight = AsyncSingleFlight()
+        self._lock = threading.Lock()
+        self._counters = {
+            'hits':           0,
+            'staleHits':      0,
+            'misses':         0,
+            'evictions':      0,
+            'refreshes':      0,
+            'refreshErrors':  0,
+        }
+
+    # ── Public API ───────────────────────────────────────────────────────────
+
+    def get_or_fetch(self, slug: str, ticker: str, fetch, stale_ok: bool = True, **kwargs) -> dict:
+        """
+        Return the cached result for (slug, ticker), calling fetch(ticker) on a miss.
+
+        A fresh entry is returned as-is. A stale entry inside the grace period
+        is returned immediately and one background refresh is started — unless
+        `stale_ok` is False, when it is refreshed before returning, like a miss.
+        Concurrent misses for the same key wait on a single fetch call.
+        Exceptions raised by fetch propagate to the caller and are not cached.
+        """
+        key = (slug, ticker.upper())
+        ttl = ttl_for(slug)
+        if self.shared is not None:
+            since = self._expired_since(key, ttl)
+            if since is not None:
+                self._adopt(key, since)
+        state, result = self._lookup(key, ttl, stale_ok)
+        metrics.CACHE_LOOKUPS.inc(slug, STALE if state == STALE_REFRESH else state)
+        if state == MISS:
+            return self._flight.do(key, self._fetch_and_store, slug, ticker, fetch, kwargs)
+        if state == STALE_REFRESH:
+            threading.Thread(
+                target=log.in_context(self._refresh), args=(key, ticker, fetch, kwargs), daemon=True,
+            ).start()
+        return result
+
+    async def get_or_fetch_async(self, slug: str, ticker: str, fetch_async) -> dict:
+        """
+        Async counterpart of get_or_fetch() for coroutine fetch functions.
+
+        Same fresh/stale/miss rules; the background refresh runs as a task on
+        the current event loop and concurrent misses share one awaited fetch.
+        """
+        key = (slug, ticker.upper())
+        ttl = ttl_for(slug)
+        if self.shared is not None:
+            since = self._expired_since(key, ttl)
+            if since is not None:
+                await asyncio.to_thread(self._adopt, key, since)
+        state, result = self._lookup(key, ttl)
+        metrics.CACHE_LOOKUPS.inc(slug, STALE if state == STALE_REFRESH else state)
+        if state == MISS:
+            return await self._async_flight.do(key, self._fetch_and_store_async, slug, ticker, fetch_async)
+        if state == STALE_REFRESH:
+            asyncio.get_running_loop().create_task(self._refresh_async(key, ticker, fetch_async))
+        return result
+
+    def is_fresh(self, slug: str, ticker: str) -> bool:
+        """True if (slug, ticker) has an entry younger than its TTL (here or in the shared tier)."""
+        key, ttl = (slug, ticker.upper()), ttl_for(slug)
+        since = self._expired_since(key, ttl)
+        if since is not None and self.shared is not None:
+            self._adopt(key, since)
+            since = self._expired_since(key, ttl)
+        return since is None
+
+    def put(self, slug: str, ticker: str, result: dict) -> None:
+        """Store a result (in the shared tier too), evicting least recently used entries when full."""
+        stored_at = time.time()
+        self._store((slug, ticker.upper()), result, stored_at)
+        if self.shared is not None:
+            self.shared.store(slug, ticker, result, stored_at)
+
+    def refresh(self, slug: str, ticker: str, fetch, min_age: float = 0.0) -> dict:
+        """
+        Fetch and store a result whatever its cache state (the prefetcher's
+        warm-up). With a shared tier, a result another worker stored less than
+        `min_age` seconds ago is adopted instead, and workers take turns.
+        """
+        if self.shared is None:
+            result = fetch(ticker)
+            self.put(slug, ticker, result)
+            return result
+        result, stored_at = self.shared.fetch(slug, ticker, lambda: fetch(ticker), time.time() - min_age)
+        self._store((slug, ticker.upper()), result, stored_at)
+        return result
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            for name in self._counters:
+                self._counters[name] = 0
+
+    def stats(self) -> dict:
+        """Counters and size, suitable for the /health endpoint."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['size']       = len(self._entries)
+            stats['maxEntries'] = self.max_entries
+            stats['refreshing'] = len(self._refreshing)
+        lookups = stats['hits'] + stats['staleHits'] + stats['misses']
+        stats['hitRatio'] = round((stats['hits'] + stats['staleHits']) / lookups, 4) if lookups else 0.0
+        stats['singleFlight'] = self._flight.stats()
+        stats['asyncSingleFlight'] = self._async_flight.stats()
+        if self.shared is not None:
+            stats['shared'] = self.shared.stats()
+        return stats
+
+    # ── Internals ────────────────────────────────────────────────────────────
+
+    def _store(self, key: tuple, result: dict, stored_at: float) -> None:
+        """Store a result fetched at unix time `stored_at`, evicting LRU entries when full."""
+        age = max(0.0, time.time() - stored_at)
+        with self._lock:
+            self._entries[key] = (result, time.monotonic() - age, stored_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters['evictions'] += 1
+
+    def _expired_since(self, key: tuple, ttl: float) -> float | None:
+        """None while the key's entry is fresh; else its unix store time (0 when absent)."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return 0.0
+        return None if time.monotonic() - entry[1] < ttl else entry[2]
+
+    def _adopt(self, key: tuple, since: float) -> None:
+        """Take over a result another worker stored in the shared tier after `since`."""
+        entry = self.shared.get(key[0], key[1], since)
+        if entry is not None:
+            self._store(key, *entry)
+
+    def _lookup(self, key: tuple, ttl: float, stale_ok: bool = True) -> tuple:
+        """
+        Classify a key as (FRESH, result), (STALE, result), (STALE_REFRESH, result)
+        or (MISS, None). STALE_REFRESH means the caller must start the refresh.
+        Without `stale_ok` an expired entry is a MISS.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                result, stored_at, _ = entry
+                age = now - stored_at
+                if age < ttl:
+                    self._entries.move_to_end(key)
+                    self._counters['hits'] += 1
+                    return FRESH, result
+                if stale_ok and age < ttl + self.stale_seconds:
+                    self._entries.move_to_end(key)
+                    self._counters['staleHits'] += 1
+                    if key in self._refreshing:
+                        return STALE, result
+                    self._refreshing.add(key)
+                    return STALE_REFRESH, result
+            self._counters['misses'] += 1
+            return MISS, None
+
+    def _fetch(self, slug: str, ticker: str, fetch, kwargs: dict) -> dict:
+        """Call the provider, recording the fetch's duration and outcome."""
+        start = time.perf_counter()
+        try:
+            result = fetch(ticker, **kwargs)
+        except Exception as e:
+            metrics.PROVIDER_FETCHES.observe(time.perf_counter() - start, slug, outcome(e))
+            raise
+        metrics.PROVIDER_FETCHES.observe(time.perf_counter() - start, slug, 'ok')
+        return result
+
+    def _fetch_and_store(self, slug: str, ticker: str, fetch, kwargs: dict) -> dict:
+        if self.shared is None:
+            result = self._fetch(slug, ticker, fetch, kwargs)
+            self.put(slug, ticker, result)
+            return result
+        result, stored_at = self.shared.fetch(slug, ticker, lambda: self._fetch(slug, ticker, fetch, kwargs),
+                                              time.time() - ttl_for(slug))
+        self._store((slug, ticker.upper()), result, stored_at)
+        return result
+
+    def _refresh(self, key: tuple, ticker: str, fetch, kwargs: dict) -> None:
+        """Background refresh of one stale entry; the stale copy survives failures."""
+        slug = key[0]
+        try:
+            self._flight.do(key, self._fetch_and_store, slug, ticker, fetch, kwargs)
+            with self._lock:
+                self._counters['refreshes'] += 1
+        except Exception:
+            with self._lock:
+                self._counters['refreshErrors'] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    async def _fetch_async(self, slug: str, ticker: str, fetch_async) -> dict:
+        start = time.perf_counter()
+        try:
+            result = await fetch_async(ticker)
+        except Exception as e:
+            metrics.PROVIDER_FETCHES.observe(time.perf_counter() - start, slug, outcome(e))
+            raise
+        metrics.PROVIDER_FETCHES.observe(time.perf_counter() - start, slug, 'ok')
+        return result
+
+    async def _fetch_and_store_async(self, slug: str, ticker: str, fetch_async) -> dict:
+        if self.shared is None:
+            result = await self._fetch_async(slug, ticker, fetch_async)
+            self.put(slug, ticker, result)
+            return result
+        result, stored_at = await self.shared.fetch_async(
+            slug, ticker, lambda: self._fetch_async(slug, ticker, fetch_async), time.time() - ttl_for(slug))
+        self._store((slug, ticker.upper()), result, stored_at)
+        return result
+
+    async def _refresh_async(self, key: tuple, ticker: str, fetch_async) -> None:
+        slug = key[0]
+        try:
+            await self._async_flight.do(key, self._fetch_and_store_async, slug, ticker, fetch_async)
+            with self._lock:
+                self._counters['refreshes'] += 1
+        except Exception:
+            with self._lock:
+                self._counters['refreshErrors'] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+
+CACHE = ResponseCache(
+    max_entries=int(os.environ.get('CACHE_MAX_ENTRIES', 1024)),
+    stale_seconds=float(os.environ.get('CACHE_STALE_SECONDS', 3600)),
+    shared=shared_cache.from_env(),
+)
+
+
+class StampedLRU:
+    """
+    Small thread-safe LRU of values derived from a provider result, each
+    stored with the result's stamp (e.g. its price and timestamp). A value is
+    only returned while the caller's stamp still matches, so derived data is
+    recomputed as soon as the underlying result changes.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()   # key → (stamp, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, stamp):
+        """The value stored for `key` under the same stamp, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != stamp:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, stamp, value) -> None:
+        with self._lock:
+            self._entries[key] = (stamp, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def cached(slug: str, fetch):
+    """Wrap a provider fetch function so calls go through the shared CACHE."""
+    @wraps(fetch)
+    def cached_fetch(ticker: str, **kwargs) -> dict:
+        return CACHE.get_or_fetch(slug, ticker, fetch, **kwargs)
+    return cached_fetch
+
+
+def cached_async(slug: str, fetch_async):
+    """Wrap a provider fetch_async coroutine function so calls go through the shared CACHE."""
+    @wraps(fetch_async)
+    async def cached_fetch_async(ticker: str) -> dict:
+        return await CACHE.get_or_fetch_async(slug, ticker, fetch_async)
+    return cached_fetch_async
@@ -0,0 +1,163 @@
+"""
+providers/compare.py
+====================
+Cross-provider comparison for data-quality checks:
+
+  GET /api/compare/<ticker>?timeout=5
+
+Every REGISTRY provider's fetch runs at the same time under one overall
+deadline, so the request takes about as long as the slowest provider rather
+than the sum of all of them. Each call goes through the cached REGISTRY
+function and is timed into the same health table as /api/auto (see
+providers/failover.py). A provider that misses the deadline is listed under
+'pending'; its fetch is left to finish in the background and still fills
+the response cache, so asking again shortly after usually completes.
+
+The response carries every result and error plus discrepancy stats over the
+providers that answered:
+
+  {"symbol": "AAPL", "timeoutMs": 5000, "elapsedMs": 412.3,
+   "results": {"yahoo-finance": {...}, ...}, "errors": {"fmp": {"error": ..., "status": 400}},
+   "pending": ["massive"],
+   "summary": {"answered": 2, "price": {"min": ..., "max": ..., "median": ..., "spread": ...,
+                                        "spreadPercent": ...},
+               "deviationPercent": {"yahoo-finance": 0.12, ...},
+               "latest": "2026-10-15", "stale": {"alpha-vantage": 1}}}
+
+deviationPercent is each provider's price versus the median of all; 'stale'
+lists the providers whose timestamp (latest bar date) is behind the newest
+one, with the number of days.
+
+Environment overrides:
+  COMPARE_TIMEOUT       default and longest deadline in seconds   (default 10)
+  COMPARE_MAX_WORKERS   threads running provider fetches          (default 16)
+"""
+
+import asyncio
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import date
+
+from . import REGISTRY, failover, log
+from .errors import error_status
+
+TIMEOUT     = float(os.environ.get('COMPARE_TIMEOUT', 10))
+MAX_WORKERS = int(os.environ.get('COMPARE_MAX_WORKERS', 16))
+MIN_TIMEOUT = 0.1
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='compare')
+
+logger = log.get('compare')
+
+
+def parse_timeout(raw: str | None) -> float:
+    """The `timeout` query parameter in seconds (COMPARE_TIMEOUT when absent). Raises ValueError."""
+    if not raw:
+        return TIMEOUT
+    try:
+        seconds = float(raw)
+    except ValueError:
+        seconds = -1.0
+    if not MIN_TIMEOUT <= seconds <= TIMEOUT:
+        raise ValueError(f'Invalid timeout "{raw}"; expected seconds between {MIN_TIMEOUT:g} and {TIMEOUT:g}.')
+    return seconds
+
+
+# ── Fetch ─────────────────────────────────────────────────────────────────────
+
+def fetch(ticker: str, timeout: float = TIMEOUT) -> dict:
+    """Ask every provider for `ticker` at once and build the comparison payload within `timeout` seconds."""
+    start = time.monotonic()
+    futures = {_executor.submit(log.in_context(failover.timed), slug, ticker): slug for slug in REGISTRY}
+    done, _ = wait(futures, timeout=timeout)
+
+    outcomes = {}
+    for future in done:
+        try:
+            outcomes[futures[future]] = future.result()
+        except Exception as e:
+            outcomes[futures[future]] = e
+    return report(ticker, outcomes, list(futures.values()), timeout, time.monotonic() - start)
+
+
+async def fetch_async(ticker: str, timeout: float = TIMEOUT) -> dict:
+    """Async variant of fetch(); the provider requests are tasks on the running loop."""
+    start = time.monotonic()
+    tasks = {}
+    for slug in REGISTRY:
+        task = asyncio.ensure_future(failover.timed_async(slug, ticker))
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())   # late ones may fail unobserved
+        tasks[task] = slug
+    done, _ = await asyncio.wait(tasks, timeout=timeout)
+
+    outcomes = {}
+    for task in done:
+        try:
+            outcomes[tasks[task]] = task.result()
+        except Exception as e:
+            outcomes[tasks[task]] = e
+    return report(ticker, outcomes, list(tasks.values()), timeout, time.monotonic() - start)
+
+
+# ── Report ────────────────────────────────────────────────────────────────────
+
+def report(ticker: str, outcomes: dict, slugs: list, timeout: float, elapsed: float) -> dict:
+    """
+    The comparison payload from slug → result or exception for the providers
+    that finished; the rest of `slugs` are reported as pending.
+    """
+    results, errors, pending = {}, {}, []
+    for slug in slugs:   # registry order, whatever order they finished in
+        if slug not in outcomes:
+            pending.append(slug)
+        elif isinstance(outcomes[slug], Exception):
+            message, status = error_status(outcomes[slug], ticker)
+            errors[slug] = {'error': message, 'status': status}
+        else:
+            results[slug] = outcomes[slug]
+    if pending:
+        logger.warning('⏱️ Compare: %s still pending for %s after %.1fs', ', '.join(pending), ticker, elapsed)
+
+    return {
+        'symbol':    ticker.upper(),
+        'timeoutMs': round(timeout * 1000),
+        'elapsedMs': round(elapsed * 1000, 1),
+        'results':   results,
+        'errors':    errors,
+        'pending':   pending,
+        'summary':   summary(results),
+    }
+
+
+def summary(results: dict) -> dict:
+    """Price spread, per-provider deviation from the median and stale timestamps of slug → result."""
+    prices = {slug: result['price'] for slug, result in results.items()}
+    block = {'answered': len(results), 'price': None, 'deviationPercent': {}, 'latest': None, 'stale': {}}
+    if not prices:
+        return block
+
+    low, high = min(prices.values()), max(prices.values())
+    median = statistics.median(prices.values())
+    block['price'] = {
+        'min':           low,
+        'max':           high,
+        'median':        round(median, 4),
+        'spread':        round(high - low, 4),
+        'spreadPercent': round((high - low) / median * 100, 3) if median else None,
+    }
+    if median:
+        block['deviationPercent'] = {slug: round((p - median) / median * 100, 3) for slug, p in prices.items()}
+
+    days = {}
+    for slug, result in results.items():
+        try:
+            days[slug] = date.fromisoformat(str(result.get('timestamp'))[:10])
+        except ValueError:
+            continue
+    if days:
+        latest = max(days.values())
+        block['latest'] = latest.isoformat()
+        block['stale'] = {slug: (latest - day).days for slug, day in days.items() if day < latest}
+    return block
@@ -0,0 +1,91 @@
+"""
+providers/errors.py
+===================
+Maps exceptions raised by provider fetch functions to an error message and
+HTTP status, so every route (Flask and ASGI, single and batch) reports
+failures the same way.
+
+Providers raise ValueError for bad input/missing data (NotConfigured, a
+ValueError, when their API key is missing) and QuotaExceeded when a
+provider's rate limit or daily quota is spent, and let the HTTP client's own
+exceptions propagate: requests.* from fetch(), httpx.* from fetch_async().
+
+retryable() tells the failures another provider might not share (the
+provider is down, slow, rate limited or unconfigured) from those it would
+(the ticker is invalid or unknown); /api/auto only fails over on the former.
+
+Every mapped error is counted by outcome label in stock_errors_total, and
+outcome() labels upstream failures the same way (see providers/metrics.py).
+
+requests and httpx are not imported here: providers load lazily (see
+providers/__init__.py), and a client's exception can only exist once that
+client has been imported, so its classes are looked up in sys.modules.
+"""
+
+import sys
+
+from . import metrics
+from .quota import QuotaExceeded
+
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+
+
+class NotConfigured(ValueError):
+    """A provider's API key (or other required setting) is missing."""
+
+
+def error_status(e: Exception, ticker: str) -> tuple:
+    """Map an exception raised by a provider to (error message, HTTP status), counting its outcome."""
+    message, status, kind = _classify(e, ticker)
+    metrics.ERRORS.inc(kind)
+    return message, status
+
+
+def outcome(e: Exception) -> str:
+    """Short label for an exception: invalid, quota, timeout, not_found, http_error, network or unexpected."""
+    return _classify(e, '')[2]
+
+
+def retryable(e: Exception) -> bool:
+    """Whether another provider might answer where this exception came from: transport, 429/5xx, quota or configuration."""
+    if isinstance(e, NotConfigured):
+        return True
+    kind = _classify(e, '')[2]
+    if kind == 'http_error':
+        response = getattr(e, 'response', None)
+        return response is not None and response.status_code in RETRYABLE_STATUSES
+    return kind in ('quota', 'timeout', 'network')
+
+
+def _classify(e: Exception, ticker: str) -> tuple:
+    """(message, HTTP status, outcome label) for an exception."""
+    if isinstance(e, ValueError):
+        return str(e), 400, 'invalid'
+    if isinstance(e, QuotaExceeded):
+        return str(e), 429, 'quota'
+    if isinstance(e, TimeoutError):
+        return str(e), 504, 'timeout'
+
+    requests = sys.modules.get('requests')
+    if requests is not None:
+        if isinstance(e, requests.exceptions.HTTPError):
+            if hasattr(e, 'response') and e.response is not None and e.response.status_code == 404:
+                return f'Ticker "{ticker}" not found.', 404, 'not_found'
+            return f'HTTP error: {str(e)}', 502, 'http_error'
+        if isinstance(e, requests.exceptions.Timeout):
+            return 'Request timed out. Please try again.', 504, 'timeout'
+        if isinstance(e, requests.exceptions.RequestException):
+            return f'Network error: {str(e)}', 502, 'network'
+
+    httpx = sys.modules.get('httpx')
+    if httpx is not None:
+        if isinstance(e, httpx.HTTPStatusError):
+            if e.response.status_code == 404:
+                return f'Ticker "{ticker}" not found.', 404, 'not_found'
+            return f'HTTP error: {str(e)}', 502, 'http_error'
+        if isinstance(e, httpx.TimeoutException):
+            return 'Request timed out. Please try again.', 504, 'timeout'
+        if isinstance(e, httpx.RequestError):
+            return f'Network error: {str(e)}', 502, 'network'
+
+    return f'Unexpected error: {str(e)}', 500, 'unexpected'
@@ -0,0 +1,298 @@
+"""
+providers/failover.py
+=====================
+Provider-agnostic fetching for GET /api/auto/<ticker>.
+
+Every REGISTRY provider's observed latency and outcome are kept in a rolling
+window, and each request asks the providers in order of health:
+
+  1. a fresh cached result for the ticker (answers instantly)
+  2. daily quota not used up (see providers/quota.py)
+  3. lower recent error rate
+  4. no daily cap (keeps capped free tiers for when they are needed)
+  5. lower p95 latency (a provider without enough samples yet counts as
+     fastest, so every provider gets measured)
+
+The first provider is asked straight away. If it has not answered within its
+own p95 latency (clamped to AUTO_HEDGE_MIN_MS..AUTO_HEDGE_MAX_MS), a hedged
+request goes to the next provider and the first good result wins; at most
+two requests are in flight at once. A request that fails because of its
+provider — a transport error, a timeout, a 429/5xx response, a spent quota or
+a missing API key (see errors.retryable) — fails over to the next provider
+immediately; any other failure, such as an unknown or invalid ticker, is the
+answer and is raised straight away. A slow provider therefore costs about one
+p95 rather than a full upstream timeout. Requests that lose the race are left
+to finish in the background and still fill the response cache.
+
+The result is the winning provider's standard result plus 'provider': <slug>.
+That copy is kept for as long as the cache hands out the same result, so the
+response layer's per-object ETag memo (see providers/responses.py) still hits.
+
+Environment overrides:
+  AUTO_HEDGE_MIN_MS     shortest hedge delay                   (default 50)
+  AUTO_HEDGE_MAX_MS     longest hedge delay                    (default 2000)
+  AUTO_HEALTH_WINDOW    samples kept per provider              (default 50)
+  AUTO_TIMEOUT          overall deadline in seconds            (default 20)
+  AUTO_MAX_WORKERS      threads running provider fetches       (default 32)
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from . import ASYNC_REGISTRY, CACHE, REGISTRY, log, quota
+from .cache import StampedLRU
+from .errors import retryable
+
+HEDGE_MIN       = float(os.environ.get('AUTO_HEDGE_MIN_MS', 50)) / 1000
+HEDGE_MAX       = float(os.environ.get('AUTO_HEDGE_MAX_MS', 2000)) / 1000
+HEALTH_WINDOW   = int(os.environ.get('AUTO_HEALTH_WINDOW', 50))
+TIMEOUT         = float(os.environ.get('AUTO_TIMEOUT', 20))
+MAX_WORKERS     = int(os.environ.get('AUTO_MAX_WORKERS', 32))
+MIN_SAMPLES     = 5      # below this a provider's p95 is unknown
+DEFAULT_HEDGE   = 1.0    # hedge delay for a provider with an unknown p95
+MAX_IN_FLIGHT   = 2      # the primary request plus one hedge
+WON_ENTRIES     = 1024   # tagged results kept for the ETag memo
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='auto')
+
+_won_results = StampedLRU(WON_ENTRIES)   # (slug, id(result)) → result plus 'provider'
+
+logger = log.get('auto')
+
+
+# ── Provider health ───────────────────────────────────────────────────────────
+
+class ProviderHealth:
+    """Rolling window of (seconds, ok) samples for one provider."""
+
+    def __init__(self, window: int = HEALTH_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.wins = 0
+        self.hedges = 0
+
+    def record(self, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self._samples.append((seconds, ok))
+
+    def won(self) -> None:
+        with self._lock:
+            self.wins += 1
+
+    def hedged(self) -> None:
+        with self._lock:
+            self.hedges += 1
+
+    def error_rate(self) -> float:
+        with self._lock:
+            samples = list(self._samples)
+        return sum(1 for _, ok in samples if not ok) / len(samples) if samples else 0.0
+
+    def p95(self) -> float | None:
+        """95th-percentile latency of successful calls, or None with too few samples."""
+        with self._lock:
+            latencies = sorted(seconds for seconds, ok in self._samples if ok)
+        if len(latencies) < MIN_SAMPLES:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+    def hedge_delay(self) -> float:
+        """How long to wait for this provider before hedging to the next one."""
+        p95 = self.p95()
+        return min(max(p95 if p95 is not None else DEFAULT_HEDGE, HEDGE_MIN), HEDGE_MAX)
+
+    def stats(self) -> dict:
+        p95 = self.p95()
+        with self._lock:
+            samples, wins, hedges = len(self._samples), self.wins, self.hedges
+        return {
+            'samples':   samples,
+            'errorRate': round(self.error_rate(), 4),
+            'p95Ms':     round(p95 * 1000, 1) if p95 is not None else None,
+            'wins':      wins,
+            'hedges':    hedges,
+        }
+
+
+class _HealthTable(dict):
+    """slug → ProviderHealth, created on first use (the registry loads providers lazily)."""
+
+    def __missing__(self, slug: str) -> ProviderHealth:
+        return self.setdefault(slug, ProviderHealth())
+
+
+HEALTH = _HealthTable()
+
+
+def rank(ticker: str) -> list:
+    """Provider slugs for `ticker`, healthiest first."""
+    def key(slug):
+        health = HEALTH[slug]
+        remaining = quota.remaining_today(slug)
+        p95 = health.p95()
+        return (
+            not CACHE.is_fresh(slug, ticker),
+            remaining == 0,
+            round(health.error_rate(), 1),
+            remaining is not None,
+            p95 if p95 is not None else 0.0,
+        )
+    return sorted(REGISTRY, key=key)
+
+
+def stats() -> dict:
+    """Per-provider health, for the /health endpoint."""
+    return {slug: HEALTH[slug].stats() for slug in REGISTRY}
+
+
+# ── Fetch ─────────────────────────────────────────────────────────────────────
+
+def timed(slug: str, ticker: str) -> dict:
+    """
+    Call one provider and record its latency and outcome (cache hits are not
+    samples). Also used by providers/compare.py, so comparisons keep the
+    health table current.
+    """
+    fresh = CACHE.is_fresh(slug, ticker)
+    start = time.monotonic()
+    try:
+        result = REGISTRY[slug](ticker)
+    except Exception:
+        HEALTH[slug].record(time.monotonic() - start, False)
+        raise
+    if not fresh:
+        HEALTH[slug].record(time.monotonic() - start, True)
+    return result
+
+
+def _won(slug: str, result: dict) -> dict:
+    """The winning result tagged with its provider, the same dict for as long as `result` is."""
+    HEALTH[slug].won()
+    key = (slug, id(result))
+    tagged = _won_results.get(key, result)   # holding the result as its stamp keeps its id() from being reused
+    if tagged is None:
+        tagged = {**result, 'provider': slug}
+        _won_results.put(key, result, tagged)
+    return tagged
+
+
+def fetch(ticker: str) -> dict:
+    """
+    Fetch `ticker` from the healthiest provider, hedging and failing over as needed.
+
+    Raises a provider's exception as soon as it is not one to fail over on
+    (errors.retryable), the first provider's exception when every provider
+    fails, and TimeoutError when nothing has answered within AUTO_TIMEOUT.
+    """
+    order = rank(ticker)
+    queue = list(order)
+    deadline = time.monotonic() + TIMEOUT
+    pending: dict = {}   # future → slug
+    errors: dict = {}    # slug → exception
+    last_slug = None
+
+    def launch():
+        nonlocal last_slug
+        last_slug = queue.pop(0)
+        pending[_executor.submit(log.in_context(timed), last_slug, ticker)] = last_slug
+
+    launch()
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        can_hedge = queue and len(pending) < MAX_IN_FLIGHT
+        timeout = min(HEALTH[last_slug].hedge_delay(), remaining) if can_hedge else remaining
+        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+        if not done:
+            if can_hedge:
+                HEALTH[last_slug].hedged()
+                logger.info('🔀 Auto: %s slow for %s, hedging to %s', last_slug, ticker, queue[0])
+                launch()
+            continue
+
+        finished = {pending.pop(future): future for future in done}
+        for slug, future in finished.items():   # a success wins over a failure that finished alongside it
+            if future.exception() is None:
+                return _won(slug, future.result())
+        for slug, future in finished.items():
+            e = future.exception()
+            if not retryable(e):
+                raise e
+            errors[slug] = e
+            logger.warning('⚠️ Auto: %s failed for %s: %s', slug, ticker, e)
+        if queue and not pending:
+            launch()   # fail over
+
+    if len(errors) == len(order):
+        raise errors[order[0]]
+    raise TimeoutError(f'No provider answered for {ticker} within {TIMEOUT:g}s.')
+
+
+async def timed_async(slug: str, ticker: str) -> dict:
+    """Async variant of timed()."""
+    fresh = CACHE.is_fresh(slug, ticker)
+    start = time.monotonic()
+    try:
+        result = await ASYNC_REGISTRY[slug](ticker)
+    except Exception:
+        HEALTH[slug].record(time.monotonic() - start, False)
+        raise
+    if not fresh:
+        HEALTH[slug].record(time.monotonic() - start, True)
+    return result
+
+
+async def fetch_async(ticker: str) -> dict:
+    """Async variant of fetch(); the provider requests are tasks on the running loop."""
+    order = rank(ticker)
+    queue = list(order)
+    deadline = time.monotonic() + TIMEOUT
+    pending: dict = {}   # task → slug
+    errors: dict = {}    # slug → exception
+    last_slug = None
+
+    def launch():
+        nonlocal last_slug
+        last_slug = queue.pop(0)
+        task = asyncio.ensure_future(timed_async(last_slug, ticker))
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())   # losers may fail unobserved
+        pending[task] = last_slug
+
+    launch()
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        can_hedge = queue and len(pending) < MAX_IN_FLIGHT
+        timeout = min(HEALTH[last_slug].hedge_delay(), remaining) if can_hedge else remaining
+        done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+        if not done:
+            if can_hedge:
+                HEALTH[last_slug].hedged()
+                logger.info('🔀 Auto: %s slow for %s, hedging to %s', last_slug, ticker, queue[0])
+                launch()
+            continue
+
+        finished = {pending.pop(task): task for task in done}
+        for slug, task in finished.items():   # a success wins over a failure that finished alongside it
+            if task.exception() is None:
+                return _won(slug, task.result())
+        for slug, task in finished.items():
+            e = task.exception()
+            if not retryable(e):
+                raise e
+            errors[slug] = e
+            logger.warning('⚠️ Auto: %s failed for %s: %s', slug, ticker, e)
+        if queue and not pending:
+            launch()   # fail over
+
+    if len(errors) == len(order):
+        raise errors[order[0]]
+    raise TimeoutError(f'No provider answered for {ticker} within {TIMEOUT:g}s.')
@@ -4,89 +4,96 @@ providers/fmp.py
 Financial Modeling Prep (FMP) data provider.
 
 Uses two stable API endpoints:
-  - /stable/quote                    → current price, daily change, company name
-  - /stable/historical-price-eod/light → 1-year daily closing prices
+  - /stable/quote                      → current price, daily change, company name
+  - /stable/historical-price-eod/light → daily closing prices, fetched incrementally
+                                         (see providers/history_store.py)
+
+Request building and response parsing are kept free of I/O so that fetch()
+(requests, blocking) and fetch_async() (httpx, asyncio) share them.
 
 Free tier: 250 requests/day
 Docs: https://site.financialmodelingprep.com/developer/docs
 """
 
+import asyncio
 import os
-import requests
 from datetime import datetime, timedelta
-from .base import FIXED_DATES, find_closest_date, calculate_change
+from . import aio, http_client, log
+from .bars import Bars, day_numbers
+from .base import PhaseTimer, PriceSeries, comparison_fields
+from .errors import NotConfigured
+from .history_store import STORE
 
+SLUG     = 'fmp'
 BASE_URL = 'https://financialmodelingprep.com/stable'
 
+logger = log.get(SLUG)
 
-def fetch(ticker: str) -> dict:
-    """
-    Fetch stock data from Financial Modeling Prep.
 
-    Returns a standardised result dictionary (see providers/__init__.py for schema).
-    Raises ValueError for invalid tickers, missing API key, or missing data.
-    """
+def _api_key() -> str:
     api_key = os.environ.get('FMP_API_KEY', '')
     if not api_key:
-        raise ValueError(
+        raise NotConfigured(
             'FMP API key not configured. '
             'Please add FMP_API_KEY to your .env file. '
             'Get a free key at https://financialmodelingprep.com/register'
         )
+    return api_key
 
-    print(f'📊 FMP: fetching {ticker}')
 
-    # ── Quote — current price, daily change, company name ────────────────────
-    quote_resp = requests.get(
-        f'{BASE_URL}/quote',
-        params={'symbol': ticker.upper(), 'apikey': api_key},
-        timeout=15,
-    )
-    quote_resp.raise_for_status()
-    quote_data = quote_resp.json()
+# ── Requests and parsing (no I/O) ─────────────────────────────────────────────
 
+def _parse_quote(quote_data, ticker: str) -> dict:
+    """Pick the single quote out of a /quote payload."""
     if not quote_data or (isinstance(quote_data, dict) and quote_data.get('error')):
         raise ValueError(f'No data found for ticker: {ticker}')
 
     if isinstance(quote_data, list) and len(quote_data) == 0:
         raise ValueError(f'Ticker "{ticker}" not found on FMP.')
 
-    quote = quote_data[0] if isinstance(quote_data, list) else quote_data
+    return quote_data[0] if isinstance(quote_data, list) else quote_data
 
-    current_price     = round(float(quote['price']), 2)
-    daily_change      = round(float(quote.get('change', 0) or 0), 2)
-    daily_change_pct  = round(float(quote.get('changesPercentage', 0) or 0), 2)
-    company_name      = quote.get('name') or ticker.upper()
 
-    # ── Historical EOD light — 1 year of daily closing prices ────────────────
-    from_date = (datetime.now() - timedelta(days=400)).strftime('%Y-%m-%d')
+def _history_params(symbol: str, api_key: str, since: str | None, latest: str | None) -> dict | None:
+    """
+    Query for daily closes dated on or after `since` (the last 400 days when None).
+
+    The live price comes from /quote, so once today's bar is stored (`latest`,
+    the last stored date) an incremental update has nothing new to download
+    and None is returned (no upstream call).
+    """
+    if since is not None and latest == datetime.now().strftime('%Y-%m-%d'):
+        return None
+    from_date = since or (datetime.now() - timedelta(days=400)).strftime('%Y-%m-%d')
+    return {'symbol': symbol, 'from': from_date, 'apikey': api_key}
 
-    hist_resp = requests.get(
-        f'{BASE_URL}/historical-price-eod/light',
-        params={'symbol': ticker.upper(), 'from': from_date, 'apikey': api_key},
-        timeout=15,
-    )
-    hist_resp.raise_for_status()
-    hist_raw = hist_resp.json()
 
+def _parse_history(hist_raw) -> Bars:
+    """Turn a historical-price-eod/light payload into close-only Bars."""
     # Response may be a flat list or wrapped {"historical": [...]}
     if isinstance(hist_raw, dict):
         historical = hist_raw.get('historical', [])
     else:
         historical = hist_raw or []
 
-    if not historical:
+    # The light endpoint has closes only, so open/high/low are left empty
+    return Bars.from_columns(
+        day_numbers([entry['date'] for entry in historical]),
+        [entry.get('price') for entry in historical],
+    )
+
+
+def _build_result(ticker: str, quote: dict, historical: Bars) -> dict:
+    """Compute the standardised result from a quote and oldest-first Bars."""
+    current_price     = round(float(quote['price']), 2)
+    daily_change      = round(float(quote.get('change', 0) or 0), 2)
+    daily_change_pct  = round(float(quote.get('changesPercentage', 0) or 0), 2)
+    company_name      = quote.get('name') or ticker.upper()
+
+    if not len(historical):
         raise ValueError(f'No historical data available for: {ticker}')
 
-    # Sort newest-first; build date → price map
-    historical.sort(key=lambda x: x['date'], reverse=True)
-    date_price_map = {
-        entry['date']: round(float(entry['price']), 2)
-        for entry in historical
-        if entry.get('price') is not None
-    }
-    all_dates     = list(date_price_map.keys())
-    latest_date   = all_dates[0] if all_dates else datetime.now().strftime('%Y-%m-%d')
+    latest_date = historical.date(-1)
 
     # ── Build result ──────────────────────────────────────────────────────────
     result = {
@@ -99,31 +106,116 @@ def fetch(ticker: str) -> dict:
         'timestamp':     latest_date,
     }
 
-    # 5 trading days ago
-    if len(historical) > 5:
-        price_5 = round(float(historical[5]['price']), 2)
-        change_5, pct_5 = calculate_change(current_price, price_5)
-        result.update({'price5DaysAgo': price_5, 'change5Days': change_5, 'changePercent5Days': pct_5})
-
-    # 30 trading days ago
-    if len(historical) > 30:
-        price_30 = round(float(historical[30]['price']), 2)
-        change_30, pct_30 = calculate_change(current_price, price_30)
-        result.update({'price30DaysAgo': price_30, 'change30Days': change_30, 'changePercent30Days': pct_30})
-
-    # Fixed dates
-    for key, price_key, change_key, pct_key in [
-        ('april1_2025',    'priceApril1_2025',    'changeApril1',    'changePercentApril1'),
-        ('october1_2025',  'priceOctober1_2025',  'changeOctober1',  'changePercentOctober1'),
-        ('december1_2025', 'priceDecember1_2025', 'changeDecember1', 'changePercentDecember1'),
-    ]:
-        closest = find_closest_date(all_dates, FIXED_DATES[key])
-        if closest:
-            p = date_price_map[closest]
-            c, pct = calculate_change(current_price, p)
-            result[price_key]  = p
-            result[change_key] = c
-            result[pct_key]    = pct
-
-    print(f'✅ FMP: {ticker} = ${current_price}')
+    # Lookback and fixed-date comparisons, vectorized over the whole series
+    result.update(comparison_fields(PriceSeries.from_bars(historical), current_price, decimals=2))
+
+    return result
+
+
+# ── Fetch ─────────────────────────────────────────────────────────────────────
+
+def fetch_quotes(tickers: list) -> dict:
+    """
+    Fetch quotes for many symbols in one call (/stable/quote accepts comma-separated symbols).
+
+    Returns a dict of upper-cased symbol → raw quote dict; unknown symbols are simply absent.
+    """
+    api_key = _api_key()
+    symbols = ','.join(t.upper() for t in tickers)
+    quote_data = http_client.get_json(
+        f'{BASE_URL}/quote',
+        params={'symbol': symbols, 'apikey': api_key},
+        timeout=15, provider=SLUG,
+    )
+    if not isinstance(quote_data, list):
+        return {}
+    return {q['symbol'].upper(): q for q in quote_data if q.get('symbol')}
+
+
+def fetch(ticker: str, quote: dict = None) -> dict:
+    """
+    Fetch stock data from Financial Modeling Prep.
+
+    The quote and history calls are independent and run in parallel.
+    `quote` may carry a raw quote already fetched by fetch_quotes(), which saves
+    the per-ticker quote call (used by the batch endpoint).
+
+    Returns a standardised result dictionary (see providers/__init__.py for schema).
+    Raises ValueError for invalid tickers, missing API key, or missing data.
+    """
+    api_key = _api_key()
+    symbol  = ticker.upper()
+    timer   = PhaseTimer(SLUG)
+
+    logger.debug('📊 FMP: fetching %s', ticker)
+
+    # ── Quote — current price, daily change, company name ────────────────────
+    def load_quote():
+        with timer.phase('quote'):
+            return _parse_quote(http_client.get_json(
+                f'{BASE_URL}/quote',
+                params={'symbol': symbol, 'apikey': api_key},
+                timeout=15, provider=SLUG,
+            ), ticker)
+
+    # ── Historical EOD light — daily closes, incremental via the history store ─
+    def download(since):
+        params = _history_params(symbol, api_key, since, STORE.last_date(SLUG, symbol))
+        if params is None:
+            return Bars.empty()
+        return _parse_history(http_client.get_json(
+            f'{BASE_URL}/historical-price-eod/light', params=params, timeout=15, provider=SLUG,
+        ))
+
+    def load_history():
+        with timer.phase('bars'):
+            return STORE.sync(SLUG, symbol, download)
+
+    if quote is None:
+        quote, historical = http_client.parallel(load_quote, load_history)
+    else:
+        historical = load_history()
+    for outcome in (quote, historical):
+        if isinstance(outcome, Exception):
+            raise outcome
+
+    with timer.phase('compute'):
+        result = _build_result(ticker, quote, historical)
+    if log.sampled():
+        logger.info('✅ FMP: %s = $%s (%s)', ticker, result['price'], timer.summary())
+    return result
+
+
+async def fetch_async(ticker: str) -> dict:
+    """Async variant of fetch(); the quote and history calls run concurrently."""
+    api_key = _api_key()
+    symbol  = ticker.upper()
+    timer   = PhaseTimer(SLUG)
+
+    logger.debug('📊 FMP: fetching %s (async)', ticker)
+
+    async def load_quote():
+        with timer.phase('quote'):
+            return await aio.get_json(f'{BASE_URL}/quote', params={'symbol': symbol, 'apikey': api_key}, timeout=15, provider=SLUG)
+
+    async def download(since):
+        params = _history_params(symbol, api_key, since, latest)
+        if params is None:
+            return Bars.empty()
+        return _parse_history(await aio.get_json(
+            f'{BASE_URL}/historical-price-eod/light', params=params, timeout=15, provider=SLUG,
+        ))
+
+    async def load_history():
+        with timer.phase('bars'):
+            return await STORE.sync_async(SLUG, symbol, download)
+
+    latest = await asyncio.to_thread(STORE.last_date, SLUG, symbol)
+    quote_data, historical = await asyncio.gather(load_quote(), load_history())
+    quote = _parse_quote(quote_data, ticker)
+
+    with timer.phase('compute'):
+        result = _build_result(ticker, quote, historical)
+    if log.sampled():
+        logger.info('✅ FMP: %s = $%s (%s)', ticker, result['price'], timer.summary())
     return result
@@ -0,0 +1,199 @@
+"""
+providers/history.py
+====================
+Daily price series for charting:
+
+  GET /api/<provider>/<ticker>/history?from=2025-01-01&to=2025-12-31&points=200&method=lttb
+
+The series comes from the symbol's bars in the history store, which the
+provider fetch has just brought up to date — no extra upstream call. It can
+be limited to a date range and downsampled server-side to at most `points`
+points, so a chart never has to ship thousands of bars to the browser:
+
+  lttb   Largest-Triangle-Three-Buckets on the closes: keeps the bars that
+         preserve the line's visual shape (default)
+  ohlc   equal-size buckets of consecutive bars, each merged into one
+         open/high/low/close candle dated at the bucket's first day
+
+The response is columnar (one array per field, null where the upstream has
+no value):
+
+  {"symbol": "AAPL", "provider": "yahoo-finance", "method": "lttb",
+   "from": "2025-01-02", "to": "2025-12-31", "total": 250, "points": 200,
+   "dates": [...], "open": [...], "high": [...], "low": [...], "close": [...]}
+
+Loaded bars and built series are memoized until the provider result (price,
+timestamp) changes or the store rewrites the symbol's bars after an upstream
+re-adjustment; bars_for() is shared with providers/horizons.py.
+
+Environment overrides:
+  HISTORY_CACHE_ENTRIES   memoized bar sets / series   (default 512)
+"""
+
+import os
+from datetime import date
+
+import numpy as np
+
+from .bars import Bars
+from .cache import StampedLRU
+from .history_store import STORE
+
+MAX_POINTS    = 5000
+METHODS       = ('lttb', 'ohlc')
+CACHE_ENTRIES = int(os.environ.get('HISTORY_CACHE_ENTRIES', 512))
+
+_bars   = StampedLRU(CACHE_ENTRIES)   # (provider, SYMBOL) → Bars
+_series = StampedLRU(CACHE_ENTRIES)   # (provider, SYMBOL, params) → payload dict
+
+
+def stamp(result: dict) -> tuple:
+    """What identifies one version of a provider result (and of the stored bars behind it)."""
+    return result['price'], result['timestamp'], STORE.revision(result['symbol'])
+
+
+def bars_for(provider: str, result: dict) -> Bars:
+    """All stored bars behind a provider result, loaded once per result version."""
+    key = (provider, result['symbol'].upper())
+    bars = _bars.get(key, stamp(result))
+    if bars is None:
+        bars = STORE.load(provider, key[1])
+        _bars.put(key, stamp(result), bars)
+    return bars
+
+
+# ── Parsing ───────────────────────────────────────────────────────────────────
+
+def parse(args) -> tuple:
+    """
+    Parse the `from`, `to`, `points` and `method` query parameters (a mapping).
+
+    Returns a hashable (from, to, points, method) tuple; absent values are None.
+    Raises ValueError for malformed values.
+    """
+    start = _date(args.get('from'), 'from')
+    end   = _date(args.get('to'), 'to')
+    if start and end and start > end:
+        raise ValueError(f'"from" ({start}) is after "to" ({end}).')
+
+    points = args.get('points')
+    if points is not None:
+        if not points.isdigit() or not 3 <= int(points) <= MAX_POINTS:
+            raise ValueError(f'Invalid points "{points}"; expected a whole number between 3 and {MAX_POINTS}.')
+        points = int(points)
+
+    method = (args.get('method') or METHODS[0]).lower()
+    if method not in METHODS:
+        raise ValueError(f'Invalid method "{method}"; expected one of {", ".join(METHODS)}.')
+    return start, end, points, method
+
+
+def _date(raw: str | None, name: str) -> str | None:
+    if not raw:
+        return None
+    try:
+        return date.fromisoformat(raw).isoformat()
+    except ValueError:
+        raise ValueError(f'Invalid {name} date "{raw}"; expected YYYY-MM-DD.') from None
+
+
+# ── Downsampling ──────────────────────────────────────────────────────────────
+
+def lttb(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """
+    Indices of the `points` samples Largest-Triangle-Three-Buckets keeps.
+
+    The first and last samples are always kept; every bucket in between
+    contributes the sample forming the largest triangle with the previously
+    kept sample and the average of the next bucket.
+    """
+    n = len(x)
+    if points >= n:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)   # points-2 buckets
+    # Every bucket's average, computed at once; the last "bucket" is the final sample
+    bounds = np.append(edges, n)
+    counts = np.diff(bounds)
+    avg_x = np.add.reduceat(x, bounds[:-1]) / counts
+    avg_y = np.add.reduceat(y, bounds[:-1]) / counts
+
+    keep = np.empty(points, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - avg_x[i + 1]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y[i + 1] - y[a]))
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+    return keep
+
+
+def ohlc(bars: Bars, points: int) -> Bars:
+    """Merge consecutive bars into at most `points` equal-size candles."""
+    n = len(bars)
+    if points >= n:
+        return bars
+
+    starts = np.unique(np.linspace(0, n, points, endpoint=False).astype(np.int64))
+    ends   = np.append(starts[1:], n) - 1
+    # Close-only upstreams: a bar's missing open/high/low fall back to its close
+    opens = np.where(np.isnan(bars.open), bars.close, bars.open)
+    highs = np.fmax(bars.high, np.fmax(opens, bars.close))
+    lows  = np.fmin(bars.low, np.fmin(opens, bars.close))
+    return Bars(
+        bars.days[starts],
+        opens[starts],
+        np.maximum.reduceat(highs, starts),
+        np.minimum.reduceat(lows, starts),
+        bars.close[ends],
+    )
+
+
+# ── Series ────────────────────────────────────────────────────────────────────
+
+def series(provider: str, result: dict, params: tuple) -> dict:
+    """The history payload for a provider result, memoized per parameter set."""
+    symbol = result['symbol'].upper()
+    key = (provider, symbol) + params
+    payload = _series.get(key, stamp(result))
+    if payload is not None:
+        return payload
+
+    start, end, points, method = params
+    bars = bars_for(provider, result)
+    lo = 0 if start is None else int(np.searchsorted(bars.days, np.datetime64(start, 'D').astype(np.int64)))
+    hi = len(bars) if end is None else int(np.searchsorted(bars.days, np.datetime64(end, 'D').astype(np.int64),
+                                                            side='right'))
+    picked = bars.take(slice(lo, hi))
+    total = len(picked)
+
+    if points is not None and points < total:
+        if method == 'ohlc':
+            picked = ohlc(picked, points)
+        else:
+            keep = lttb(picked.days.astype(np.float64), picked.close, points)
+            picked = picked.take(keep)
+
+    dates = np.datetime_as_string(picked.days.astype('datetime64[D]')).tolist()
+    payload = {
+        'symbol':   symbol,
+        'provider': provider,
+        'method':   method if points is not None and points < total else 'raw',
+        'from':     dates[0] if dates else start,
+        'to':       dates[-1] if dates else end,
+        'total':    total,
+        'points':   len(picked),
+        'dates':    dates,
+        'open':     _column(picked.open),
+        'high':     _column(picked.high),
+        'low':      _column(picked.low),
+        'close':    picked.close.tolist(),
+    }
+    _series.put(key, stamp(result), payload)
+    return payload
+
+
+def _column(values: np.ndarray) -> list:
+    """Float column as a list, with None (JSON null) for missing values."""
+    return [None if v != v else v for v in values.tolist()]
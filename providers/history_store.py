@@ -0,0 +1,286 @@
+"""
+providers/history_store.py
+==========================
+Persistent on-disk store of daily bars, shared by all providers.
+
+Providers used to download a year (or twenty years) of daily bars on every
+request just to read a handful of lookback prices. With the store, the first
+request for a symbol downloads the full history once; later requests ask the
+upstream only for bars from the second-latest stored date onwards and merge
+them in. The latest stored bar is re-downloaded because it may have been an
+intraday snapshot; the one before it has settled, so it shows whether the
+upstream has re-adjusted its series since (Yahoo, FMP and Massive serve
+split/dividend-adjusted closes). When a re-downloaded settled close differs
+from the stored one by more than READJUST_TOLERANCE, the symbol's bars are
+dropped and the full window is downloaded again, rather than splicing
+adjusted bars onto unadjusted ones. revision(symbol) counts these rewrites in
+this process, so results derived from the old bars are not reused (see
+providers/history.py).
+
+Company names, which almost never change, are kept in a second table so the
+extra name lookup some providers need is made once every few days at most
+(see providers/names.py). A third table holds each provider's rate-limit
+state — per-minute token bucket and daily call counter — so quotas survive
+restarts and are shared by every worker process (see providers/quota.py).
+
+Bars live in one SQLite table keyed by (provider, symbol, date). Each provider
+keeps its own copy because adjusted/unadjusted closes differ between sources.
+They go in and come out as columnar Bars (see providers/bars.py).
+The database file survives restarts and is safe to share between worker
+processes (WAL mode). Connections are opened on first use, one per thread and
+process: a connection must not cross a fork (gunicorn --preload), and STORE
+is created at import.
+
+Environment overrides:
+  HISTORY_DB   path of the SQLite file   (default data/history.sqlite3)
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+
+from . import log
+from .bars import Bars
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            'data', 'history.sqlite3')
+READJUST_TOLERANCE = 1e-4   # relative close difference still put down to rounding
+
+logger = log.get('history')
+
+_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS bars (
+        provider TEXT NOT NULL,
+        symbol   TEXT NOT NULL,
+        date     TEXT NOT NULL,       -- YYYY-MM-DD
+        open     REAL,                -- NULL when the upstream only serves closes
+        close    REAL NOT NULL,
+        high     REAL,
+        low      REAL,
+        PRIMARY KEY (provider, symbol, date)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS names (
+        provider   TEXT NOT NULL,
+        symbol     TEXT NOT NULL,
+        name       TEXT NOT NULL,
+        fetched_at REAL NOT NULL,     -- unix time
+        PRIMARY KEY (provider, symbol)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS quota (
+        provider   TEXT PRIMARY KEY,
+        day        TEXT NOT NULL,     -- YYYY-MM-DD (UTC) that `used` counts
+        used       INTEGER NOT NULL,  -- upstream calls made on `day`
+        tokens     REAL NOT NULL,     -- per-minute bucket level at `updated_at`
+        updated_at REAL NOT NULL      -- unix time
+    ) WITHOUT ROWID
+    """,
+]
+
+
+class HistoryStore:
+    """SQLite-backed daily bar store; one connection per thread and process."""
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._schema_pid = None   # process that has created the schema
+        self._schema_lock = threading.Lock()
+        self._revisions: dict = {}   # SYMBOL → rewrites seen by this process
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _conn(self) -> sqlite3.Connection:
+        # A connection must not cross a fork (gunicorn --preload), so it is keyed by pid too
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn, self._local.pid = conn, os.getpid()
+            self._ensure_schema(conn)
+        return conn
+
+    def _ensure_schema(self, conn: sqlite3.Connection) -> None:
+        """Create the tables on a process's first connection."""
+        with self._schema_lock:
+            if self._schema_pid == os.getpid():
+                return
+            with conn:
+                for statement in _SCHEMA:
+                    conn.execute(statement)
+                # Stores created before high/low were kept
+                columns = {row[1] for row in conn.execute('PRAGMA table_info(bars)')}
+                for column in ('high', 'low'):
+                    if column not in columns:
+                        conn.execute(f'ALTER TABLE bars ADD COLUMN {column} REAL')
+            self._schema_pid = os.getpid()
+
+    def last_date(self, provider: str, symbol: str) -> str | None:
+        """Most recent stored date for a symbol, or None if nothing is stored yet."""
+        row = self._conn().execute(
+            'SELECT MAX(date) FROM bars WHERE provider = ? AND symbol = ?',
+            (provider, symbol.upper()),
+        ).fetchone()
+        return row[0] if row else None
+
+    def since_date(self, provider: str, symbol: str) -> str | None:
+        """Where an incremental download starts: the second-latest stored date (the latest if it is the only one)."""
+        rows = self._conn().execute(
+            'SELECT date FROM bars WHERE provider = ? AND symbol = ? ORDER BY date DESC LIMIT 2',
+            (provider, symbol.upper()),
+        ).fetchall()
+        return rows[-1][0] if rows else None
+
+    def readjusted(self, provider: str, symbol: str, bars: Bars) -> bool:
+        """
+        Whether downloaded `bars` disagree with the stored closes of settled days
+        (all but the latest stored one) by more than READJUST_TOLERANCE.
+        """
+        rows = list(bars.rows())
+        if not rows:
+            return False
+        symbol = symbol.upper()
+        stored = dict(self._conn().execute(
+            'SELECT date, close FROM bars WHERE provider = ? AND symbol = ? AND date >= ? '
+            'AND date < (SELECT MAX(date) FROM bars WHERE provider = ? AND symbol = ?)',
+            (provider, symbol, min(row[0] for row in rows), provider, symbol),
+        ).fetchall())
+        for date, _, _, _, close in rows:
+            old = stored.get(date)
+            if old is not None and abs(close - old) > READJUST_TOLERANCE * abs(old):
+                return True
+        return False
+
+    def drop(self, provider: str, symbol: str) -> None:
+        """Delete every stored bar for a symbol."""
+        symbol = symbol.upper()
+        with self._conn() as conn:
+            conn.execute('DELETE FROM bars WHERE provider = ? AND symbol = ?', (provider, symbol))
+        self._revisions[symbol] = self._revisions.get(symbol, 0) + 1
+
+    def revision(self, symbol: str) -> int:
+        """How many times this process has rewritten a symbol's bars (for any provider)."""
+        return self._revisions.get(symbol.upper(), 0)
+
+    def load(self, provider: str, symbol: str) -> Bars:
+        """All stored bars for a symbol, oldest first."""
+        return Bars.from_rows(self._conn().execute(
+            'SELECT date, open, high, low, close FROM bars WHERE provider = ? AND symbol = ? ORDER BY date',
+            (provider, symbol.upper()),
+        ).fetchall())
+
+    def upsert(self, provider: str, symbol: str, bars: Bars) -> None:
+        """Insert or overwrite bars for a symbol."""
+        if not len(bars):
+            return
+        symbol = symbol.upper()
+        with self._conn() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO bars (provider, symbol, date, open, high, low, close) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                ((provider, symbol) + row for row in bars.rows()),
+            )
+
+    def sync(self, provider: str, symbol: str, download) -> Bars:
+        """
+        Bring a symbol up to date and return its full oldest-first history.
+
+        `download(since)` must return Bars dated on or after `since`, or the
+        provider's full default window when `since` is None. A series the
+        upstream has re-adjusted is downloaded again in full.
+        """
+        since = self.since_date(provider, symbol)
+        bars = download(since)
+        if since is not None and self.readjusted(provider, symbol, bars):
+            logger.info('🔄 History: %s %s re-adjusted upstream, downloading it again', provider, symbol.upper())
+            self.drop(provider, symbol)
+            bars = download(None)
+        return self.merge(provider, symbol, bars)
+
+    async def sync_async(self, provider: str, symbol: str, download) -> Bars:
+        """Async variant of sync() for a coroutine `download(since)`; database calls run in a thread."""
+        since = await asyncio.to_thread(self.since_date, provider, symbol)
+        bars = await download(since)
+        if since is not None and await asyncio.to_thread(self.readjusted, provider, symbol, bars):
+            logger.info('🔄 History: %s %s re-adjusted upstream, downloading it again', provider, symbol.upper())
+            await asyncio.to_thread(self.drop, provider, symbol)
+            bars = await download(None)
+        return await asyncio.to_thread(self.merge, provider, symbol, bars)
+
+    def merge(self, provider: str, symbol: str, bars: Bars) -> Bars:
+        """Upsert freshly downloaded bars and return the full oldest-first history."""
+        self.upsert(provider, symbol, bars)
+        return self.load(provider, symbol)
+
+    def get_name(self, provider: str, symbol: str) -> tuple | None:
+        """Stored (name, fetched_at) for a symbol, or None."""
+        return self._conn().execute(
+            'SELECT name, fetched_at FROM names WHERE provider = ? AND symbol = ?',
+            (provider, symbol.upper()),
+        ).fetchone()
+
+    def put_name(self, provider: str, symbol: str, name: str, fetched_at: float) -> None:
+        """Insert or overwrite the company name for a symbol."""
+        with self._conn() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO names (provider, symbol, name, fetched_at) VALUES (?, ?, ?, ?)',
+                (provider, symbol.upper(), name, fetched_at),
+            )
+
+    def take_quota(self, provider: str, day: str, per_minute: int | None, per_day: int | None,
+                   now: float) -> tuple:
+        """
+        Atomically spend one upstream call from a provider's budget.
+
+        The per-minute limit is a token bucket holding up to `per_minute` tokens
+        and refilling at per_minute / 60 tokens per second; the daily counter
+        restarts whenever `day` changes. Either limit may be None (unlimited).
+
+        Returns (wait, used): wait is 0 when the call was granted, the seconds
+        until the next token when the bucket is empty, or None when the daily
+        quota is used up. `used` is the day's call count afterwards.
+        """
+        conn = self._conn()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(
+                'SELECT day, used, tokens, updated_at FROM quota WHERE provider = ?', (provider,),
+            ).fetchone()
+            if row is None:
+                row = (day, 0, float(per_minute or 0), now)
+            last_day, used, tokens, updated_at = row
+            if last_day != day:
+                used = 0
+            if per_minute:
+                tokens = min(float(per_minute), tokens + (now - updated_at) * per_minute / 60)
+
+            if per_day is not None and used >= per_day:
+                wait = None
+            elif per_minute and tokens < 1:
+                wait = (1 - tokens) * 60 / per_minute
+            else:
+                wait = 0
+                used += 1
+                tokens -= 1 if per_minute else 0
+
+            conn.execute(
+                'INSERT OR REPLACE INTO quota (provider, day, used, tokens, updated_at) VALUES (?, ?, ?, ?, ?)',
+                (provider, day, used, tokens, now),
+            )
+        return wait, used
+
+    def quota_state(self, provider: str) -> tuple | None:
+        """Stored (day, used, tokens, updated_at) for a provider, or None."""
+        return self._conn().execute(
+            'SELECT day, used, tokens, updated_at FROM quota WHERE provider = ?', (provider,),
+        ).fetchone()
+
+
+STORE = HistoryStore(os.environ.get('HISTORY_DB', DEFAULT_PATH))
@@ -0,0 +1,118 @@
+"""
+providers/horizons.py
+=====================
+Caller-chosen comparison horizons for the single-ticker and batch endpoints:
+
+  GET /api/<provider>/<ticker>?dates=2025-04-01,2026-01-02&lookbacks=5,30,90,252
+
+Every provider result already carries the built-in 5/30-day and FIXED_DATES
+comparisons. Extra horizons are computed afterwards, without any upstream
+call, from the symbol's daily bars in the history store (which the fetch has
+just brought up to date) against the result's current price. All requested
+lookbacks and dates go through one PriceSeries pass: a single batched
+searchsorted for the dates and one vectorized change/percent computation.
+
+The answer is added to a copy of the result under 'comparisons':
+
+  "comparisons": {
+    "lookbacks": {"90":         {"date": ..., "price": ..., "change": ..., "changePercent": ...}},
+    "dates":     {"2026-01-02": {"date": <nearest trading day>, ...} | null}
+  }
+
+A date with no trading day within ±7 calendar days, or a lookback longer than
+the stored history, maps to null. The per-symbol bars (see providers/history.py)
+and the computed comparisons are memoized per parameter set until the
+underlying result (price, timestamp) changes.
+
+Environment overrides:
+  HORIZON_CACHE_ENTRIES   memoized comparison sets            (default 512)
+"""
+
+import os
+from datetime import date
+
+import numpy as np
+
+from .base import PriceSeries, compare
+from .cache import StampedLRU
+from .history import bars_for, stamp
+
+MAX_HORIZONS = 32      # per parameter (dates, lookbacks)
+MAX_LOOKBACK = 10000   # trading days (~40 years)
+CACHE_ENTRIES = int(os.environ.get('HORIZON_CACHE_ENTRIES', 512))
+
+_comparisons = StampedLRU(CACHE_ENTRIES)   # (provider, SYMBOL, dates, lookbacks) → dict
+
+
+# ── Parsing ───────────────────────────────────────────────────────────────────
+
+def parse(dates_raw: str | None, lookbacks_raw: str | None) -> tuple | None:
+    """
+    Parse the `dates` and `lookbacks` query parameters.
+
+    Returns a hashable (dates, lookbacks) pair of sorted, de-duplicated
+    tuples, or None when neither parameter was given.
+    Raises ValueError for malformed values.
+    """
+    if not dates_raw and not lookbacks_raw:
+        return None
+
+    dates = set()
+    for raw in _split(dates_raw, 'dates'):
+        try:
+            dates.add(date.fromisoformat(raw).isoformat())
+        except ValueError:
+            raise ValueError(f'Invalid date "{raw}" in dates; expected YYYY-MM-DD.') from None
+
+    lookbacks = set()
+    for raw in _split(lookbacks_raw, 'lookbacks'):
+        if not raw.isdigit() or not 0 < int(raw) <= MAX_LOOKBACK:
+            raise ValueError(f'Invalid lookback "{raw}"; expected a whole number of trading days '
+                             f'between 1 and {MAX_LOOKBACK}.')
+        lookbacks.add(int(raw))
+
+    return tuple(sorted(dates)), tuple(sorted(lookbacks))
+
+
+def _split(raw: str | None, name: str) -> list:
+    values = [v.strip() for v in (raw or '').split(',') if v.strip()]
+    if len(values) > MAX_HORIZONS:
+        raise ValueError(f'Too many {name} ({len(values)}); the limit is {MAX_HORIZONS}.')
+    return values
+
+
+# ── Computation ───────────────────────────────────────────────────────────────
+
+def attach(provider: str, result: dict, horizons: tuple | None) -> dict:
+    """Return a copy of `result` with the requested comparisons added (unchanged if None)."""
+    if horizons is None:
+        return result
+    return {**result, 'comparisons': comparisons(provider, result, horizons)}
+
+
+def comparisons(provider: str, result: dict, horizons: tuple) -> dict:
+    """The 'comparisons' block for a provider result, memoized per parameter set."""
+    key = (provider, result['symbol'].upper()) + horizons
+    cached = _comparisons.get(key, stamp(result))
+    if cached is not None:
+        return cached
+
+    series = PriceSeries.from_bars(bars_for(provider, result))
+
+    dates, lookbacks = horizons
+    indices = np.concatenate([series.ago(lookbacks), series.nearest(dates)])
+    rows = compare(series, indices, result['price'], decimals=2)
+
+    block = {
+        'lookbacks': {str(n): _entry(row) for n, row in zip(lookbacks, rows)},
+        'dates':     {day: _entry(row) for day, row in zip(dates, rows[len(lookbacks):])},
+    }
+    _comparisons.put(key, stamp(result), block)
+    return block
+
+
+def _entry(row: tuple | None) -> dict | None:
+    if row is None:
+        return None
+    day, price, change, pct = row
+    return {'date': day, 'price': price, 'change': change, 'changePercent': pct}
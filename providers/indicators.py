@@ -0,0 +1,347 @@
+"""
+providers/indicators.py
+=======================
+Technical indicators for the single-ticker, auto and batch endpoints:
+
+  GET /api/<provider>/<ticker>?indicators=sma20,ema50,rsi14,stdev20
+
+  smaN     simple moving average of the last N closes
+  emaN     exponential moving average (alpha 2/(N+1), seeded with the SMA of the first N closes)
+  rsiN     Wilder's relative strength index over N closes (0-100)
+  stdevN   volatility: sample standard deviation of the last N daily returns, in percent
+
+Values are computed from the symbol's daily bars in the history store (see
+providers/history.py) — no extra upstream call — as of its latest bar, and
+added to a copy of the result under 'indicators' (null while the history is
+shorter than the indicator needs):
+
+  "indicators": {"asOf": "2026-10-15", "sma20": 187.31, "rsi14": 61.27, ...}
+
+Each (provider, symbol) keeps running indicator state instead of recomputing
+the history per request. The state covers every bar but the latest — the
+store re-downloads that one because it may be an intraday snapshot — and is
+built once with vectorized operations over the full series (a window sum for
+SMA/stdev, a geometric-weight dot product for the EMA and RSI recurrences).
+When new bars arrive each is folded in with an O(1) update: a ring buffer and
+running sums for SMA and stdev, the recurrence itself for EMA and RSI. The
+latest bar is then applied tentatively, without changing the state. A state
+whose last bar is no longer in the history, or has a different close (the
+store re-downloaded a re-adjusted series), is rebuilt.
+Answers are also memoized until the underlying result (price, timestamp)
+changes.
+
+Environment overrides:
+  INDICATOR_STATES   (provider, symbol) states kept   (default 512)
+"""
+
+import math
+import os
+import re
+import threading
+from collections import OrderedDict, deque
+
+import numpy as np
+
+from .cache import StampedLRU
+from .history import bars_for, stamp
+
+MAX_INDICATORS = 16
+MAX_PERIOD     = 1000
+REBUILD_AFTER  = 64   # new bars past which a vectorized rebuild beats folding them in one by one
+STATES         = int(os.environ.get('INDICATOR_STATES', 512))
+
+_SPEC = re.compile(r'^(sma|ema|rsi|stdev)(\d+)$')
+
+_answers = StampedLRU(STATES)   # (provider, SYMBOL, specs) → dict
+
+
+# ── Indicators ────────────────────────────────────────────────────────────────
+# Each indicator is built from the committed closes (oldest first), updated
+# with one more committed close, and asked for its value with one tentative
+# close on top. value() returns None until there are enough closes.
+
+def _decayed(seed: float, values: np.ndarray, alpha: float) -> float:
+    """x ← alpha·v + (1-alpha)·x over `values`, starting from `seed`, as one dot product."""
+    decay = 1.0 - alpha
+    weights = decay ** np.arange(len(values) - 1, -1, -1, dtype=np.float64)
+    return decay ** len(values) * seed + alpha * float(weights @ values)
+
+
+class SMA:
+    """Simple moving average: ring buffer of the last N closes and their running sum."""
+
+    __slots__ = ('period', 'window', 'total')
+
+    def __init__(self, period: int):
+        self.period = period
+        self.window: deque = deque(maxlen=period)
+        self.total = 0.0
+
+    def build(self, closes: np.ndarray) -> None:
+        tail = closes[-self.period:]
+        self.window = deque(tail.tolist(), maxlen=self.period)
+        self.total = float(tail.sum())
+
+    def update(self, close: float) -> None:
+        if len(self.window) == self.period:
+            self.total -= self.window[0]
+        self.window.append(close)
+        self.total += close
+
+    def value(self, close: float) -> float | None:
+        if len(self.window) < self.period - 1:
+            return None
+        if len(self.window) < self.period:
+            return (self.total + close) / self.period
+        return (self.total - self.window[0] + close) / self.period
+
+
+class EMA:
+    """Exponential moving average, seeded with the SMA of the first N closes."""
+
+    __slots__ = ('period', 'alpha', 'seen', 'ema')
+
+    def __init__(self, period: int):
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self.seen = 0
+        self.ema = 0.0   # running sum of the closes until `period` have been seen
+
+    def build(self, closes: np.ndarray) -> None:
+        self.seen = len(closes)
+        if self.seen < self.period:
+            self.ema = float(closes.sum())
+        else:
+            self.ema = _decayed(float(closes[:self.period].mean()), closes[self.period:], self.alpha)
+
+    def update(self, close: float) -> None:
+        self.seen += 1
+        if self.seen < self.period:
+            self.ema += close
+        elif self.seen == self.period:
+            self.ema = (self.ema + close) / self.period
+        else:
+            self.ema += self.alpha * (close - self.ema)
+
+    def value(self, close: float) -> float | None:
+        if self.seen < self.period - 1:
+            return None
+        if self.seen == self.period - 1:
+            return (self.ema + close) / self.period
+        return self.ema + self.alpha * (close - self.ema)
+
+
+class RSI:
+    """Wilder's RSI: smoothed average gain and loss (alpha 1/N), seeded with simple averages."""
+
+    __slots__ = ('period', 'last', 'moves', 'gain', 'loss')
+
+    def __init__(self, period: int):
+        self.period = period
+        self.last = None   # previous close
+        self.moves = 0     # close-to-close moves seen
+        self.gain = 0.0    # running sums until `period` moves have been seen, then averages
+        self.loss = 0.0
+
+    def build(self, closes: np.ndarray) -> None:
+        self.last = float(closes[-1]) if len(closes) else None
+        moves = np.diff(closes)
+        gains, losses = np.maximum(moves, 0.0), np.maximum(-moves, 0.0)
+        self.moves = len(moves)
+        if self.moves < self.period:
+            self.gain, self.loss = float(gains.sum()), float(losses.sum())
+        else:
+            alpha = 1.0 / self.period
+            self.gain = _decayed(float(gains[:self.period].mean()), gains[self.period:], alpha)
+            self.loss = _decayed(float(losses[:self.period].mean()), losses[self.period:], alpha)
+
+    def _step(self, close: float) -> tuple:
+        move = close - self.last
+        gain, loss = max(move, 0.0), max(-move, 0.0)
+        moves = self.moves + 1
+        if moves < self.period:
+            return moves, self.gain + gain, self.loss + loss
+        if moves == self.period:
+            return moves, (self.gain + gain) / self.period, (self.loss + loss) / self.period
+        return moves, self.gain + (gain - self.gain) / self.period, self.loss + (loss - self.loss) / self.period
+
+    def update(self, close: float) -> None:
+        if self.last is not None:
+            self.moves, self.gain, self.loss = self._step(close)
+        self.last = close
+
+    def value(self, close: float) -> float | None:
+        if self.last is None or self.moves < self.period - 1:
+            return None
+        _, gain, loss = self._step(close)
+        if loss == 0:
+            return 50.0 if gain == 0 else 100.0
+        return 100.0 - 100.0 / (1.0 + gain / loss)
+
+
+class Stdev:
+    """Sample standard deviation of the last N daily returns (percent): ring buffer and running sums."""
+
+    __slots__ = ('period', 'last', 'window', 'total', 'squares')
+
+    def __init__(self, period: int):
+        self.period = period
+        self.last = None
+        self.window: deque = deque(maxlen=period)
+        self.total = 0.0
+        self.squares = 0.0
+
+    def build(self, closes: np.ndarray) -> None:
+        self.last = float(closes[-1]) if len(closes) else None
+        tail = closes[-self.period - 1:]
+        returns = (tail[1:] / tail[:-1] - 1.0) * 100.0
+        self.window = deque(returns.tolist(), maxlen=self.period)
+        self.total = float(returns.sum())
+        self.squares = float(returns @ returns)
+
+    def update(self, close: float) -> None:
+        if self.last is not None:
+            r = (close / self.last - 1.0) * 100.0
+            if len(self.window) == self.period:
+                old = self.window[0]
+                self.total -= old
+                self.squares -= old * old
+            self.window.append(r)
+            self.total += r
+            self.squares += r * r
+        self.last = close
+
+    def value(self, close: float) -> float | None:
+        if self.last is None or len(self.window) < self.period - 1:
+            return None
+        r = (close / self.last - 1.0) * 100.0
+        total, squares = self.total + r, self.squares + r * r
+        if len(self.window) == self.period:
+            old = self.window[0]
+            total, squares = total - old, squares - old * old
+        variance = (squares - total * total / self.period) / (self.period - 1)
+        return math.sqrt(max(variance, 0.0))
+
+
+KINDS = {
+    'sma':   SMA,
+    'ema':   EMA,
+    'rsi':   RSI,
+    'stdev': Stdev,
+}
+
+
+# ── Parsing ───────────────────────────────────────────────────────────────────
+
+def parse(raw: str | None) -> tuple | None:
+    """
+    Parse the `indicators` query parameter, e.g. 'sma20,ema50,rsi14'.
+
+    Returns a sorted, de-duplicated tuple of specs, or None when absent.
+    Raises ValueError for malformed values.
+    """
+    specs = {s.strip().lower() for s in (raw or '').split(',') if s.strip()}
+    if not specs:
+        return None
+    if len(specs) > MAX_INDICATORS:
+        raise ValueError(f'Too many indicators ({len(specs)}); the limit is {MAX_INDICATORS}.')
+    for spec in specs:
+        match = _SPEC.match(spec)
+        if match is None or not 2 <= int(match.group(2)) <= MAX_PERIOD:
+            raise ValueError(f'Invalid indicator "{spec}"; expected sma, ema, rsi or stdev followed by '
+                             f'a period between 2 and {MAX_PERIOD}, e.g. sma20.')
+    return tuple(sorted(specs))
+
+
+# ── State ─────────────────────────────────────────────────────────────────────
+
+class _Track:
+    """One symbol's indicators over its committed bars (all but the latest)."""
+
+    __slots__ = ('lock', 'through', 'through_close', 'indicators')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.through = None            # day number of the last committed bar
+        self.through_close = None      # and its close
+        self.indicators: dict = {}     # spec → indicator
+
+    def advance(self, days: np.ndarray, closes: np.ndarray) -> None:
+        """Fold in the committed bars after `through`, or start over when they don't line up."""
+        if self.through is None or not len(days):
+            self.reset(days, closes)
+            return
+        start = int(np.searchsorted(days, self.through))
+        if (start >= len(days) or days[start] != self.through or closes[start] != self.through_close
+                or len(days) - start - 1 > REBUILD_AFTER):
+            self.reset(days, closes)
+            return
+        for close in closes[start + 1:].tolist():
+            for indicator in self.indicators.values():
+                indicator.update(close)
+        self.through, self.through_close = int(days[-1]), float(closes[-1])
+
+    def reset(self, days: np.ndarray, closes: np.ndarray) -> None:
+        for indicator in self.indicators.values():
+            indicator.build(closes)
+        if len(days):
+            self.through, self.through_close = int(days[-1]), float(closes[-1])
+        else:
+            self.through = self.through_close = None
+
+    def add(self, spec: str, closes: np.ndarray):
+        kind, period = _SPEC.match(spec).groups()
+        indicator = self.indicators[spec] = KINDS[kind](int(period))
+        indicator.build(closes)
+        return indicator
+
+
+_tracks: OrderedDict = OrderedDict()   # (provider, SYMBOL) → _Track
+_tracks_lock = threading.Lock()
+
+
+def _track(key: tuple) -> _Track:
+    with _tracks_lock:
+        track = _tracks.get(key)
+        if track is None:
+            track = _tracks[key] = _Track()
+            while len(_tracks) > STATES:
+                _tracks.popitem(last=False)
+        else:
+            _tracks.move_to_end(key)
+        return track
+
+
+# ── Computation ───────────────────────────────────────────────────────────────
+
+def attach(provider: str, result: dict, specs: tuple | None) -> dict:
+    """Return a copy of `result` with the requested indicators added (unchanged if None)."""
+    if specs is None:
+        return result
+    return {**result, 'indicators': values(provider, result, specs)}
+
+
+def values(provider: str, result: dict, specs: tuple) -> dict:
+    """The 'indicators' block for a provider result, memoized per indicator set."""
+    key = (provider, result['symbol'].upper())
+    cached = _answers.get(key + specs, stamp(result))
+    if cached is not None:
+        return cached
+
+    bars = bars_for(provider, result)
+    if not len(bars):
+        return {'asOf': None, **{spec: None for spec in specs}}
+    days, closes = bars.days[:-1], bars.close[:-1]
+    latest = float(bars.close[-1])
+
+    track = _track(key)
+    with track.lock:
+        track.advance(days, closes)
+        block = {'asOf': bars.date(-1)}
+        for spec in specs:
+            indicator = track.indicators.get(spec) or track.add(spec, closes)
+            value = indicator.value(latest)
+            block[spec] = None if value is None else round(value, 2)
+
+    _answers.put(key + specs, stamp(result), block)
+    return block
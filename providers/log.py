@@ -0,0 +1,219 @@
+"""
+providers/log.py
+================
+Logging for the app and the providers, kept off the request path.
+
+Every module logs through a child of the 'stocks' logger (log.get(name)).
+setup(), called once by app.py / asgi.py, gives that logger a handler that
+only puts the record on a bounded queue; a listener thread formats and
+writes it to stdout. A request thread never waits on stdout, and when the
+writer falls behind, records are dropped (and counted) instead of blocking.
+A forked child (e.g. a gunicorn --preload worker) inherits the handler but
+not the writer thread, so it gets a fresh queue and its own listener.
+
+Each record carries the id of the request it was logged for: the apps call
+begin_request() per request (honouring an incoming X-Request-ID header) and
+echo the id back as X-Request-ID. The id lives in a context variable, so it
+follows asyncio tasks and asyncio.to_thread, and in_context() carries it
+into worker threads (batch fan-out, /api/auto, parallel upstream calls,
+stale-while-revalidate refreshes).
+
+High-volume success lines are sampled: the providers log one only when
+sampled() is true (LOG_SAMPLE_RATE of the time). Warnings and errors are
+never sampled. Per fetch, the "fetching" line is DEBUG and the result line
+INFO.
+
+  text   2026-01-02 15:04:05,123 INFO [3f9c1a2b4d5e6f70] stocks.fmp: ✅ FMP: AAPL = $187.2 (...)
+  json   {"ts": "...", "level": "INFO", "logger": "stocks.fmp", "requestId": "...", "message": "..."}
+
+Environment overrides:
+  LOG_LEVEL         DEBUG, INFO, WARNING, ...             (default INFO)
+  LOG_FORMAT        text or json                          (default text)
+  LOG_SAMPLE_RATE   fraction of success lines kept, 0-1   (default 1)
+  LOG_QUEUE_SIZE    records buffered before dropping      (default 10000)
+"""
+
+import atexit
+import contextvars
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import secrets
+import sys
+import threading
+
+import orjson
+
+LEVEL       = os.environ.get('LOG_LEVEL', 'INFO').upper()
+FORMAT      = os.environ.get('LOG_FORMAT', 'text').lower()
+SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', 1))
+QUEUE_SIZE  = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+
+ROOT = logging.getLogger('stocks')
+
+_request_id: contextvars.ContextVar = contextvars.ContextVar('request_id', default='-')
+_listener = None
+_handler = None
+_setup_lock = threading.Lock()
+
+
+def get(name: str) -> logging.Logger:
+    """The logger for one module, e.g. get('yahoo-finance') → 'stocks.yahoo-finance'."""
+    return ROOT.getChild(name)
+
+
+# ── Request ids ───────────────────────────────────────────────────────────────
+
+def begin_request(incoming: str | None = None):
+    """
+    Bind a request id to the current context (a sane incoming X-Request-ID
+    header is reused). Returns (id, token for end_request).
+    """
+    sane = incoming and len(incoming) <= 64 and incoming.isascii() and incoming.isprintable()
+    request_id = incoming if sane else secrets.token_hex(8)
+    return request_id, _request_id.set(request_id)
+
+
+def end_request(token) -> None:
+    _request_id.reset(token)
+
+
+def request_id() -> str:
+    """The current request id, or '-' outside a request."""
+    return _request_id.get()
+
+
+def in_context(fn):
+    """
+    Wrap `fn` to run in the caller's context (request id included) from a
+    thread pool. Each call gets its own copy, so the wrapper can also be
+    mapped over several workers at once.
+    """
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.copy().run(fn, *args, **kwargs)
+
+
+# ── Sampling ──────────────────────────────────────────────────────────────────
+
+def sampled() -> bool:
+    """True for LOG_SAMPLE_RATE of calls: gate high-volume success lines with it."""
+    return SAMPLE_RATE >= 1 or random.random() < SAMPLE_RATE
+
+
+# ── Handlers ──────────────────────────────────────────────────────────────────
+
+class _RequestIdFilter(logging.Filter):
+    """Stamps the current request id on a record, in the thread that logged it."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        return True
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueues records without formatting them (the listener does that) and
+    drops them when the queue is full rather than blocking the caller.
+    """
+
+    def __init__(self, limit: int):
+        super().__init__(queue.SimpleQueue())   # lock-free put, unlike queue.Queue
+        self.limit = limit
+        self.dropped = 0
+
+    def handle(self, record: logging.LogRecord):
+        """Handler.handle() without the handler lock: the queue is thread-safe, so callers aren't serialized."""
+        rv = self.filter(record)
+        if isinstance(rv, logging.LogRecord):   # a filter may return a replacement record (3.12+)
+            record = rv
+        if rv:
+            self.emit(record)
+        return rv
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None   # tracebacks hold frames; render them now
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.queue.qsize() >= self.limit:
+            self.dropped += 1
+        else:
+            self.queue.put_nowait(record)
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts':        self.formatTime(record),
+            'level':     record.levelname,
+            'logger':    record.name,
+            'requestId': getattr(record, 'request_id', '-'),
+            'message':   record.getMessage(),
+        }
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return orjson.dumps(entry).decode()
+
+
+def setup(stream=None) -> None:
+    """Install the queue handler and start the writer thread (idempotent)."""
+    global _listener, _handler
+    with _setup_lock:
+        if _listener is not None:
+            return
+        if FORMAT == 'json':
+            formatter = JsonFormatter()
+        else:
+            formatter = logging.Formatter('%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s')
+        writer = logging.StreamHandler(stream or sys.stdout)
+        writer.setFormatter(formatter)
+
+        # Skip the per-record process lookups LogRecord would otherwise make
+        logging.logProcesses = logging.logMultiprocessing = False
+
+        _handler = _DroppingQueueHandler(QUEUE_SIZE)
+        _handler.addFilter(_RequestIdFilter())
+        ROOT.addHandler(_handler)
+        ROOT.setLevel(LEVEL)
+        ROOT.propagate = False
+
+        _listener = logging.handlers.QueueListener(_handler.queue, writer)
+        _listener.start()
+        atexit.register(shutdown)
+
+
+def shutdown() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _listener, _handler
+    with _setup_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        ROOT.removeHandler(_handler)
+        ROOT.propagate = True
+        _listener = _handler = None
+
+
+def _restart_in_child() -> None:
+    """After a fork: the parent's writer thread did not come along, so give the child its own."""
+    global _listener, _setup_lock
+    _setup_lock = threading.Lock()
+    if _listener is None:
+        return
+    _handler.queue = queue.SimpleQueue()   # records still queued belong to the parent
+    _listener = logging.handlers.QueueListener(_handler.queue, *_listener.handlers)
+    _listener.start()
+
+
+os.register_at_fork(after_in_child=_restart_in_child)
+
+
+def stats() -> dict:
+    """Queue depth and dropped records, for the /health endpoint."""
+    if _handler is None:
+        return {}
+    return {'queued': _handler.queue.qsize(), 'dropped': _handler.dropped, 'sampleRate': SAMPLE_RATE}
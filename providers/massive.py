@@ -4,93 +4,97 @@ providers/massive.py
 Massive.com data provider (Polygon.io-compatible REST API).
 
 Uses two endpoints (both available on free tier):
-  - /v2/aggs/ticker/{ticker}/range/1/day/{from}/{to}  → current price + full history
+  - /v2/aggs/ticker/{ticker}/range/1/day/{from}/{to}  → current price + history
+                                                        (incremental, see history_store.py)
   - /v3/reference/tickers/{ticker}                    → company name
 
-Current price  = most recent bar's close (results[0].c)
+Current price  = most recent bar's close
 Daily change   = difference between most recent close and previous day's close
 Authentication: apiKey query parameter
 Free tier available at https://massive.com
 Docs: https://massive.com/docs/rest/quickstart
+
+Request building and response parsing are kept free of I/O so that fetch()
+(requests, blocking) and fetch_async() (httpx, asyncio) share them.
 """
 
+import asyncio
 import os
-import requests
 from datetime import datetime, timedelta
-from .base import FIXED_DATES, find_closest_date, calculate_change
+from . import aio, http_client, log, names
+from .bars import Bars, local_day_numbers
+from .base import PhaseTimer, PriceSeries, calculate_change, comparison_fields
+from .errors import NotConfigured
+from .history_store import STORE
 
+SLUG     = 'massive'
 BASE_URL = 'https://api.massive.com'
 
+logger = log.get(SLUG)
 
-def fetch(ticker: str) -> dict:
-    """
-    Fetch stock data from Massive.com.
 
-    Returns a standardised result dictionary (see providers/__init__.py for schema).
-    Raises ValueError for invalid tickers, missing API key, or missing data.
-    """
+def _api_key() -> str:
     api_key = os.environ.get('MASSIVE_API_KEY', '')
     if not api_key:
-        raise ValueError(
+        raise NotConfigured(
             'Massive API key not configured. '
             'Please add MASSIVE_API_KEY to your .env file. '
             'Get a free key at https://massive.com'
         )
+    return api_key
 
-    print(f'📊 Massive: fetching {ticker}')
 
-    # ── Historical daily bars — current price + 1 year of history ────────────
-    from_date = (datetime.now() - timedelta(days=400)).strftime('%Y-%m-%d')
-    to_date   = datetime.now().strftime('%Y-%m-%d')
+# ── Requests and parsing (no I/O) ─────────────────────────────────────────────
 
-    agg_resp = requests.get(
-        f'{BASE_URL}/v2/aggs/ticker/{ticker.upper()}/range/1/day/{from_date}/{to_date}',
-        params={'adjusted': 'true', 'sort': 'desc', 'limit': 400, 'apiKey': api_key},
-        timeout=15,
+def _aggs_request(symbol: str, api_key: str, since: str | None) -> tuple:
+    """(url, params) for daily bars dated on or after `since` (the last 400 days when None)."""
+    from_date = since or (datetime.now() - timedelta(days=400)).strftime('%Y-%m-%d')
+    to_date   = datetime.now().strftime('%Y-%m-%d')
+    return (
+        f'{BASE_URL}/v2/aggs/ticker/{symbol}/range/1/day/{from_date}/{to_date}',
+        {'adjusted': 'true', 'sort': 'desc', 'limit': 400, 'apiKey': api_key},
     )
-    agg_resp.raise_for_status()
-    agg_data = agg_resp.json()
 
+
+def _parse_aggs(agg_data: dict, symbol: str) -> Bars:
+    """Turn an aggregates payload into Bars (newest first, as requested; the store sorts them)."""
     if agg_data.get('status') == 'ERROR':
-        raise ValueError(f'Massive API error for ticker: {ticker}')
+        raise ValueError(f'Massive API error for ticker: {symbol}')
 
+    # each bar: t=ms timestamp, o/h/l/c=open/high/low/close; bars without a close are dropped
     results = agg_data.get('results', [])
-    if not results:
+    return Bars.from_columns(
+        local_day_numbers([bar['t'] for bar in results], scale=1000),
+        [bar.get('c') for bar in results],
+        open=[bar.get('o') for bar in results],
+        high=[bar.get('h') for bar in results],
+        low=[bar.get('l') for bar in results],
+    )
+
+
+def _reference_request(symbol: str, api_key: str) -> tuple:
+    return f'{BASE_URL}/v3/reference/tickers/{symbol}', {'apiKey': api_key}
+
+
+def _parse_name(ref_data: dict) -> str | None:
+    return ref_data.get('results', {}).get('name') or None
+
+
+def _build_result(ticker: str, bars: Bars, company_name: str) -> dict:
+    """Compute the standardised result from oldest-first Bars."""
+    if not len(bars):
         raise ValueError(f'No data found for ticker: {ticker}')
 
-    # results sorted desc (newest first); each bar: t=ms timestamp, c=close, o=open
-    current_bar  = results[0]
-    current_price = round(float(current_bar['c']), 2)
-    current_date  = datetime.fromtimestamp(current_bar['t'] / 1000).strftime('%Y-%m-%d')
+    current_date  = bars.date(-1)
+    current_price = round(float(bars.close[-1]), 2)
 
     # Daily change vs previous day's close
-    if len(results) > 1:
-        prev_close = round(float(results[1]['c']), 2)
+    if len(bars) > 1:
+        prev_close = round(float(bars.close[-2]), 2)
         daily_change, daily_change_pct = calculate_change(current_price, prev_close)
     else:
         daily_change, daily_change_pct = 0.0, 0.0
 
-    # ── Company name — ticker reference (best-effort) ─────────────────────────
-    company_name = ticker.upper()
-    try:
-        ref_resp = requests.get(
-            f'{BASE_URL}/v3/reference/tickers/{ticker.upper()}',
-            params={'apiKey': api_key},
-            timeout=10,
-        )
-        ref_data = ref_resp.json()
-        company_name = ref_data.get('results', {}).get('name', ticker.upper()) or ticker.upper()
-    except Exception:
-        pass  # Name is optional
-
-    # ── Build date → price map for historical lookups ─────────────────────────
-    date_price_map = {
-        datetime.fromtimestamp(bar['t'] / 1000).strftime('%Y-%m-%d'): round(float(bar['c']), 2)
-        for bar in results
-        if bar.get('c') is not None
-    }
-    all_dates = list(date_price_map.keys())
-
     # ── Build result ──────────────────────────────────────────────────────────
     result = {
         'symbol':        ticker.upper(),
@@ -102,31 +106,99 @@ def fetch(ticker: str) -> dict:
         'timestamp':     current_date,
     }
 
-    # 5 trading days ago
-    if len(results) > 5:
-        price_5 = round(float(results[5]['c']), 2)
-        change_5, pct_5 = calculate_change(current_price, price_5)
-        result.update({'price5DaysAgo': price_5, 'change5Days': change_5, 'changePercent5Days': pct_5})
-
-    # 30 trading days ago
-    if len(results) > 30:
-        price_30 = round(float(results[30]['c']), 2)
-        change_30, pct_30 = calculate_change(current_price, price_30)
-        result.update({'price30DaysAgo': price_30, 'change30Days': change_30, 'changePercent30Days': pct_30})
-
-    # Fixed dates
-    for key, price_key, change_key, pct_key in [
-        ('april1_2025',    'priceApril1_2025',    'changeApril1',    'changePercentApril1'),
-        ('october1_2025',  'priceOctober1_2025',  'changeOctober1',  'changePercentOctober1'),
-        ('december1_2025', 'priceDecember1_2025', 'changeDecember1', 'changePercentDecember1'),
-    ]:
-        closest = find_closest_date(all_dates, FIXED_DATES[key])
-        if closest:
-            p = date_price_map[closest]
-            c, pct = calculate_change(current_price, p)
-            result[price_key]  = p
-            result[change_key] = c
-            result[pct_key]    = pct
-
-    print(f'✅ Massive: {ticker} = ${current_price}')
+    # Lookback and fixed-date comparisons, vectorized over the whole series
+    result.update(comparison_fields(PriceSeries.from_bars(bars), current_price, decimals=2))
+
+    return result
+
+
+# ── Fetch ─────────────────────────────────────────────────────────────────────
+
+def fetch(ticker: str) -> dict:
+    """
+    Fetch stock data from Massive.com.
+
+    The company name comes from the name cache; when it has to be fetched, the
+    reference call runs in parallel with the aggregates call.
+
+    Returns a standardised result dictionary (see providers/__init__.py for schema).
+    Raises ValueError for invalid tickers, missing API key, or missing data.
+    """
+    api_key = _api_key()
+    symbol  = ticker.upper()
+    timer   = PhaseTimer(SLUG)
+
+    logger.debug('📊 Massive: fetching %s', ticker)
+
+    # ── Historical daily bars — current price + history (incremental) ───────
+    def download(since):
+        url, params = _aggs_request(symbol, api_key, since)
+        return _parse_aggs(http_client.get_json(url, params=params, timeout=15, provider=SLUG), symbol)
+
+    def load_bars():
+        with timer.phase('bars'):
+            return STORE.sync(SLUG, symbol, download)
+
+    # ── Company name — ticker reference (best-effort) ─────────────────────────
+    def load_name():
+        with timer.phase('name'):
+            url, params = _reference_request(symbol, api_key)
+            return _parse_name(http_client.get_json(url, params=params, timeout=10, provider=SLUG))
+
+    company_name = names.lookup(SLUG, symbol)
+    if company_name is None:
+        bars, company_name = http_client.parallel(load_bars, load_name)
+        if isinstance(bars, Exception):
+            raise bars
+        if isinstance(company_name, str):
+            names.remember(SLUG, symbol, company_name)
+        else:
+            company_name = symbol   # Name is optional
+    else:
+        bars = load_bars()
+
+    with timer.phase('compute'):
+        result = _build_result(ticker, bars, company_name)
+    if log.sampled():
+        logger.info('✅ Massive: %s = $%s (%s)', ticker, result['price'], timer.summary())
+    return result
+
+
+async def fetch_async(ticker: str) -> dict:
+    """Async variant of fetch(); the aggregates and reference calls run concurrently."""
+    api_key = _api_key()
+    symbol  = ticker.upper()
+    timer   = PhaseTimer(SLUG)
+
+    logger.debug('📊 Massive: fetching %s (async)', ticker)
+
+    async def download(since):
+        url, params = _aggs_request(symbol, api_key, since)
+        return _parse_aggs(await aio.get_json(url, params=params, timeout=15, provider=SLUG), symbol)
+
+    async def load_bars():
+        with timer.phase('bars'):
+            return await STORE.sync_async(SLUG, symbol, download)
+
+    async def load_name():
+        cached_name = names.lookup(SLUG, symbol)
+        if cached_name is not None:
+            return cached_name
+        with timer.phase('name'):
+            url, params = _reference_request(symbol, api_key)
+            name = _parse_name(await aio.get_json(url, params=params, timeout=10, provider=SLUG))
+        if name is not None:
+            names.remember(SLUG, symbol, name)
+        return name
+
+    bars, company_name = await asyncio.gather(load_bars(), load_name(), return_exceptions=True)
+    if isinstance(bars, BaseException):
+        raise bars
+    if not isinstance(company_name, str):
+        company_name = symbol
+
+    with timer.phase('compute'):
+        result = _build_result(ticker, bars, company_name)
+    if log.sampled():
+        logger.info('✅ Massive: %s = $%s (%s)', ticker, result['price'], timer.summary())
     return result
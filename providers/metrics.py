@@ -0,0 +1,297 @@
+"""
+providers/metrics.py
+====================
+In-process instrumentation for the hot path, exposed in the Prometheus text
+format on GET /metrics (both app.py and asgi.py).
+
+  stock_http_request_duration_seconds{route,status}        histogram   API requests, by route template
+  stock_http_requests_in_flight                              gauge
+  stock_upstream_phase_duration_seconds{provider,phase}    histogram   quota / connect / transfer / backoff / parse
+  stock_upstream_requests_total{provider,outcome}           counter
+  stock_upstream_requests_in_flight{provider}               gauge
+  stock_provider_fetch_duration_seconds{provider,outcome}  histogram   a whole uncached provider fetch
+  stock_provider_phase_duration_seconds{provider,phase}    histogram   the provider's own phases
+                                                                         (bars, name, quote, compute)
+  stock_cache_lookups_total{provider,result}                counter     fresh / stale / miss
+  stock_cache_hit_ratio{provider}                           gauge       (fresh + stale) / lookups
+  stock_errors_total{outcome}                               counter     see providers/errors.py
+
+Upstream phases: `connect` covers DNS resolution, TCP and TLS together and
+is only observed when a new pooled connection is opened (neither urllib3 nor
+httpcore reports name resolution separately); `transfer` is the rest of the
+request, from sending it to the last body byte, connection retries included;
+`backoff` is the wait before retrying a 429/5xx response.
+
+Metrics are plain dicts of label tuples guarded by one lock per metric — an
+observation costs about a microsecond (python -m benchmarks.bench_metrics).
+Values are per process: with several workers, scrape each one or sum them.
+
+Environment overrides:
+  METRICS_ENABLED   set to 0 to turn every observation into a no-op   (default 1)
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+ENABLED = os.environ.get('METRICS_ENABLED', '1') != '0'
+
+# Upper bounds in seconds; +Inf is implied
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_metrics: list = []     # every metric, in exposition order
+_collectors: list = []  # callables returning extra exposition lines at scrape time
+
+
+def _labels(names: tuple, values: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name   = name
+        self.help   = help
+        self.labels = labels
+        self._values: dict = {}   # label values → value
+        self._lock  = threading.Lock()
+        _metrics.append(self)
+
+    def header(self) -> list:
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+
+    def lines(self) -> list:
+        with self._lock:
+            values = list(self._values.items())
+        return [f'{self.name}{_labels(self.labels, key)} {_number(value)}' for key, value in sorted(values)]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """Monotonic count per label set."""
+    kind = 'counter'
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        if not ENABLED:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def items(self) -> list:
+        with self._lock:
+            return list(self._values.items())
+
+
+class Gauge(_Metric):
+    """Current value per label set, e.g. requests in flight."""
+    kind = 'gauge'
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        if not ENABLED:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels) -> None:
+        self.inc(*labels, amount=-1)
+
+    @contextmanager
+    def track(self, *labels):
+        """Count the enclosed block as in flight."""
+        self.inc(*labels)
+        try:
+            yield
+        finally:
+            self.dec(*labels)
+
+
+class Histogram(_Metric):
+    """Observations bucketed by upper bound, with their count and sum."""
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels) -> None:
+        if not ENABLED:
+            return
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        """Observe the wall-clock duration of the enclosed block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def lines(self) -> list:
+        with self._lock:
+            values = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        lines = []
+        for key, counts, total in sorted(values):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float('inf') else f'le="{_number(bound)}"'
+                lines.append(f'{self.name}_bucket{_labels(self.labels, key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labels, key)} {_number(total)}')
+            lines.append(f'{self.name}_count{_labels(self.labels, key)} {cumulative}')
+        return lines
+
+
+# ── Metrics ───────────────────────────────────────────────────────────────────
+
+HTTP_REQUESTS = Histogram(
+    'stock_http_request_duration_seconds', 'API request latency by route template and status.',
+    ('route', 'status'))
+HTTP_IN_FLIGHT = Gauge(
+    'stock_http_requests_in_flight', 'API requests being handled.')
+UPSTREAM_PHASES = Histogram(
+    'stock_upstream_phase_duration_seconds', 'Upstream HTTP call phases: quota wait, connect, transfer, retry backoff, parse.',
+    ('provider', 'phase'))
+UPSTREAM_REQUESTS = Counter(
+    'stock_upstream_requests_total', 'Upstream HTTP calls by outcome.', ('provider', 'outcome'))
+UPSTREAM_IN_FLIGHT = Gauge(
+    'stock_upstream_requests_in_flight', 'Upstream HTTP calls in progress.', ('provider',))
+PROVIDER_FETCHES = Histogram(
+    'stock_provider_fetch_duration_seconds', 'Uncached provider fetches (cache misses and refreshes).',
+    ('provider', 'outcome'))
+PROVIDER_PHASES = Histogram(
+    'stock_provider_phase_duration_seconds', 'Phases of a provider fetch (bars, name, quote, compute).',
+    ('provider', 'phase'))
+CACHE_LOOKUPS = Counter(
+    'stock_cache_lookups_total', 'Response cache lookups by result.', ('provider', 'result'))
+ERRORS = Counter(
+    'stock_errors_total', 'Errors reported to clients, by outcome (see providers/errors.py).', ('outcome',))
+
+
+def _cache_hit_ratios() -> list:
+    lookups: dict = {}
+    for (provider, result), count in CACHE_LOOKUPS.items():
+        hits, total = lookups.get(provider, (0, 0))
+        lookups[provider] = (hits + (count if result != 'miss' else 0), total + count)
+    name = 'stock_cache_hit_ratio'
+    lines = [f'# HELP {name} Response cache (fresh + stale) hits per lookup.', f'# TYPE {name} gauge']
+    for provider, (hits, total) in sorted(lookups.items()):
+        lines.append(f'{name}{_labels(("provider",), (provider,))} {_number(round(hits / total, 4))}')
+    return lines
+
+
+def register_collector(collect) -> None:
+    """Add a callable returning extra exposition lines (HELP/TYPE included) at scrape time."""
+    _collectors.append(collect)
+
+
+register_collector(_cache_hit_ratios)
+
+
+# ── Upstream calls ────────────────────────────────────────────────────────────
+
+_current: ContextVar = ContextVar('upstream_call', default=None)   # per thread / asyncio task
+
+
+class UpstreamCall:
+    """
+    Instrumentation of one upstream HTTP call, used as a context manager around
+    it: counts it in flight, times its phases and records the outcome on exit.
+    `outcome` maps the raised exception, if any, to a label.
+    """
+
+    __slots__ = ('provider', 'outcome', 'phases', '_token')
+
+    def __init__(self, provider: str, outcome):
+        self.provider = provider
+        self.outcome  = outcome
+        self.phases: dict = {}
+
+    def __enter__(self):
+        UPSTREAM_IN_FLIGHT.inc(self.provider)
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        UPSTREAM_IN_FLIGHT.dec(self.provider)
+        UPSTREAM_REQUESTS.inc(self.provider, 'ok' if exc is None else self.outcome(exc))
+        connect = self.phases.get('connect')
+        if connect is not None and 'transfer' in self.phases:
+            self.phases['transfer'] -= connect   # connecting happened inside the transfer
+        for phase, seconds in self.phases.items():
+            UPSTREAM_PHASES.observe(seconds, self.provider, phase)
+        return False
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+
+@contextmanager
+def connecting():
+    """Time a new connection as the `connect` phase of the current upstream call, if any."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        call = _current.get()
+        if call is not None:
+            call.add('connect', time.perf_counter() - start)
+
+
+# ── Exposition ────────────────────────────────────────────────────────────────
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def exposition() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _metrics:
+        lines += metric.header()
+        lines += metric.lines()
+    for collect in _collectors:
+        lines += collect()
+    return '\n'.join(lines) + '\n'
+
+
+def reset() -> None:
+    """Clear every metric (used by benchmarks)."""
+    for metric in _metrics:
+        metric.clear()
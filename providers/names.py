@@ -0,0 +1,47 @@
+"""
+providers/names.py
+==================
+Long-lived company-name cache.
+
+Alpha Vantage (OVERVIEW) and Massive (/v3/reference/tickers) need a second
+upstream call just to learn a company's name, which practically never
+changes. Names are kept in memory and persisted in the history store, and
+are only refetched once they are older than NAME_TTL_DAYS.
+
+Environment overrides:
+  NAME_TTL_DAYS   days a cached company name stays valid   (default 7)
+"""
+
+import os
+import threading
+import time
+
+from .history_store import STORE
+
+NAME_TTL = float(os.environ.get('NAME_TTL_DAYS', 7)) * 86400
+
+_memory: dict = {}   # (provider, SYMBOL) → (name, fetched_at)
+_lock = threading.Lock()
+
+
+def lookup(provider: str, symbol: str) -> str | None:
+    """Cached company name if it is younger than NAME_TTL, else None."""
+    key = (provider, symbol.upper())
+    with _lock:
+        entry = _memory.get(key)
+    if entry is None:
+        entry = STORE.get_name(provider, symbol)
+        if entry is None:
+            return None
+        with _lock:
+            _memory[key] = entry
+    name, fetched_at = entry
+    return name if time.time() - fetched_at < NAME_TTL else None
+
+
+def remember(provider: str, symbol: str, name: str) -> None:
+    """Cache a freshly fetched company name in memory and on disk."""
+    entry = (name, time.time())
+    with _lock:
+        _memory[(provider, symbol.upper())] = entry
+    STORE.put_name(provider, symbol, *entry)
@@ -0,0 +1,214 @@
+"""
+providers/prefetch.py
+=====================
+Background warm-up of a configured watchlist, so the first request for a
+watched symbol is served from the response cache instead of paying a cold
+upstream fetch.
+
+The watchlist is set per provider:
+
+  PREFETCH_YAHOO_FINANCE=AAPL,MSFT,GOOGL
+  PREFETCH_FMP=AAPL,NVDA
+
+Each provider's symbols are refreshed once per cycle. The cycle is the
+provider's cache TTL, stretched when needed so that the prefetcher alone
+never uses more than PREFETCH_QUOTA_SHARE of the provider's daily quota or
+per-minute rate limit (see providers/quota.py). Symbols are spread evenly
+across the cycle rather than refreshed in a burst. Every refresh calls the
+raw provider fetch and stores the result in the shared response CACHE (and,
+through the provider, in the history store) — the same places the request
+path reads from. Every worker process runs its own prefetcher; with a shared
+cache tier (CACHE_SHARED=1) a worker skips a symbol another worker refreshed
+in the last half cycle, so the watchlist is not fetched once per worker.
+
+start() launches one scheduler thread per process; app.py calls it on each
+request (a no-op once started) and asgi.py on lifespan startup, so it always
+runs in the worker serving requests — never only in a pre-fork master. A
+forked child forgets a prefetcher inherited from its parent, whose thread
+did not come along, and starts its own. /health reports each provider's cycle, the scheduling
+lag and the duration of the last complete cycle.
+
+Environment overrides:
+  PREFETCH_<SLUG>          comma-separated watchlist for one provider
+  PREFETCH_QUOTA_SHARE     share of a provider's limits prefetching may use  (default 0.5)
+  PREFETCH_WORKERS         threads running refreshes                         (default 4)
+"""
+
+import heapq
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import REGISTRY, log, quota
+from .batch import parse_tickers
+from .cache import CACHE, ttl_for
+
+QUOTA_SHARE = float(os.environ.get('PREFETCH_QUOTA_SHARE', 0.5))
+WORKERS     = int(os.environ.get('PREFETCH_WORKERS', 4))
+
+logger = log.get('prefetch')
+
+# Upstream calls one warm refresh costs (company names are cached separately)
+CALLS_PER_FETCH = {
+    'alpha-vantage': 1,
+    'yahoo-finance': 1,
+    'fmp':           2,   # quote + history
+    'massive':       1,
+}
+
+
+def watchlist() -> dict:
+    """Configured watchlist: provider slug → list of tickers (providers without one are left out)."""
+    lists = {}
+    if not any(key.startswith('PREFETCH_') for key in os.environ):
+        return lists   # spares a boot without a watchlist the registry's entry point lookup
+    for slug in REGISTRY:
+        tickers = parse_tickers(os.environ.get('PREFETCH_' + slug.upper().replace('-', '_'), ''))
+        if tickers:
+            lists[slug] = tickers
+    return lists
+
+
+def cycle_seconds(slug: str, tickers: int) -> float:
+    """Seconds per refresh cycle: the cache TTL, stretched to fit QUOTA_SHARE of the provider's limits."""
+    calls = tickers * CALLS_PER_FETCH.get(slug, 1)
+    per_minute, per_day = quota.limits_for(slug)
+    cycle = ttl_for(slug)
+    if per_day:
+        cycle = max(cycle, 86400 * calls / (per_day * QUOTA_SHARE))
+    if per_minute:
+        cycle = max(cycle, 60 * calls / (per_minute * QUOTA_SHARE))
+    return cycle
+
+
+class _Plan:
+    """Refresh schedule and counters for one provider."""
+
+    def __init__(self, slug: str, tickers: list):
+        self.slug          = slug
+        self.tickers       = tickers
+        self.cycle         = cycle_seconds(slug, len(tickers))
+        self.spacing       = self.cycle / len(tickers)
+        self.refreshes     = 0
+        self.errors        = 0
+        self.last_error    = None
+        self.lag           = 0.0    # seconds the latest refresh started after its due time
+        self.max_lag       = 0.0
+        self.cycle_started = None   # monotonic start of the cycle in progress
+        self.last_cycle    = None   # seconds the last complete cycle took
+
+    def stats(self) -> dict:
+        return {
+            'tickers':          self.tickers,
+            'cycleSeconds':     round(self.cycle, 1),
+            'spacingSeconds':   round(self.spacing, 1),
+            'refreshes':        self.refreshes,
+            'errors':           self.errors,
+            'lastError':        self.last_error,
+            'lagMs':            round(self.lag * 1000, 1),
+            'maxLagMs':         round(self.max_lag * 1000, 1),
+            'lastCycleSeconds': round(self.last_cycle, 2) if self.last_cycle is not None else None,
+        }
+
+
+class Prefetcher:
+    """Refreshes each watched (provider, ticker) once per cycle, spread across the cycle."""
+
+    def __init__(self, lists: dict, workers: int = WORKERS):
+        self.plans = {slug: _Plan(slug, tickers) for slug, tickers in lists.items()}
+        self._schedule: list = []   # heap of (due, slug, index into plan.tickers)
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='prefetch')
+        self._thread = None
+
+    def start(self) -> None:
+        """Start the scheduler thread (idempotent); the first cycle begins immediately."""
+        with self._lock:
+            if self._thread is not None or not self.plans:
+                return
+            now = time.monotonic()
+            for plan in self.plans.values():
+                for index in range(len(plan.tickers)):
+                    heapq.heappush(self._schedule, (now + index * plan.spacing, plan.slug, index))
+            self._thread = threading.Thread(target=self._run, name='prefetch-scheduler', daemon=True)
+            self._thread.start()
+        for plan in self.plans.values():
+            logger.info('🔁 Prefetch: %s %d tickers every %.0fs', plan.slug, len(plan.tickers), plan.cycle)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {slug: plan.stats() for slug, plan in self.plans.items()}
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                due, slug, index = self._schedule[0]
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+                continue
+            with self._lock:
+                heapq.heappop(self._schedule)
+                plan = self.plans[slug]
+                # Keep the cadence; after falling behind, don't fire a burst to catch up
+                heapq.heappush(self._schedule, (max(due + plan.cycle, time.monotonic()), slug, index))
+            try:
+                self._pool.submit(self._refresh, plan, index, due)
+            except RuntimeError:
+                return   # interpreter shutting down
+
+    def _refresh(self, plan: _Plan, index: int, due: float) -> None:
+        ticker = plan.tickers[index]
+        started = time.monotonic()
+        with self._lock:
+            plan.lag = started - due
+            plan.max_lag = max(plan.max_lag, plan.lag)
+            if index == 0:
+                plan.cycle_started = started
+        try:
+            CACHE.refresh(plan.slug, ticker, REGISTRY[plan.slug].__wrapped__, min_age=plan.cycle / 2)
+            error = None
+        except Exception as e:
+            error = f'{ticker}: {e}'
+            logger.warning('⚠️ Prefetch: %s %s', plan.slug, error)
+        with self._lock:
+            if error is None:
+                plan.refreshes += 1
+            else:
+                plan.errors += 1
+                plan.last_error = error
+            if index == len(plan.tickers) - 1 and plan.cycle_started is not None:
+                plan.last_cycle = time.monotonic() - plan.cycle_started
+
+
+_prefetcher = None
+_start_lock = threading.Lock()
+
+
+def start() -> None:
+    """
+    Start warming the configured watchlist (no-op when none is configured).
+    The watchlist is read here, after the app has loaded its .env file.
+    """
+    global _prefetcher
+    if _prefetcher is not None:
+        return
+    with _start_lock:
+        if _prefetcher is None:
+            _prefetcher = Prefetcher(watchlist())
+            _prefetcher.start()
+
+
+def _forget() -> None:
+    """In a forked child: drop the parent's prefetcher, whose thread did not survive the fork."""
+    global _prefetcher, _start_lock
+    _prefetcher, _start_lock = None, threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget)
+
+
+def stats() -> dict:
+    """Per-provider prefetch schedule and counters, for the /health endpoint."""
+    return _prefetcher.stats() if _prefetcher is not None else {}
@@ -0,0 +1,171 @@
+"""
+providers/quota.py
+==================
+Client-side rate limiting for the providers' free tiers.
+
+Each upstream call made on behalf of a provider first spends one call from
+that provider's budget. Two limits apply:
+
+  - per minute: a token bucket. A call that finds it empty is queued (sleeps
+    until the next token) for up to QUOTA_MAX_WAIT seconds, then rejected.
+  - per day: a counter that restarts at 00:00 UTC. Once it is used up,
+    calls are rejected straight away instead of being sent upstream only to
+    come back as a "rate limit reached" error.
+
+Rejections raise QuotaExceeded, which the routes report as HTTP 429. The
+bucket and counter live in the history store's SQLite file, so they survive
+restarts and are shared by every worker process. Calls are counted by the
+HTTP helpers: pass provider=<slug> to http_client.get_json() or
+aio.get_json(). Providers missing from LIMITS are not limited.
+
+Environment overrides:
+  QUOTA_<SLUG>_PER_MINUTE   e.g. QUOTA_ALPHA_VANTAGE_PER_MINUTE=5  (0 = unlimited)
+  QUOTA_<SLUG>_PER_DAY      e.g. QUOTA_FMP_PER_DAY=750             (0 = unlimited)
+  QUOTA_MAX_WAIT            seconds a call may queue for a token   (default 20)
+"""
+
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from .history_store import STORE
+
+# Documented free-tier limits per provider slug: (calls per minute, calls per day)
+LIMITS = {
+    'alpha-vantage': (5,    25),
+    'fmp':           (None, 250),
+    'massive':       (5,    None),
+}
+
+MAX_WAIT = float(os.environ.get('QUOTA_MAX_WAIT', 20))
+
+_NAMES = {
+    'alpha-vantage': 'Alpha Vantage',
+    'fmp':           'FMP',
+    'massive':       'Massive',
+}
+
+_counters: dict = {}   # slug → {'granted', 'queued', 'rejected'}
+_lock = threading.Lock()
+
+
+class QuotaExceeded(Exception):
+    """An upstream call was refused locally because the provider's budget is spent."""
+
+    def __init__(self, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def limits_for(slug: str) -> tuple:
+    """(per_minute, per_day) for a provider slug; None means unlimited (env override wins)."""
+    per_minute, per_day = LIMITS.get(slug, (None, None))
+    prefix = 'QUOTA_' + slug.upper().replace('-', '_')
+    per_minute = int(os.environ.get(prefix + '_PER_MINUTE', per_minute or 0)) or None
+    per_day    = int(os.environ.get(prefix + '_PER_DAY', per_day or 0)) or None
+    return per_minute, per_day
+
+
+def _today() -> str:
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d')
+
+
+def _count(slug: str, name: str) -> None:
+    with _lock:
+        counters = _counters.setdefault(slug, {'granted': 0, 'queued': 0, 'rejected': 0})
+        counters[name] += 1
+
+
+def _take(slug: str, limits: tuple, waited: float) -> float:
+    """
+    Try to spend one call. Returns 0 when granted, else the seconds to sleep
+    before trying again. Raises QuotaExceeded when the call must be rejected.
+    """
+    per_minute, per_day = limits
+    wait, _ = STORE.take_quota(slug, _today(), per_minute, per_day, time.time())
+    if wait == 0:
+        _count(slug, 'granted')
+        return 0
+
+    name = _NAMES.get(slug, slug)
+    if wait is None:
+        _count(slug, 'rejected')
+        raise QuotaExceeded(
+            f'{name} daily quota reached ({per_day} calls/day); it resets at 00:00 UTC. '
+            f'Please try again later or switch to another provider.'
+        )
+    if waited + wait > MAX_WAIT:
+        _count(slug, 'rejected')
+        raise QuotaExceeded(
+            f'{name} rate limit reached ({per_minute} calls/minute). Please try again shortly.',
+            retry_after=wait,
+        )
+    if waited == 0:
+        _count(slug, 'queued')
+    return wait
+
+
+def acquire(slug: str) -> None:
+    """Block until `slug` may make one upstream call; raise QuotaExceeded if it may not."""
+    limits = limits_for(slug)
+    if limits == (None, None):
+        return
+    waited = 0.0
+    while True:
+        wait = _take(slug, limits, waited)
+        if wait == 0:
+            return
+        time.sleep(wait)
+        waited += wait
+
+
+async def acquire_async(slug: str) -> None:
+    """Async counterpart of acquire(); queues with asyncio.sleep instead of blocking."""
+    limits = limits_for(slug)
+    if limits == (None, None):
+        return
+    waited = 0.0
+    while True:
+        wait = await asyncio.to_thread(_take, slug, limits, waited)
+        if wait == 0:
+            return
+        await asyncio.sleep(wait)
+        waited += wait
+
+
+def remaining_today(slug: str) -> int | None:
+    """Calls left in today's quota for a provider, or None when it has no daily cap."""
+    _, per_day = limits_for(slug)
+    if per_day is None:
+        return None
+    state = STORE.quota_state(slug)
+    used = state[1] if state is not None and state[0] == _today() else 0
+    return max(per_day - used, 0)
+
+
+def stats() -> dict:
+    """Remaining budget and counters per limited provider, for the /health endpoint."""
+    today = _today()
+    now = time.time()
+    report = {}
+    for slug in LIMITS:
+        per_minute, per_day = limits_for(slug)
+        state = STORE.quota_state(slug)
+        used = state[1] if state is not None and state[0] == today else 0
+        if per_minute and state is not None:
+            tokens = min(float(per_minute), state[2] + (now - state[3]) * per_minute / 60)
+        else:
+            tokens = per_minute
+        with _lock:
+            counters = dict(_counters.get(slug, {'granted': 0, 'queued': 0, 'rejected': 0}))
+        report[slug] = {
+            'perMinute':           per_minute,
+            'perDay':              per_day,
+            'usedToday':           used,
+            'remainingToday':      max(per_day - used, 0) if per_day else None,
+            'remainingThisMinute': int(tokens) if tokens is not None else None,
+            **counters,
+        }
+    return report
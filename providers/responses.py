@@ -0,0 +1,182 @@
+"""
+providers/responses.py
+======================
+JSON response bodies shared by app.py and asgi.py: fast serialization,
+ETags derived from provider results, and gzip / brotli compression.
+
+Serialization uses orjson, several times faster than the standard library
+encoder. Provider results are cached and handed out as the same dict object
+until they change (see providers/cache.py), so each result is serialized
+once: its bytes and an ETag (a digest of those bytes) are memoized by object
+identity. A request whose If-None-Match already names that ETag gets a 304
+without the result being serialized again; otherwise the memoized bytes are
+sent. Payloads built from several results (horizons, batches) get a tag
+combined from their parts' tags.
+
+Bodies of at least RESPONSE_COMPRESS_MIN_BYTES are compressed with brotli or
+gzip when the client's Accept-Encoding allows it (brotli preferred).
+
+Environment overrides:
+  RESPONSE_COMPRESS_MIN_BYTES   smallest body worth compressing   (default 1024)
+  RESPONSE_GZIP_LEVEL           gzip level 1-9                    (default 6)
+  RESPONSE_BROTLI_QUALITY       brotli quality 0-11               (default 5)
+  RESPONSE_MEMO_ENTRIES         memoized result bodies            (default 1024)
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+import brotli
+import orjson
+
+COMPRESS_MIN_BYTES = int(os.environ.get('RESPONSE_COMPRESS_MIN_BYTES', 1024))
+GZIP_LEVEL         = int(os.environ.get('RESPONSE_GZIP_LEVEL', 6))
+BROTLI_QUALITY     = int(os.environ.get('RESPONSE_BROTLI_QUALITY', 5))
+MEMO_ENTRIES       = int(os.environ.get('RESPONSE_MEMO_ENTRIES', 1024))
+
+# Supported Content-Encodings, most preferred first
+ENCODINGS = ('br', 'gzip')
+
+_memo: OrderedDict = OrderedDict()   # id(result) → (result, body, etag)
+_lock = threading.Lock()
+_counters = {
+    'responses':      0,
+    'notModified':    0,
+    'compressed':     0,
+    'bytesJson':      0,   # serialized size of the bodies sent
+    'bytesSent':      0,   # after compression
+}
+
+
+class Tagged(NamedTuple):
+    """A payload with its ETag, as returned by asgi.py's route handlers."""
+    payload: object
+    etag:    str
+
+
+# ── Serialization and ETags ───────────────────────────────────────────────────
+
+def dumps(payload) -> bytes:
+    """Serialize a payload to JSON bytes."""
+    return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=12).hexdigest()
+
+
+def _memoized(result: dict) -> tuple:
+    """(result, body, etag) for a provider result, serializing it on first sight only."""
+    key = id(result)
+    with _lock:
+        entry = _memo.get(key)
+        if entry is not None and entry[0] is result:
+            _memo.move_to_end(key)
+            return entry
+    body = dumps(result)
+    entry = (result, body, _digest(body))
+    with _lock:
+        _memo[key] = entry
+        while len(_memo) > MEMO_ENTRIES:
+            _memo.popitem(last=False)
+    return entry
+
+
+def etag(result: dict, *variant) -> str:
+    """
+    ETag of a provider result, optionally combined with whatever else shapes
+    the response built from it (e.g. the parsed horizons).
+    """
+    tag = _memoized(result)[2]
+    if any(part is not None for part in variant):
+        tag = combine(tag, *variant)
+    return tag
+
+
+def combine(*parts) -> str:
+    """One ETag for a response built from several tags and parameters."""
+    return _digest(repr(parts).encode())
+
+
+def body(payload) -> bytes:
+    """JSON bytes for a payload, reusing the memoized bytes of a provider result."""
+    with _lock:
+        entry = _memo.get(id(payload))
+        if entry is not None and entry[0] is payload:
+            return entry[1]
+    return dumps(payload)
+
+
+def matches(if_none_match: str | None, tag: str) -> bool:
+    """True if an If-None-Match header value names `tag` (or is '*')."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == '*' or candidate.strip('"') == tag:
+            return True
+    return False
+
+
+# ── Compression ───────────────────────────────────────────────────────────────
+
+def negotiate(accept_encoding: str | None) -> str | None:
+    """The preferred supported encoding allowed by an Accept-Encoding header, or None."""
+    if not accept_encoding:
+        return None
+    allowed = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        allowed[name.strip().lower()] = quality
+    for encoding in ENCODINGS:
+        if allowed.get(encoding, allowed.get('*', 0)) > 0:
+            return encoding
+    return None
+
+
+def encode(data: bytes, accept_encoding: str | None) -> tuple:
+    """
+    Compress a body if it is large enough and the client accepts it.
+    Returns (bytes to send, Content-Encoding or None), and counts both sizes.
+    """
+    encoding = negotiate(accept_encoding) if len(data) >= COMPRESS_MIN_BYTES else None
+    if encoding == 'br':
+        sent = brotli.compress(data, quality=BROTLI_QUALITY)
+    elif encoding == 'gzip':
+        sent = gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    else:
+        sent = data
+    with _lock:
+        _counters['responses'] += 1
+        _counters['compressed'] += encoding is not None
+        _counters['bytesJson'] += len(data)
+        _counters['bytesSent'] += len(sent)
+    return sent, encoding
+
+
+def not_modified() -> None:
+    """Count a 304 answered from an ETag."""
+    with _lock:
+        _counters['notModified'] += 1
+
+
+def stats() -> dict:
+    """Response counters, for the /health endpoint."""
+    with _lock:
+        stats = dict(_counters)
+        stats['memoized'] = len(_memo)
+    stats['compressionRatio'] = round(stats['bytesSent'] / stats['bytesJson'], 4) if stats['bytesJson'] else 1.0
+    return stats
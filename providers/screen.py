@@ -0,0 +1,258 @@
+"""
+providers/screen.py
+===================
+Cross-sectional screener over many tickers:
+
+  GET /api/<provider>/screen?tickers=AAPL,MSFT,...&lookbacks=90&where=changePercent30Days>5&sort=-rank30Days&limit=20
+
+The tickers are fetched like the batch endpoint (see providers/batch.py), so
+fresh cache entries cost nothing, and their daily bars come from the history
+store the fetch keeps up to date (see providers/history.py) — no extra
+upstream call. Instead of computing each symbol's comparisons one at a time,
+the screen lines every symbol's recent closes up on one shared calendar of
+trading days and computes all fields for all symbols as whole-column array
+operations:
+
+  price                   the result's current price
+  price<N>DaysAgo         close N trading days before the latest day
+  change<N>Days           current price minus that close
+  changePercent<N>Days    the same in percent
+  rank<N>Days             1 for the best changePercent<N>Days, 2 for the next, ...
+
+for N in 5, 30 and any `lookbacks`. A symbol with no bar on a calendar day
+(a halt, a late listing) takes its last earlier close; one with no close
+that far back gets null for that horizon. For symbols that trade every day
+the values match the single-ticker fields of the same name.
+
+  where    comma-separated conditions, all of which must hold, e.g.
+           changePercent30Days>5,price<=500 (operators > >= < <= == !=);
+           a null field fails every condition
+  sort     comma-separated fields, '-' for descending; nulls sort last
+  limit    rows returned after filtering and sorting
+
+The response lists the matching rows plus per-ticker errors side by side:
+
+  {"provider": "yahoo-finance", "screened": 500, "matched": 37, "fields": [...],
+   "results": [{"symbol": "AAPL", "name": ..., "price": ..., ...}], "errors": {...}}
+
+The aligned field table is memoized per ticker list and lookbacks until any
+of the underlying results (price, timestamp) changes, so re-screening the
+same universe with other conditions only re-runs the filter and sort.
+
+Environment overrides:
+  SCREEN_MAX_TICKERS      tickers accepted per screen request   (default 500)
+  SCREEN_CACHE_ENTRIES    memoized field tables                 (default 64)
+"""
+
+import operator
+import os
+import re
+
+import numpy as np
+
+from . import horizons
+from .base import LOOKBACK_FIELDS
+from .cache import StampedLRU
+from .history import bars_for, stamp
+
+MAX_TICKERS   = int(os.environ.get('SCREEN_MAX_TICKERS', 500))
+CACHE_ENTRIES = int(os.environ.get('SCREEN_CACHE_ENTRIES', 64))
+MAX_CONDITIONS = 16
+
+OPERATORS = {
+    '>=': operator.ge,
+    '<=': operator.le,
+    '==': operator.eq,
+    '!=': operator.ne,
+    '>':  operator.gt,
+    '<':  operator.lt,
+}
+
+_CONDITION = re.compile(r'^\s*([A-Za-z][A-Za-z0-9]*)\s*(>=|<=|==|!=|>|<)\s*(-?\d+(?:\.\d+)?)\s*$')
+_ROW_SPAN  = np.int64(1 << 32)   # per-symbol offset of a day number in the combined search keys
+
+_tables = StampedLRU(CACHE_ENTRIES)   # (provider, tickers, lookbacks) → table
+
+
+def fields(lookbacks: tuple) -> list:
+    """Names of the numeric fields a screen with these lookbacks computes, in response order."""
+    names = ['price']
+    for n in lookbacks:
+        names += [f'price{n}DaysAgo', f'change{n}Days', f'changePercent{n}Days', f'rank{n}Days']
+    return names
+
+
+# ── Parsing ───────────────────────────────────────────────────────────────────
+
+def parse(args) -> tuple:
+    """
+    Parse the `lookbacks`, `where`, `sort` and `limit` query parameters (a mapping).
+
+    Returns (lookbacks, conditions, sort, limit): the sorted lookbacks always
+    include 5 and 30; conditions are (field, operator symbol, value) triples,
+    sort is a tuple of (field, descending) pairs and limit is None when absent.
+    Raises ValueError for malformed values or unknown fields.
+    """
+    extra = horizons.parse(None, args.get('lookbacks'))
+    lookbacks = tuple(sorted(set(LOOKBACK_FIELDS) | set(extra[1] if extra else ())))
+    known = set(fields(lookbacks))
+
+    conditions = []
+    raw_conditions = [c for c in (args.get('where') or '').split(',') if c.strip()]
+    if len(raw_conditions) > MAX_CONDITIONS:
+        raise ValueError(f'Too many conditions ({len(raw_conditions)}); the limit is {MAX_CONDITIONS}.')
+    for raw in raw_conditions:
+        match = _CONDITION.match(raw)
+        if match is None:
+            raise ValueError(f'Invalid condition "{raw.strip()}"; expected e.g. changePercent30Days>5.')
+        field, op, value = match.groups()
+        _check_field(field, known)
+        conditions.append((field, op, float(value)))
+
+    sort = []
+    for raw in (args.get('sort') or '').split(','):
+        raw = raw.strip()
+        if raw:
+            field = raw.lstrip('-')
+            _check_field(field, known)
+            sort.append((field, raw.startswith('-')))
+
+    limit = args.get('limit')
+    if limit is not None:
+        if not limit.isdigit() or int(limit) < 1:
+            raise ValueError(f'Invalid limit "{limit}"; expected a positive whole number.')
+        limit = int(limit)
+    return lookbacks, tuple(conditions), tuple(sort), limit
+
+
+def _check_field(field: str, known: set) -> None:
+    if field not in known:
+        raise ValueError(f'Unknown field "{field}"; available: {", ".join(sorted(known))}.')
+
+
+# ── Computation ───────────────────────────────────────────────────────────────
+
+def table(provider: str, results: dict, lookbacks: tuple) -> dict:
+    """
+    Field name → float64 column over the symbols of `results` (ticker → result,
+    in request order), plus 'symbol' and 'name' lists; memoized per universe.
+    """
+    tickers = tuple(results)
+    key = (provider, tickers, lookbacks)
+    stamps = tuple(stamp(result) for result in results.values())
+    cached = _tables.get(key, stamps)
+    if cached is not None:
+        return cached
+
+    prices = np.array([result['price'] for result in results.values()], dtype=np.float64)
+    closes = aligned_closes([bars_for(provider, result) for result in results.values()], lookbacks)
+
+    columns = {
+        'symbol': [result['symbol'] for result in results.values()],
+        'name':   [result.get('name') for result in results.values()],
+        'price':  prices,
+    }
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ago      = np.round(closes, 2)
+        changes  = prices[:, None] - ago
+        percents = np.where(ago != 0, changes / ago * 100, 0.0)
+    for j, n in enumerate(lookbacks):
+        columns[f'price{n}DaysAgo']      = ago[:, j]
+        columns[f'change{n}Days']        = np.round(changes[:, j], 2)
+        columns[f'changePercent{n}Days'] = np.round(percents[:, j], 2)
+        columns[f'rank{n}Days']          = _ranks(columns[f'changePercent{n}Days'])
+
+    _tables.put(key, stamps, columns)
+    return columns
+
+
+def aligned_closes(bars_list: list, lookbacks: tuple) -> np.ndarray:
+    """
+    (symbols × lookbacks) closes N trading days before the latest day of the
+    symbols' shared calendar, NaN where a symbol's history is too short.
+
+    Every symbol contributes its last max(lookbacks)+1 bars; the calendar is
+    the union of their days. One searchsorted over all symbols' bars — each
+    day number offset by its symbol's row, so rows never mix — finds, for
+    every symbol and horizon at once, the last bar on or before the horizon's
+    calendar day.
+    """
+    count = len(bars_list)
+    width = max(lookbacks) + 1
+    lengths = np.array([min(len(bars), width) for bars in bars_list], dtype=np.int64)
+    if not lengths.any():
+        return np.full((count, len(lookbacks)), np.nan)
+
+    days   = np.concatenate([bars.days[len(bars) - n:] for bars, n in zip(bars_list, lengths.tolist())])
+    closes = np.concatenate([bars.close[len(bars) - n:] for bars, n in zip(bars_list, lengths.tolist())])
+    days   = days.astype(np.int64)
+    rows   = np.repeat(np.arange(count, dtype=np.int64), lengths)
+
+    # Union of the days: an occupancy mask over their span is linear, where np.unique sorts
+    first = days.min()
+    occupied = np.zeros(days.max() - first + 1, dtype=bool)
+    occupied[days - first] = True
+    calendar = np.flatnonzero(occupied) + first
+    offsets = len(calendar) - 1 - np.asarray(lookbacks, dtype=np.int64)
+    targets = calendar[np.maximum(offsets, 0)]
+
+    keys   = rows * _ROW_SPAN + days                       # ascending: rows in order, each tail oldest first
+    wanted = np.arange(count, dtype=np.int64)[:, None] * _ROW_SPAN + targets[None, :]
+    found  = np.searchsorted(keys, wanted, side='right') - 1
+    found_c = np.maximum(found, 0)
+    valid = (found >= 0) & (rows[found_c] == np.arange(count)[:, None]) & (offsets >= 0)[None, :]
+    return np.where(valid, closes[found_c], np.nan)
+
+
+def _ranks(values: np.ndarray) -> np.ndarray:
+    """1-based rank by descending value (ties in request order); NaN stays NaN."""
+    order = np.argsort(-values, kind='stable')   # NaN sorts last
+    ranks = np.empty(len(values))
+    ranks[order] = np.arange(1, len(values) + 1)
+    return np.where(np.isnan(values), np.nan, ranks)
+
+
+# ── Selection ─────────────────────────────────────────────────────────────────
+
+def screen(provider: str, results: dict, params: tuple) -> dict:
+    """The screen payload: rows of `results` that pass the conditions, sorted and limited."""
+    lookbacks, conditions, sort, limit = params
+    columns = table(provider, results, lookbacks)
+    names = fields(lookbacks)
+
+    keep = np.ones(len(results), dtype=bool)
+    with np.errstate(invalid='ignore'):
+        for field, op, value in conditions:
+            column = columns[field]
+            keep &= OPERATORS[op](column, value) & ~np.isnan(column)   # NaN != x is True; null fails every condition
+    selected = np.flatnonzero(keep)
+
+    if sort:
+        # lexsort takes its primary key last; nulls go last in either direction
+        keys = [np.nan_to_num(-columns[f] if desc else columns[f], nan=np.inf)[selected] for f, desc in sort]
+        selected = selected[np.lexsort(keys[::-1])]
+    if limit is not None:
+        selected = selected[:limit]
+
+    lists = {name: _column(columns[name][selected], integer=name.startswith('rank')) for name in names}
+    symbols, company = columns['symbol'], columns['name']
+    rows = []
+    for k, i in enumerate(selected.tolist()):
+        row = {'symbol': symbols[i], 'name': company[i]}
+        for name in names:
+            row[name] = lists[name][k]
+        rows.append(row)
+
+    return {
+        'provider': provider,
+        'screened': len(results),
+        'matched':  int(keep.sum()),
+        'fields':   names,
+        'results':  rows,
+    }
+
+
+def _column(values: np.ndarray, integer: bool = False) -> list:
+    """Float column as a list, with None (JSON null) for missing values."""
+    convert = int if integer else float
+    return [None if v != v else convert(v) for v in values.tolist()]
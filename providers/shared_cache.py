@@ -0,0 +1,246 @@
+"""
+providers/shared_cache.py
+=========================
+Node-wide tier of the response cache, for running several worker processes.
+
+Under gunicorn every worker has its own ResponseCache (see providers/cache.py),
+so N workers fetch the same ticker upstream up to N times per TTL — and spend
+N times the provider quota doing it. With CACHE_SHARED=1 each worker keeps its
+in-process cache but backs it with a store that every worker on the node
+reads and writes:
+
+  - a worker whose own copy is missing or expired first adopts a newer result
+    another worker has stored;
+  - before going upstream, a worker claims the key's refresh lease. Only the
+    lease owner fetches; the others poll the store until its result appears,
+    or until the lease lapses (CACHE_LEASE_SECONDS) and one of them takes over.
+
+Bar history needs no extra tier: it already lives in the history store's
+SQLite file, which every worker shares (see providers/history_store.py).
+
+A backend implements get / put / claim / release / prune with unix times, so
+that every process agrees on ages. SQLiteBackend keeps the store in its own
+WAL-mode SQLite file and needs no server; a network store such as Redis (a
+lease is SET NX PX) would fit the same five methods to share across nodes.
+
+Environment overrides:
+  CACHE_SHARED          1 to share results between worker processes   (default 0)
+  CACHE_SHARED_DB       path of the shared tier's SQLite file   (default data/cache.sqlite3)
+  CACHE_LEASE_SECONDS   longest a worker may hold a refresh lease   (default 30)
+"""
+
+import asyncio
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+import orjson
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            'data', 'cache.sqlite3')
+
+ENABLED       = os.environ.get('CACHE_SHARED', '0') == '1'
+PATH          = os.environ.get('CACHE_SHARED_DB', DEFAULT_PATH)
+LEASE_SECONDS = float(os.environ.get('CACHE_LEASE_SECONDS', 30))
+POLL_SECONDS  = 0.05        # how often a worker waiting on another's lease re-reads the store
+RETENTION     = 24 * 3600   # stored results older than this are pruned
+PRUNE_EVERY   = 500         # writes between prunes
+
+_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS results (
+        key       TEXT PRIMARY KEY,   -- <slug>:<TICKER>
+        result    BLOB NOT NULL,      -- JSON
+        stored_at REAL NOT NULL       -- unix time
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS leases (
+        key     TEXT PRIMARY KEY,
+        owner   TEXT NOT NULL,        -- <host>:<pid>:<thread>
+        expires REAL NOT NULL         -- unix time
+    ) WITHOUT ROWID
+    """,
+]
+
+
+def _key(slug: str, ticker: str) -> str:
+    return f'{slug}:{ticker.upper()}'
+
+
+def _owner() -> str:
+    """This thread of this process, as a lease owner (computed per call: workers are forked)."""
+    return f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+
+
+class SQLiteBackend:
+    """Shared results and refresh leases in a SQLite file; one connection per thread and process."""
+
+    name = 'sqlite'
+
+    def __init__(self, path: str = PATH):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._conn() as conn:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+
+    def _conn(self) -> sqlite3.Connection:
+        # A connection must not cross a fork (gunicorn --preload), so it is keyed by pid too
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key: str, newer_than: float = 0.0) -> tuple | None:
+        """(result, stored_at) if a result stored after `newer_than` exists, else None."""
+        row = self._conn().execute(
+            'SELECT result, stored_at FROM results WHERE key = ? AND stored_at > ?', (key, newer_than),
+        ).fetchone()
+        return (orjson.loads(row[0]), row[1]) if row else None
+
+    def put(self, key: str, result: dict, stored_at: float) -> None:
+        """Store a result unless a newer one is already there."""
+        with self._conn() as conn:
+            conn.execute(
+                'INSERT INTO results (key, result, stored_at) VALUES (?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET result = excluded.result, stored_at = excluded.stored_at '
+                'WHERE excluded.stored_at > results.stored_at',
+                (key, orjson.dumps(result), stored_at),
+            )
+
+    def claim(self, key: str, owner: str, seconds: float) -> bool:
+        """Atomically take the key's lease for `seconds` unless another owner holds it."""
+        now = time.time()
+        with self._conn() as conn:
+            cursor = conn.execute(
+                'INSERT INTO leases (key, owner, expires) VALUES (?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET owner = excluded.owner, expires = excluded.expires '
+                'WHERE leases.expires <= ?',
+                (key, owner, now + seconds, now),
+            )
+        return cursor.rowcount == 1
+
+    def release(self, key: str, owner: str) -> None:
+        with self._conn() as conn:
+            conn.execute('DELETE FROM leases WHERE key = ? AND owner = ?', (key, owner))
+
+    def prune(self, before: float) -> None:
+        """Drop results stored before `before` and leases that have expired."""
+        with self._conn() as conn:
+            conn.execute('DELETE FROM results WHERE stored_at < ?', (before,))
+            conn.execute('DELETE FROM leases WHERE expires < ?', (time.time(),))
+
+    def size(self) -> int:
+        return self._conn().execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+
+class SharedTier:
+    """Results shared between processes, with one refresh per key at a time."""
+
+    def __init__(self, backend, lease_seconds: float = LEASE_SECONDS, poll_seconds: float = POLL_SECONDS):
+        self.backend       = backend
+        self.lease_seconds = lease_seconds
+        self.poll_seconds  = poll_seconds
+        self._lock = threading.Lock()
+        self._counters = {
+            'adopted':    0,   # results another worker fetched
+            'fetched':    0,   # fetches made while holding the lease
+            'leaseWaits': 0,   # fetches that waited on another worker's lease
+            'stored':     0,
+        }
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def get(self, slug: str, ticker: str, newer_than: float) -> tuple | None:
+        """(result, stored_at) another worker stored after `newer_than`, or None."""
+        entry = self.backend.get(_key(slug, ticker), newer_than)
+        if entry is not None:
+            self._count('adopted')
+        return entry
+
+    def store(self, slug: str, ticker: str, result: dict, stored_at: float) -> None:
+        self.backend.put(_key(slug, ticker), result, stored_at)
+        with self._lock:
+            self._counters['stored'] += 1
+            prune = self._counters['stored'] % PRUNE_EVERY == 0
+        if prune:
+            self.backend.prune(time.time() - RETENTION)
+
+    def fetch(self, slug: str, ticker: str, call, fresh_after: float) -> tuple:
+        """
+        (result, stored_at) for a key, with call() run by one process at a time.
+
+        A result stored after `fresh_after` is returned without calling.
+        Otherwise the lease owner calls and stores; other processes wait for
+        its result, taking over if the lease lapses or the owner's call fails.
+        """
+        key, owner = _key(slug, ticker), _owner()
+        waited = False
+        while True:
+            if self.backend.claim(key, owner, self.lease_seconds):
+                try:
+                    entry = self.get(slug, ticker, fresh_after)
+                    if entry is not None:
+                        return entry   # stored just before the lease was released
+                    result = call()
+                    self._count('fetched')
+                    stored_at = time.time()
+                    self.store(slug, ticker, result, stored_at)
+                    return result, stored_at
+                finally:
+                    self.backend.release(key, owner)
+            if not waited:
+                self._count('leaseWaits')
+                waited = True
+            time.sleep(self.poll_seconds)
+            entry = self.get(slug, ticker, fresh_after)
+            if entry is not None:
+                return entry
+
+    async def fetch_async(self, slug: str, ticker: str, call, fresh_after: float) -> tuple:
+        """Async counterpart of fetch() for a coroutine function `call`; store access runs in threads."""
+        key, owner = _key(slug, ticker), _owner()
+        waited = False
+        while True:
+            if await asyncio.to_thread(self.backend.claim, key, owner, self.lease_seconds):
+                try:
+                    entry = await asyncio.to_thread(self.get, slug, ticker, fresh_after)
+                    if entry is not None:
+                        return entry
+                    result = await call()
+                    self._count('fetched')
+                    stored_at = time.time()
+                    await asyncio.to_thread(self.store, slug, ticker, result, stored_at)
+                    return result, stored_at
+                finally:
+                    await asyncio.to_thread(self.backend.release, key, owner)
+            if not waited:
+                self._count('leaseWaits')
+                waited = True
+            await asyncio.sleep(self.poll_seconds)
+            entry = await asyncio.to_thread(self.get, slug, ticker, fresh_after)
+            if entry is not None:
+                return entry
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+        stats['backend'] = self.backend.name
+        stats['size']    = self.backend.size()
+        return stats
+
+
+def from_env() -> SharedTier | None:
+    """The configured shared tier, or None when CACHE_SHARED is off."""
+    return SharedTier(SQLiteBackend(PATH)) if ENABLED else None
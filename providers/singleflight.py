@@ -0,0 +1,117 @@
+"""
+providers/singleflight.py
+=========================
+Request coalescing for concurrent provider fetches.
+
+When several threads ask for the same key at the same time, only the first
+one (the leader) runs the function; the others block until it finishes and
+receive the same result, or the same exception re-raised.
+
+SingleFlight coordinates threads; AsyncSingleFlight does the same for
+coroutines on one event loop.
+"""
+
+import asyncio
+import threading
+
+
+class _Call:
+    """One in-flight call and the outcome shared with every waiter."""
+
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done   = threading.Event()
+        self.result = None
+        self.error  = None
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls that share a key."""
+
+    def __init__(self):
+        self._calls: dict = {}
+        self._lock = threading.Lock()
+        self.leaders = 0      # calls that actually ran the function
+        self.coalesced = 0    # calls that waited on someone else's result
+
+    def do(self, key, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) once per key among concurrent callers."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self) -> int:
+        """Number of keys currently being fetched."""
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> dict:
+        """Counters suitable for the /health endpoint."""
+        with self._lock:
+            return {
+                'leaders':   self.leaders,
+                'coalesced': self.coalesced,
+                'inFlight':  len(self._calls),
+            }
+
+
+class AsyncSingleFlight:
+    """Deduplicates concurrent awaits that share a key (one event loop at a time)."""
+
+    def __init__(self):
+        self._calls: dict = {}   # key → asyncio.Future
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn, *args, **kwargs):
+        """Await fn(*args, **kwargs) once per key among concurrent callers."""
+        future = self._calls.get(key)
+        if future is not None and not future.get_loop().is_closed():
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        self.leaders += 1
+        try:
+            result = await fn(*args, **kwargs)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()   # mark retrieved so an unawaited future doesn't warn
+            raise
+        finally:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    def stats(self) -> dict:
+        """Counters suitable for the /health endpoint."""
+        return {
+            'leaders':   self.leaders,
+            'coalesced': self.coalesced,
+            'inFlight':  len(self._calls),
+        }
@@ -0,0 +1,243 @@
+"""
+providers/stream.py
+===================
+Live price updates for the Server-Sent Events endpoint:
+  GET /api/stream?provider=yahoo-finance&tickers=AAPL,MSFT
+
+Clients subscribe to (provider, ticker) topics on the process-wide HUB. Each
+topic has exactly one polling job, however many clients watch it: a single
+scheduler thread hands due polls to a small worker pool, every poll goes
+through the cached REGISTRY function, and the outcome is fanned out to all
+of the topic's subscribers. Upstream calls therefore scale with the number of
+distinct tickers being watched, not with the number of connected clients.
+
+A topic is polled once per cache TTL. A poll that finds the cached result
+still fresh (another client or the prefetcher just fetched it) uses it;
+otherwise it refreshes the entry before returning (stale_ok=False, see
+providers/cache.py) rather than through stale-while-revalidate, which would
+hand back the expired result and deliver the new one only a poll later. The
+refresh shares the cache's single flight, so a poll and a request missing on
+the same key make one upstream call.
+
+A new subscriber first receives the topic's latest full result (if any);
+after that, only the fields that changed since the previous poll are sent.
+A topic's polling stops when its last subscriber leaves.
+
+Events handed to subscribers are (event name, payload dict) pairs:
+  ('quote', {'provider', 'symbol', 'full': bool, 'fields': {...}})
+  ('error', {'provider', 'symbol', 'error', 'status'})
+
+Environment overrides:
+  STREAM_POLL_SECONDS   seconds between polls of one topic   (default: the provider's cache TTL)
+  STREAM_WORKERS        threads running polls                (default 8)
+  STREAM_HEARTBEAT      seconds between SSE keep-alive lines (default 15)
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import REGISTRY, responses
+from .cache import ttl_for
+from .errors import error_status
+
+WORKERS   = int(os.environ.get('STREAM_WORKERS', 8))
+HEARTBEAT = float(os.environ.get('STREAM_HEARTBEAT', 15))
+
+
+def poll_interval(slug: str) -> float:
+    """Seconds between polls of one topic; polling faster than the cache TTL would only hit the cache."""
+    return float(os.environ.get('STREAM_POLL_SECONDS', ttl_for(slug)))
+
+
+def format_event(event: str, payload: dict) -> str:
+    """Serialise one event in text/event-stream framing."""
+    return f'event: {event}\ndata: {responses.dumps(payload).decode()}\n\n'
+
+
+class _Topic:
+    """One (provider, ticker) being polled, with its subscribers and last result."""
+
+    __slots__ = ('slug', 'ticker', 'subscribers', 'last')
+
+    def __init__(self, slug: str, ticker: str):
+        self.slug        = slug
+        self.ticker      = ticker
+        self.subscribers = set()   # deliver(event, payload) callables
+        self.last        = None    # latest full result
+
+
+class StreamHub:
+    """Shares one polling job per (provider, ticker) among any number of subscribers."""
+
+    def __init__(self, workers: int = WORKERS):
+        self._topics: dict = {}     # (slug, TICKER) → _Topic
+        self._schedule: list = []   # heap of (due, seq, _Topic)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='stream')
+        self._thread = None
+        self._counters = {'polls': 0, 'pollErrors': 0, 'events': 0}
+
+    # ── Subscriptions ────────────────────────────────────────────────────────
+
+    def subscribe(self, slug: str, tickers: list, deliver) -> None:
+        """
+        Start delivering events for `tickers` to `deliver(event, payload)`.
+
+        `deliver` is called from the hub's threads and must not block.
+        """
+        snapshots = []
+        with self._lock:
+            self._ensure_thread()
+            for ticker in tickers:
+                key = (slug, ticker.upper())
+                topic = self._topics.get(key)
+                if topic is None:
+                    topic = self._topics[key] = _Topic(slug, ticker.upper())
+                    self._schedule_poll(topic, time.monotonic())
+                topic.subscribers.add(deliver)
+                if topic.last is not None:
+                    snapshots.append(topic.last)
+        for result in snapshots:
+            deliver('quote', {'provider': slug, 'symbol': result['symbol'], 'full': True, 'fields': result})
+
+    def unsubscribe(self, slug: str, tickers: list, deliver) -> None:
+        """Stop delivering to `deliver`; topics nobody watches any more stop polling."""
+        with self._lock:
+            for ticker in tickers:
+                key = (slug, ticker.upper())
+                topic = self._topics.get(key)
+                if topic is None:
+                    continue
+                topic.subscribers.discard(deliver)
+                if not topic.subscribers:
+                    del self._topics[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats['topics']      = len(self._topics)
+            stats['subscribers'] = sum(len(t.subscribers) for t in self._topics.values())
+        return stats
+
+    # ── Polling ──────────────────────────────────────────────────────────────
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='stream-scheduler', daemon=True)
+            self._thread.start()
+
+    def _schedule_poll(self, topic: _Topic, due: float) -> None:
+        """Queue the topic's next poll; caller holds the lock."""
+        heapq.heappush(self._schedule, (due, next(self._seq), topic))
+        self._wake.notify()
+
+    def _run(self) -> None:
+        """Scheduler loop: hand each due topic to the worker pool."""
+        with self._lock:
+            while True:
+                if not self._schedule:
+                    self._wake.wait()
+                    continue
+                due, _, topic = self._schedule[0]
+                now = time.monotonic()
+                if due > now:
+                    self._wake.wait(due - now)
+                    continue
+                heapq.heappop(self._schedule)
+                if self._topics.get((topic.slug, topic.ticker)) is not topic:
+                    continue   # nobody is subscribed any more
+                try:
+                    self._pool.submit(self._poll, topic)
+                except RuntimeError:
+                    return     # interpreter shutting down
+
+    def _poll(self, topic: _Topic) -> None:
+        slug, ticker = topic.slug, topic.ticker
+        try:
+            result = REGISTRY[slug](ticker, stale_ok=False)
+        except Exception as e:
+            message, status = error_status(e, ticker)
+            event = ('error', {'provider': slug, 'symbol': ticker, 'error': message, 'status': status})
+            counter = 'pollErrors'
+        else:
+            previous = topic.last
+            topic.last = result
+            if previous is None:
+                event = ('quote', {'provider': slug, 'symbol': ticker, 'full': True, 'fields': result})
+            else:
+                changed = {k: v for k, v in result.items() if previous.get(k) != v}
+                event = ('quote', {'provider': slug, 'symbol': ticker, 'full': False, 'fields': changed})
+                if not changed:
+                    event = None
+            counter = 'polls'
+
+        with self._lock:
+            self._counters[counter] += 1
+            subscribers = list(topic.subscribers)
+            if self._topics.get((slug, ticker)) is topic:
+                self._schedule_poll(topic, time.monotonic() + poll_interval(slug))
+            if event is not None:
+                self._counters['events'] += len(subscribers)
+
+        if event is not None:
+            for deliver in subscribers:
+                try:
+                    deliver(*event)
+                except Exception:
+                    pass   # a subscriber that went away must not starve the others
+
+
+HUB = StreamHub()
+
+
+# ── SSE framing ───────────────────────────────────────────────────────────────
+
+def sse(slug: str, tickers: list):
+    """
+    Generator of text/event-stream chunks for one client (Flask / WSGI).
+
+    Subscribes on first iteration and unsubscribes when the generator is
+    closed, i.e. when the client disconnects. Sends a keep-alive comment every
+    STREAM_HEARTBEAT seconds so dead connections are noticed.
+    """
+    events = queue.Queue()
+    deliver = lambda event, payload: events.put((event, payload))
+    HUB.subscribe(slug, tickers, deliver)
+    try:
+        yield 'retry: 5000\n\n'
+        while True:
+            try:
+                event, payload = events.get(timeout=HEARTBEAT)
+            except queue.Empty:
+                yield ': keep-alive\n\n'
+                continue
+            yield format_event(event, payload)
+    finally:
+        HUB.unsubscribe(slug, tickers, deliver)
+
+
+async def sse_async(slug: str, tickers: list):
+    """Async generator counterpart of sse() for the ASGI app."""
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+    deliver = lambda event, payload: loop.call_soon_threadsafe(events.put_nowait, (event, payload))
+    HUB.subscribe(slug, tickers, deliver)
+    try:
+        yield 'retry: 5000\n\n'
+        while True:
+            try:
+                event, payload = await asyncio.wait_for(events.get(), HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            yield format_event(event, payload)
+    finally:
+        HUB.unsubscribe(slug, tickers, deliver)
@@ -2,70 +2,80 @@
 providers/yahoo_finance.py
 ==========================
 Yahoo Finance data provider.
-Fetches 1-year daily chart data via the unofficial Yahoo Finance chart API.
+Fetches daily chart data via the unofficial Yahoo Finance chart API: one year on
+the first request for a symbol, then only the bars since the last stored date.
+
+Request building and response parsing are kept free of I/O so that fetch()
+(requests, blocking) and fetch_async() (httpx, asyncio) share them.
 
 No API key required. Requests are made server-side to bypass browser CORS restrictions.
 Docs: https://query2.finance.yahoo.com/v8/finance/chart/<SYMBOL>
 """
 
-import requests
+import asyncio
 from datetime import datetime
-from .base import FIXED_DATES, find_closest_date, calculate_change
+from . import aio, http_client, log
+from .bars import Bars, local_day_numbers
+from .base import PhaseTimer, PriceSeries, calculate_change, comparison_fields
+from .history_store import STORE
 
+SLUG     = 'yahoo-finance'
 BASE_URL = 'https://query2.finance.yahoo.com/v8/finance/chart'
 
 _HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
 }
 
+logger = log.get(SLUG)
 
-def fetch(ticker: str) -> dict:
-    """
-    Fetch stock data from the Yahoo Finance chart endpoint.
 
-    Returns a standardised result dictionary (see providers/__init__.py for schema).
-    Raises ValueError for invalid tickers or missing data.
-    """
-    print(f'📊 Yahoo Finance: fetching {ticker}')
+# ── Requests and parsing (no I/O) ─────────────────────────────────────────────
+
+def _chart_params(since: str | None) -> dict:
+    """Query for daily bars dated on or after `since` (the last year when None)."""
+    if since is None:
+        return {'range': '1y', 'interval': '1d'}
+    return {
+        'period1':  int(datetime.strptime(since, '%Y-%m-%d').timestamp()),
+        'period2':  int(datetime.now().timestamp()),
+        'interval': '1d',
+    }
 
-    response = requests.get(
-        f'{BASE_URL}/{ticker.upper()}',
-        params={'range': '1y', 'interval': '1d'},
-        headers=_HEADERS,
-        timeout=15,
-    )
-    response.raise_for_status()
-    data = response.json()
 
+def _parse_chart(data: dict, symbol: str) -> tuple:
+    """Turn a chart payload into (Bars, meta dict)."""
     chart = data.get('chart', {})
     if chart.get('error'):
         raise ValueError(f"Yahoo Finance error: {chart['error'].get('description', 'Unknown error')}")
 
     result_data = chart.get('result')
     if not result_data:
-        raise ValueError(f'No data found for ticker: {ticker}')
+        raise ValueError(f'No data found for ticker: {symbol}')
 
     result_item = result_data[0]
     meta       = result_item.get('meta', {})
     timestamps = result_item.get('timestamp', [])
     quotes     = result_item.get('indicators', {}).get('quote', [{}])[0]
-    closes     = quotes.get('close', [])
-    opens      = quotes.get('open', [])
 
-    # Drop entries with no close price
-    valid_data = [
-        (ts, c, o)
-        for ts, c, o in zip(timestamps, closes, opens)
-        if c is not None
-    ]
+    # Columns decode straight into arrays; entries with no close price are dropped
+    bars = Bars.from_columns(
+        local_day_numbers(timestamps),
+        quotes.get('close', []),
+        open=quotes.get('open'),
+        high=quotes.get('high'),
+        low=quotes.get('low'),
+    )
+    return bars, meta
+
 
-    if not valid_data:
+def _build_result(ticker: str, bars: Bars, meta: dict) -> dict:
+    """Compute the standardised result from oldest-first Bars."""
+    if not len(bars):
         raise ValueError(f'No valid price data for: {ticker}')
 
     # ── Current price ────────────────────────────────────────────────────────
-    latest_ts, latest_close, latest_open = valid_data[-1]
+    current_date, latest_open, _, _, latest_close = bars.bar(-1)
     current_price = round(latest_close, 2)
-    current_date  = datetime.fromtimestamp(latest_ts).strftime('%Y-%m-%d')
     open_price    = latest_open if latest_open else current_price
     daily_change, daily_change_percent = calculate_change(current_price, open_price)
 
@@ -82,38 +92,69 @@ def fetch(ticker: str) -> dict:
         'timestamp':     current_date,
     }
 
-    # Build date → price map for historical lookups
-    date_price_map = {
-        datetime.fromtimestamp(ts).strftime('%Y-%m-%d'): round(c, 2)
-        for ts, c, _ in valid_data
-    }
-    all_dates = list(date_price_map.keys())
-
-    # 5 trading days ago
-    if len(valid_data) > 5:
-        price_5 = round(valid_data[-6][1], 2)
-        change_5, pct_5 = calculate_change(current_price, price_5)
-        result.update({'price5DaysAgo': price_5, 'change5Days': change_5, 'changePercent5Days': pct_5})
-
-    # 30 trading days ago
-    if len(valid_data) > 30:
-        price_30 = round(valid_data[-31][1], 2)
-        change_30, pct_30 = calculate_change(current_price, price_30)
-        result.update({'price30DaysAgo': price_30, 'change30Days': change_30, 'changePercent30Days': pct_30})
-
-    # Fixed dates
-    for key, price_key, change_key, pct_key in [
-        ('april1_2025',    'priceApril1_2025',    'changeApril1',    'changePercentApril1'),
-        ('october1_2025',  'priceOctober1_2025',  'changeOctober1',  'changePercentOctober1'),
-        ('december1_2025', 'priceDecember1_2025', 'changeDecember1', 'changePercentDecember1'),
-    ]:
-        closest = find_closest_date(all_dates, FIXED_DATES[key])
-        if closest:
-            p = date_price_map[closest]
-            c, pct = calculate_change(current_price, p)
-            result[price_key]  = p
-            result[change_key] = c
-            result[pct_key]    = pct
-
-    print(f'✅ Yahoo Finance: {ticker} = ${current_price}')
+    # Lookback and fixed-date comparisons, vectorized over the whole series
+    result.update(comparison_fields(PriceSeries.from_bars(bars), current_price, decimals=2))
+
+    return result
+
+
+# ── Fetch ─────────────────────────────────────────────────────────────────────
+
+def fetch(ticker: str) -> dict:
+    """
+    Fetch stock data from the Yahoo Finance chart endpoint.
+
+    Daily bars are kept in the local history store, so warm requests only
+    download the bars since the last stored date.
+
+    Returns a standardised result dictionary (see providers/__init__.py for schema).
+    Raises ValueError for invalid tickers or missing data.
+    """
+    symbol = ticker.upper()
+    timer  = PhaseTimer(SLUG)
+
+    logger.debug('📊 Yahoo Finance: fetching %s', ticker)
+
+    meta = {}
+
+    def download(since):
+        bars, chart_meta = _parse_chart(http_client.get_json(
+            f'{BASE_URL}/{symbol}', params=_chart_params(since), headers=_HEADERS, timeout=15, provider=SLUG,
+        ), symbol)
+        meta.update(chart_meta)
+        return bars
+
+    with timer.phase('bars'):
+        bars = STORE.sync(SLUG, symbol, download)
+
+    with timer.phase('compute'):
+        result = _build_result(ticker, bars, meta)
+    if log.sampled():
+        logger.info('✅ Yahoo Finance: %s = $%s (%s)', ticker, result['price'], timer.summary())
+    return result
+
+
+async def fetch_async(ticker: str) -> dict:
+    """Async variant of fetch()."""
+    symbol = ticker.upper()
+    timer  = PhaseTimer(SLUG)
+
+    logger.debug('📊 Yahoo Finance: fetching %s (async)', ticker)
+
+    meta = {}
+
+    async def download(since):
+        bars, chart_meta = _parse_chart(await aio.get_json(
+            f'{BASE_URL}/{symbol}', params=_chart_params(since), headers=_HEADERS, timeout=15, provider=SLUG,
+        ), symbol)
+        meta.update(chart_meta)
+        return bars
+
+    with timer.phase('bars'):
+        bars = await STORE.sync_async(SLUG, symbol, download)
+
+    with timer.phase('compute'):
+        result = _build_result(ticker, bars, meta)
+    if log.sampled():
+        logger.info('✅ Yahoo Finance: %s = $%s (%s)', ticker, result['price'], timer.summary())
     return result
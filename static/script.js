@@ -6,6 +6,10 @@
 // ─── State ────────────────────────────────────────────────────────────────────
 
 let isLoading = false;
+let liveSource = null;   // EventSource streaming updates for the displayed ticker
+let liveData = null;     // latest full result shown in the results panel
+let chartTarget = null;  // { api, ticker } of the history chart shown
+let chartSeq = 0;        // bumped per history request, so stale responses are dropped
 
 // ─── Helpers ──────────────────────────────────────────────────────────────────
 
@@ -178,6 +182,177 @@ function displayResult(data) {
 
 // ─── Main Handler ─────────────────────────────────────────────────────────────
 
+// ─── History Chart ────────────────────────────────────────────────────────────
+
+/**
+ * Value of the active pill in a chart control group.
+ * @param {string} groupId - 'chartRanges' or 'chartMethods'
+ * @param {string} key - dataset key to read
+ * @returns {string}
+ */
+function getChartOption(groupId, key) {
+    const active = document.querySelector(`#${groupId} .chart-pill.active`);
+    return active ? active.dataset[key] : '';
+}
+
+/**
+ * Fetch the ticker's daily history, range-filtered and downsampled server-side
+ * to about one point per pixel (or one candle per 6 pixels), and draw it.
+ * @param {string} api - Provider slug
+ * @param {string} ticker
+ */
+async function loadHistory(api, ticker) {
+    chartTarget = { api, ticker };
+    const seq = ++chartSeq;
+    const canvas = document.getElementById('historyChart');
+    const note = document.getElementById('chartNote');
+
+    const method = getChartOption('chartMethods', 'method') || 'lttb';
+    const months = getChartOption('chartRanges', 'months');
+    const width = canvas.clientWidth || 480;
+    const params = new URLSearchParams({
+        method,
+        points: String(Math.max(3, method === 'ohlc' ? Math.floor(width / 6) : width)),
+    });
+    if (months) {
+        const from = new Date();
+        from.setMonth(from.getMonth() - Number(months));
+        params.set('from', from.toISOString().slice(0, 10));
+    }
+
+    note.textContent = 'Loading history…';
+    try {
+        const response = await fetch(`/api/${api}/${encodeURIComponent(ticker)}/history?${params}`);
+        const data = await response.json();
+        if (seq !== chartSeq) return;
+
+        if (!response.ok || data.error) {
+            clearChart();
+            note.textContent = data.error || 'History unavailable.';
+            return;
+        }
+        if (!data.close.length) {
+            clearChart();
+            note.textContent = 'No stored history for this range yet.';
+            return;
+        }
+
+        drawChart(canvas, data);
+        const label = { lttb: ', LTTB', ohlc: ', OHLC buckets' }[data.method] || '';
+        note.textContent = `${data.from} – ${data.to} · ${data.points} of ${data.total} trading days${label}`;
+    } catch (err) {
+        if (seq !== chartSeq) return;
+        console.error('History error:', err);
+        clearChart();
+        note.textContent = 'History unavailable.';
+    }
+}
+
+/**
+ * Size the canvas backing store to its CSS box and return a cleared 2D context.
+ * @param {HTMLCanvasElement} canvas
+ * @returns {CanvasRenderingContext2D}
+ */
+function resetCanvas(canvas) {
+    const ratio = window.devicePixelRatio || 1;
+    canvas.width = canvas.clientWidth * ratio;
+    canvas.height = canvas.clientHeight * ratio;
+    const ctx = canvas.getContext('2d');
+    ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+    ctx.clearRect(0, 0, canvas.clientWidth, canvas.clientHeight);
+    return ctx;
+}
+
+/**
+ * Blank the history chart.
+ */
+function clearChart() {
+    resetCanvas(document.getElementById('historyChart'));
+}
+
+/**
+ * Draw a history payload: a close-price line, or candles for 'ohlc' buckets.
+ * Missing open/high/low values (close-only providers) fall back to the close.
+ * @param {HTMLCanvasElement} canvas
+ * @param {Object} data - Columnar payload from /api/<provider>/<ticker>/history
+ */
+function drawChart(canvas, data) {
+    const ctx = resetCanvas(canvas);
+    const width = canvas.clientWidth;
+    const height = canvas.clientHeight;
+    const pad = 10;
+    const n = data.close.length;
+    const candles = data.method === 'ohlc';
+
+    const open = data.open.map((v, i) => v ?? data.close[i]);
+    const high = candles ? data.high.map((v, i) => v ?? Math.max(open[i], data.close[i])) : data.close;
+    const low = candles ? data.low.map((v, i) => v ?? Math.min(open[i], data.close[i])) : data.close;
+    const max = Math.max(...high);
+    const min = Math.min(...low);
+    const y = (v) => pad + ((max - v) / (max - min || 1)) * (height - 2 * pad);
+
+    if (candles) {
+        const slot = (width - 2 * pad) / n;
+        const body = Math.max(1, slot * 0.6);
+        for (let i = 0; i < n; i++) {
+            const x = pad + slot * (i + 0.5);
+            const top = y(Math.max(open[i], data.close[i]));
+            const bottom = y(Math.min(open[i], data.close[i]));
+            ctx.strokeStyle = ctx.fillStyle = data.close[i] >= open[i] ? '#10b981' : '#e74c3c';
+            ctx.beginPath();
+            ctx.moveTo(x, y(high[i]));
+            ctx.lineTo(x, y(low[i]));
+            ctx.stroke();
+            ctx.fillRect(x - body / 2, top, body, Math.max(1, bottom - top));
+        }
+    } else {
+        const x = (i) => (n === 1 ? width / 2 : pad + (i * (width - 2 * pad)) / (n - 1));
+        ctx.strokeStyle = '#667eea';
+        ctx.lineWidth = 1.5;
+        ctx.beginPath();
+        data.close.forEach((v, i) => (i === 0 ? ctx.moveTo(x(i), y(v)) : ctx.lineTo(x(i), y(v))));
+        ctx.stroke();
+    }
+
+    ctx.fillStyle = '#999';
+    ctx.font = '10px sans-serif';
+    ctx.fillText(formatPrice(max), pad, pad + 2);
+    ctx.fillText(formatPrice(min), pad, height - pad + 2);
+}
+
+// ─── Live Updates ─────────────────────────────────────────────────────────────
+
+/**
+ * Keep the displayed result current via the /api/stream Server-Sent Events
+ * endpoint; updates carry only the fields that changed.
+ * @param {string} api - Provider slug
+ * @param {Object} data - Result currently displayed
+ */
+function startLiveUpdates(api, data) {
+    stopLiveUpdates();
+    if (!window.EventSource) return;
+
+    liveData = data;
+    liveSource = new EventSource(
+        `/api/stream?provider=${encodeURIComponent(api)}&tickers=${encodeURIComponent(data.symbol)}`
+    );
+    liveSource.addEventListener('quote', function (e) {
+        const update = JSON.parse(e.data);
+        liveData = update.full ? update.fields : Object.assign({}, liveData, update.fields);
+        displayResult(liveData);
+    });
+}
+
+/**
+ * Close the live update stream, if any.
+ */
+function stopLiveUpdates() {
+    if (liveSource) {
+        liveSource.close();
+        liveSource = null;
+    }
+}
+
 /**
  * Main handler for the Price button click (also called on Enter key).
  */
@@ -200,6 +375,7 @@ async function handlePriceClick() {
 
     const api = getSelectedApi();
     const btn = document.getElementById('priceBtn');
+    stopLiveUpdates();
 
     // Set loading state
     isLoading = true;
@@ -221,6 +397,8 @@ async function handlePriceClick() {
         }
 
         displayResult(data);
+        startLiveUpdates(api, data);
+        loadHistory(api, data.symbol);
     } catch (err) {
         console.error('Fetch error:', err);
         if (err instanceof TypeError && err.message.includes('fetch')) {
@@ -250,10 +428,25 @@ document.querySelectorAll('.api-pill').forEach(function (pill) {
             p.classList.remove('active');
         });
         this.classList.add('active');
+        stopLiveUpdates();
+        chartTarget = null;
         hideMessages();
     });
 });
 
+// Chart range / method pills — activate within the group and redraw
+document.querySelectorAll('.chart-pill').forEach(function (pill) {
+    pill.addEventListener('click', function () {
+        this.parentElement.querySelectorAll('.chart-pill').forEach(function (p) {
+            p.classList.remove('active');
+        });
+        this.classList.add('active');
+        if (chartTarget) {
+            loadHistory(chartTarget.api, chartTarget.ticker);
+        }
+    });
+});
+
 // Focus input on page load
 window.addEventListener('load', function () {
     document.getElementById('tickerInput').focus();